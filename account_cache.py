@@ -0,0 +1,103 @@
+"""
+Account snapshot cache for the GUI.
+
+Balance and position reads are shared between every dashboard tab, trade
+validation and order submission. Entries live for a short TTL, concurrent
+misses for the same key are coalesced into a single exchange call, and the
+whole cache is invalidated whenever an order is placed.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A single in-progress exchange call that other callers can wait on"""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class AccountSnapshotCache:
+    """TTL cache with single-flight loading for account balance and positions"""
+
+    def __init__(self, api, ttl: float = 5.0):
+        self.api = api
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}
+        self._inflight: Dict[str, _Flight] = {}
+        self._generation = 0
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'invalidations': 0}
+
+    def get_balance(self) -> Dict[str, Any]:
+        """Get account balance, served from cache while fresh"""
+        return self._get('balance', self.api.get_account_balance)
+
+    def get_positions(self) -> Dict[str, Any]:
+        """Get raw positions response, served from cache while fresh"""
+        return self._get('positions', self.api.get_positions)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop cached snapshots after a fill or order placement"""
+        with self._lock:
+            self._generation += 1
+            self.stats['invalidations'] += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _get(self, key: str, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.stats['hits'] += 1
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            if flight is not None and flight.generation == self._generation:
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                flight = _Flight(self._generation)
+                self._inflight[key] = flight
+                self.stats['misses'] += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                # Error responses are never cached, and neither is a result
+                # that was fetched before the latest invalidation
+                cacheable = (
+                    flight.error is None
+                    and flight.generation == self._generation
+                    and not (isinstance(flight.result, dict) and 'error' in flight.result)
+                )
+                if cacheable:
+                    self._entries[key] = (time.monotonic(), flight.result)
+            flight.done.set()
+
+        if flight.error is not None:
+            logger.error(f"Error loading account snapshot '{key}': {flight.error}")
+            raise flight.error
+        return flight.result
@@ -0,0 +1,252 @@
+"""
+Rate-limit-aware request scheduling for PionexAPI.
+
+Every exchange call is assigned a weight class (order, account or market).
+Each class has its own token bucket, and all classes share a global bucket
+that mirrors the exchange's IP limit. When tokens are scarce, waiting order
+requests are served before account reads, and account reads before market
+data, so order placement never queues behind chart refreshes. A 429
+response puts the class into a cooldown instead of being retried, which
+stops retry storms.
+"""
+
+import functools
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLASSES = {
+    'order': {'rate': 10, 'burst': 10, 'priority': 0},
+    'account': {'rate': 5, 'burst': 10, 'priority': 1},
+    'market': {'rate': 10, 'burst': 20, 'priority': 2},
+}
+
+ORDER_METHODS = ('place_', 'cancel_', 'create_', 'close_', 'batch_')
+ACCOUNT_METHODS = ('get_account', 'get_positions', 'get_balance', 'get_open_orders', 'get_order',
+                   'get_fills', 'get_trade', 'test_connection')
+
+
+def weight_class(method_name: str) -> str:
+    """Map a PionexAPI method name to its weight class"""
+    if method_name.startswith(ORDER_METHODS):
+        return 'order'
+    if method_name.startswith(ACCOUNT_METHODS):
+        return 'account'
+    return 'market'
+
+
+def is_rate_limited(response: Any) -> bool:
+    """Detect a 429 / rate-limit error dict returned by PionexAPI"""
+    if not isinstance(response, dict) or 'error' not in response:
+        return False
+    if response.get('status_code') == 429 or str(response.get('code', '')).upper() in (
+            '429', 'RATE_LIMIT', 'TOO_MANY_REQUESTS', 'APIKEY_RATE_LIMIT', 'IP_RATE_LIMIT'):
+        return True
+    error = str(response.get('error', '')).lower()
+    return '429' in error or 'rate limit' in error or 'too many requests' in error
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float, weight: float = 1.0) -> float:
+        """Seconds until `weight` tokens are available (0 if available now)"""
+        self.refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        if self.tokens >= weight:
+            return blocked
+        return max(blocked, (weight - self.tokens) / self.rate)
+
+
+class RequestScheduler:
+    """Priority-aware admission control across weight classes"""
+
+    def __init__(self, classes: Optional[Dict[str, Dict[str, float]]] = None,
+                 global_rate: float = 20, global_burst: float = 30, cooldown: float = 5.0):
+        classes = classes or DEFAULT_CLASSES
+        self.buckets = {name: TokenBucket(c['rate'], c['burst']) for name, c in classes.items()}
+        self.priorities = {name: int(c.get('priority', 9)) for name, c in classes.items()}
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.cooldown = float(cooldown)
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self.stats = {name: {'admitted': 0, 'waited': 0.0, 'throttled': 0} for name in classes}
+
+    def acquire(self, cls: str, weight: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until a request of class `cls` may be sent"""
+        if cls not in self.buckets:
+            cls = 'market'
+        entry = (self.priorities[cls], next(self._seq), cls, weight)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._admission_delay(entry, now)
+                    if delay == 0:
+                        self.buckets[cls].tokens -= weight
+                        self.global_bucket.tokens -= weight
+                        self.stats[cls]['admitted'] += 1
+                        self.stats[cls]['waited'] += now - started
+                        return True
+                    if deadline is not None and now + delay > deadline:
+                        return False
+                    self._cond.wait(delay)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def penalize(self, cls: str, retry_after: Optional[float] = None):
+        """Pause a class after a 429"""
+        pause = float(retry_after) if retry_after else self.cooldown
+        with self._cond:
+            until = time.monotonic() + pause
+            bucket = self.buckets.get(cls, self.buckets['market'])
+            bucket.blocked_until = max(bucket.blocked_until, until)
+            bucket.tokens = 0.0
+            if cls in self.stats:
+                self.stats[cls]['throttled'] += 1
+            self._cond.notify_all()
+        logger.warning(f"Rate limited on '{cls}' requests; pausing for {pause:.1f}s")
+
+    def _admission_delay(self, entry, now: float) -> float:
+        """0 if `entry` may go now, otherwise seconds to wait"""
+        priority, _, cls, weight = entry
+        own = self.buckets[cls].wait_time(now, weight)
+        shared = self.global_bucket.wait_time(now, weight)
+        # A higher-priority waiter that could use the shared tokens goes first
+        for other in sorted(self._waiting):
+            if other is entry:
+                break
+            if other[0] < priority and self.buckets[other[2]].wait_time(now, other[3]) == 0:
+                return max(shared, 0.01)
+        return max(own, shared)
+
+
+class ScheduledAPI:
+    """Proxy that routes every PionexAPI call through a RequestScheduler"""
+
+    def __init__(self, api, scheduler: RequestScheduler, timeout: Optional[float] = 30.0):
+        self._api = api
+        self._scheduler = scheduler
+        self._timeout = timeout
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        return self._scheduler
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._api, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+        cls = weight_class(name)
+
+        def scheduled(*args, **kwargs):
+            if not self._scheduler.acquire(cls, timeout=self._timeout):
+                return {'error': f'Rate limit queue timeout for {name}'}
+            result = attr(*args, **kwargs)
+            if is_rate_limited(result):
+                self._scheduler.penalize(cls, result.get('retry_after'))
+            return result
+
+        scheduled.__name__ = name
+        return scheduled
+
+
+HTTP_FUNCTIONS = ('request', 'get', 'post', 'put', 'patch', 'delete', 'head', 'options')
+
+
+class _PooledRequests:
+    """Stands in for `requests` in the client's module: HTTP calls made inside a
+    pooled client's _make_request use that client's session, everything else is
+    passed through to the real module"""
+
+    _local = threading.local()
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        session = getattr(self._local, 'session', None)
+        if session is not None and name in HTTP_FUNCTIONS:
+            return getattr(session, name)
+        return getattr(self._module, name)
+
+
+def configure_session(api, pool_size: int = 20) -> Optional[requests.Session]:
+    """Route the client's HTTP calls through a pooled keep-alive session without automatic retries
+
+    A client that already keeps a requests.Session in ``session`` gets the pooled
+    adapter mounted on it. Otherwise, for a client whose ``_make_request`` calls the
+    module-level ``requests`` functions, those calls are redirected to a new pooled
+    session while ``_make_request`` runs. Returns None when neither applies.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session = getattr(api, 'session', None)
+    if isinstance(session, requests.Session):
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    make_request = getattr(api, '_make_request', None)
+    module = sys.modules.get(type(api).__module__)
+    client_requests = getattr(module, 'requests', None)
+    if make_request is None or not (client_requests is requests or isinstance(client_requests, _PooledRequests)):
+        logger.warning(f"{type(api).__name__} exposes no session or _make_request; requests will not be pooled")
+        return None
+    if client_requests is requests:
+        module.requests = _PooledRequests(requests)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    local = _PooledRequests._local
+
+    @functools.wraps(make_request)
+    def pooled_request(*args, **kwargs):
+        previous = getattr(local, 'session', None)
+        local.session = session
+        try:
+            return make_request(*args, **kwargs)
+        finally:
+            local.session = previous
+
+    api._make_request = pooled_request
+    return session
+
+
+def build_scheduled_api(api, api_config: Dict[str, Any]) -> ScheduledAPI:
+    """Wrap a PionexAPI with pooling and scheduling from the `api` config section"""
+    configure_session(api, api_config.get('pool_size', 20))
+    scheduler = RequestScheduler(
+        classes=api_config.get('rate_limits') or DEFAULT_CLASSES,
+        global_rate=api_config.get('global_rate', 20),
+        global_burst=api_config.get('global_burst', 30),
+        cooldown=api_config.get('rate_limit_cooldown', 5.0)
+    )
+    return ScheduledAPI(api, scheduler, timeout=api_config.get('timeout', 30))
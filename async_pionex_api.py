@@ -0,0 +1,226 @@
+"""
+Async Pionex REST client.
+
+Same method surface and return shapes as PionexAPI (success responses carry
+``data``; failures are ``{'error': message, 'code': code}``) but built on
+asyncio/aiohttp, so the auto-trader loops, the scanner and websocket
+consumers can keep hundreds of requests in flight on one event loop without
+a thread per request.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from api_scheduler import DEFAULT_CLASSES, TokenBucket
+from request_signer import RequestSigner
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = 'https://api.pionex.com'
+
+
+def order_body(symbol: str, side: str, order_type: str, quantity: float, price: float = None) -> Dict[str, Any]:
+    """Order request body; `quantity` is in the base asset for both sides, as with PionexAPI"""
+    body = {'symbol': symbol, 'side': side, 'type': order_type, 'size': str(quantity)}
+    if price is not None:
+        body['price'] = str(price)
+    return body
+
+
+class AsyncPionexAPI:
+    """asyncio counterpart of PionexAPI"""
+
+    def __init__(self, api_key: str = None, secret_key: str = None, base_url: str = BASE_URL,
+                 config: Dict[str, Any] = None, session: aiohttp.ClientSession = None):
+        if config is None:
+            from config_loader import get_config
+            config = get_config()
+        api_config = config.get('api', {})
+        self.api_key = api_key or os.getenv('PIONEX_API_KEY') or api_config.get('key', '')
+        self.secret_key = secret_key or os.getenv('PIONEX_SECRET_KEY') or api_config.get('secret', '')
+        self.base_url = base_url.rstrip('/')
+        self.signer = RequestSigner(self.api_key, self.secret_key)
+        self.retry_attempts = int(api_config.get('retry_attempts', 3))
+        self.retry_backoff = float(api_config.get('retry_backoff', 1.5))
+        self.timeout = aiohttp.ClientTimeout(total=api_config.get('timeout', 30))
+        self.max_in_flight = int(api_config.get('max_in_flight', 200))
+        self._session = session
+        self._owns_session = session is None
+        self._in_flight = None
+        self._buckets = {
+            name: TokenBucket(c['rate'], c['burst'])
+            for name, c in (api_config.get('rate_limits') or DEFAULT_CLASSES).items()
+        }
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    # ---- signing and transport -------------------------------------------------
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._owns_session = True
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+
+    async def _throttle(self, cls: str):
+        bucket = self._buckets.get(cls) or self._buckets.get('market')
+        if bucket is None:
+            return
+        # Reserve the token before sleeping (nothing awaits in between, so no lock is
+        # needed); later callers of the same class queue behind it, other classes don't
+        delay = bucket.wait_time(time.monotonic())
+        bucket.tokens -= 1
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _request(self, method: str, path: str, params: Dict[str, Any] = None,
+                       body: Dict[str, Any] = None, signed: bool = False, cls: str = 'market') -> Dict[str, Any]:
+        session = await self._get_session()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        last_error = None
+        # Only reads are safe to resend: a POST/DELETE that timed out may already have
+        # been executed by the exchange, and resending it would duplicate the order
+        attempts = self.retry_attempts if method == 'GET' else 1
+
+        for attempt in range(attempts):
+            headers = {'Content-Type': 'application/json'}
+            data = json.dumps(body, separators=(',', ':')) if body is not None else ''
+            if signed:
+                query_string, auth = self.signer.sign(method, path, params, data)
+                headers.update(auth)
+            else:
+                query_string = self.signer.canonical_query(params)
+            url = f"{self.base_url}{path}?{query_string}" if query_string else self.base_url + path
+
+            await self._throttle(cls)
+            try:
+                async with self._in_flight:
+                    async with session.request(method, url, data=data or None, headers=headers) as response:
+                        if response.status == 429:
+                            retry_after = response.headers.get('Retry-After')
+                            return {'error': 'Rate limit exceeded', 'code': 'RATE_LIMIT', 'status_code': 429,
+                                    'retry_after': float(retry_after) if retry_after else None}
+                        if response.status >= 500:
+                            last_error = {'error': f'HTTP {response.status}', 'status_code': response.status}
+                            raise aiohttp.ClientResponseError(response.request_info, (), status=response.status)
+                        result = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = last_error or {'error': str(e) or e.__class__.__name__}
+                if attempt < attempts - 1:
+                    await asyncio.sleep(self.retry_backoff ** attempt)
+                continue
+
+            if isinstance(result, dict) and result.get('result') is False:
+                message = result.get('message') or 'Unknown API error'
+                logger.error(f"API error: {message} (code: {result.get('code')})")
+                return {'error': message, 'code': result.get('code')}
+            return result
+
+        last_error = last_error or {'error': 'Request failed'}
+        if method != 'GET':
+            # The exchange may or may not have applied it; callers must check before resubmitting
+            last_error['outcome_unknown'] = True
+        logger.error(f"Request {method} {path} failed after {attempts} attempt(s): {last_error}")
+        return last_error
+
+    # ---- public surface (mirrors PionexAPI) ------------------------------------
+
+    async def test_connection(self) -> Dict[str, Any]:
+        """Check credentials with a signed balance request"""
+        return await self._request('GET', '/api/v1/account/balances', signed=True, cls='account')
+
+    async def get_account_balance(self) -> Dict[str, Any]:
+        """USDT balance as {'total', 'available', 'frozen'}"""
+        response = await self._request('GET', '/api/v1/account/balances', signed=True, cls='account')
+        if 'error' in response:
+            return response
+        for item in response.get('data', {}).get('balances', []):
+            if item.get('coin') == 'USDT':
+                free, frozen = float(item.get('free', 0)), float(item.get('frozen', 0))
+                return {'total': free + frozen, 'available': free, 'frozen': frozen}
+        return {'total': 0.0, 'available': 0.0, 'frozen': 0.0}
+
+    async def get_positions(self) -> Dict[str, Any]:
+        """Non-zero balances as {'data': {'balances': [...]}}"""
+        response = await self._request('GET', '/api/v1/account/balances', signed=True, cls='account')
+        if 'error' in response:
+            return response
+        balances = []
+        for item in response.get('data', {}).get('balances', []):
+            free, frozen = float(item.get('free', 0)), float(item.get('frozen', 0))
+            balances.append({'currency': item.get('coin', ''), 'free': free, 'frozen': frozen,
+                             'total': free + frozen})
+        return {'data': {'balances': balances}}
+
+    async def get_trading_pairs(self) -> Dict[str, Any]:
+        """All exchange symbols"""
+        return await self._request('GET', '/api/v1/common/symbols')
+
+    async def get_klines(self, symbol: str, interval: str = '5M', limit: int = 100,
+                         end_time: Optional[int] = None) -> Dict[str, Any]:
+        """Klines as {'data': {'klines': [...]}}, optionally ending at `end_time` (ms)"""
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if end_time is not None:
+            params['endTime'] = int(end_time)
+        return await self._request('GET', '/api/v1/market/klines', params=params)
+
+    async def get_ticker_price(self, symbol: str) -> Dict[str, Any]:
+        """Latest price as {'data': {'symbol', 'price'}}"""
+        response = await self._request('GET', '/api/v1/market/tickers', params={'symbol': symbol})
+        if 'error' in response:
+            return response
+        tickers = response.get('data', {}).get('tickers', [])
+        if not tickers:
+            return {'error': f'No ticker data for {symbol}'}
+        return {'data': {'symbol': symbol, 'price': float(tickers[0].get('close', 0))}}
+
+    async def get_real_time_price(self, symbol: str) -> float:
+        """Latest price as a float (0.0 on error)"""
+        response = await self.get_ticker_price(symbol)
+        return float(response['data']['price']) if 'data' in response else 0.0
+
+    async def place_market_order(self, symbol: str, side: str, quantity: float) -> Dict[str, Any]:
+        """Market order for `quantity` of the base asset"""
+        return await self._request('POST', '/api/v1/trade/order', body=order_body(symbol, side, 'MARKET', quantity),
+                                   signed=True, cls='order')
+
+    async def place_limit_order(self, symbol: str, side: str, quantity: float, price: float) -> Dict[str, Any]:
+        """Limit order"""
+        return await self._request('POST', '/api/v1/trade/order',
+                                   body=order_body(symbol, side, 'LIMIT', quantity, price), signed=True, cls='order')
+
+    async def place_mass_order(self, symbol: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Up to 20 limit orders for one symbol in a single request"""
+        body = {'symbol': symbol, 'orders': [
+            {'side': o['side'], 'type': 'LIMIT', 'size': str(o['quantity']), 'price': str(o['price'])}
+            for o in orders
+        ]}
+        return await self._request('POST', '/api/v1/trade/massOrder', body=body, signed=True, cls='order')
+
+    async def cancel_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
+        """Cancel an open order"""
+        return await self._request('DELETE', '/api/v1/trade/order', body={'symbol': symbol, 'orderId': order_id},
+                                   signed=True, cls='order')
+
+    async def gather(self, *calls) -> List[Any]:
+        """Run several client coroutines concurrently"""
+        return await asyncio.gather(*calls)
@@ -0,0 +1,212 @@
+"""
+Batch order submission.
+
+Orders are grouped per symbol and split into chunks no larger than the
+exchange's batch limit. Chunks are submitted concurrently on the fetch
+pipeline, where the API scheduler still enforces the order rate limit. A
+chunk goes through the client's multi-order call when it has one, and
+through one limit order per level otherwise. Results come back per order
+(mass-order responses are parsed entry by entry), and with
+``rollback=True`` a partial failure cancels every order that was placed;
+orders that could not be cancelled are reported as failures. Async clients
+(AsyncPionexAPI) are driven on an event loop thread owned by the submitter.
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from symbols import format_symbol
+
+logger = logging.getLogger(__name__)
+
+MASS_ORDER_LIMIT = 20
+
+
+def chunk_orders(orders: Sequence[Dict[str, Any]], chunk_size: int = MASS_ORDER_LIMIT) -> List[List[int]]:
+    """Indices of `orders` grouped by symbol and split into chunks"""
+    by_symbol: Dict[str, List[int]] = {}
+    for i, order in enumerate(orders):
+        by_symbol.setdefault(format_symbol(order['symbol']), []).append(i)
+    chunks = []
+    for indices in by_symbol.values():
+        chunks.extend(indices[i:i + chunk_size] for i in range(0, len(indices), chunk_size))
+    return chunks
+
+
+def _order_id(response: Any) -> Optional[Any]:
+    data = response.get('data') if isinstance(response, dict) else None
+    if isinstance(data, dict):
+        return data.get('orderId')
+    return None
+
+
+def _entry_result(entry: Any) -> Dict[str, Any]:
+    """One order's outcome from a mass-order response entry"""
+    if isinstance(entry, dict):
+        if 'error' in entry or entry.get('result') is False or entry.get('code'):
+            return {'success': False, 'error': entry.get('error') or entry.get('message') or entry.get('code')}
+        order_id = entry.get('orderId')
+    else:
+        order_id = entry
+    if order_id is None:
+        return {'success': True, 'order_id': None, 'warning': 'Exchange returned no order id'}
+    return {'success': True, 'order_id': order_id}
+
+
+def mass_order_results(response: Any, count: int) -> List[Dict[str, Any]]:
+    """Per-order outcomes of a place_mass_order response for `count` orders"""
+    if not isinstance(response, dict) or 'error' in response:
+        error = response.get('error') if isinstance(response, dict) else 'Invalid response'
+        return [{'success': False, 'error': error} for _ in range(count)]
+    data = response.get('data') or {}
+    entries = data.get('orderIds', data.get('orders', [])) if isinstance(data, dict) else []
+    if not isinstance(entries, list):
+        entries = []
+    results = [_entry_result(entry) for entry in entries[:count]]
+    results.extend({'success': False, 'error': 'No result for order in mass-order response'}
+                   for _ in range(count - len(results)))
+    return results
+
+
+async def _awaited(awaitable):
+    return await awaitable
+
+
+class BatchOrderSubmitter:
+    """Places many limit orders as concurrent, rate-limited chunks"""
+
+    def __init__(self, api, pipeline=None, chunk_size: int = MASS_ORDER_LIMIT):
+        self.api = api
+        self.pipeline = pipeline
+        self.chunk_size = max(1, min(int(chunk_size), MASS_ORDER_LIMIT))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    def close(self):
+        """Stop the event loop used for an async API client (its session lives on that loop, so close it too)"""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None:
+            return
+        close = getattr(self.api, 'close', None)
+        if close is not None and inspect.iscoroutinefunction(close):
+            asyncio.run_coroutine_threadsafe(close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name='batch-orders-loop',
+                                                     daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def _call(self, method, *args):
+        """Call a client method; coroutines from async clients run on the submitter's loop thread"""
+        response = method(*args)
+        if inspect.isawaitable(response):
+            response = asyncio.run_coroutine_threadsafe(_awaited(response), self._event_loop()).result()
+        return response
+
+    def submit(self, orders: Sequence[Dict[str, Any]], rollback: bool = False) -> Dict[str, Any]:
+        """Place `orders` ({symbol, side, quantity, price}) and report per-order results"""
+        orders = [dict(order, symbol=format_symbol(order['symbol'])) for order in orders]
+        if not orders:
+            return {'success': True, 'results': [], 'placed': 0, 'failed': 0, 'rolled_back': 0}
+
+        chunks = chunk_orders(orders, self.chunk_size)
+        place = lambda indices: self._place_chunk(orders, indices)
+        if self.pipeline is not None and len(chunks) > 1:
+            chunk_results = self.pipeline.map(place, chunks)
+        else:
+            chunk_results = [place(indices) for indices in chunks]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(orders)
+        for indices, outcome in zip(chunks, chunk_results):
+            for i, result in zip(indices, outcome):
+                results[i] = {'index': i, **orders[i], **result}
+
+        failed = sum(1 for r in results if not r['success'])
+        rolled_back = self._rollback(results) if rollback and failed else 0
+        # Orders still live on the exchange (rolled-back ones no longer count)
+        placed = sum(1 for r in results if r['success'] and not r.get('cancelled'))
+        uncancelled = sum(1 for r in results if r['success'] and r.get('cancelled') is False)
+        if failed:
+            logger.warning(f"Batch order: {failed} of {len(orders)} orders failed"
+                           + (f", cancelled {rolled_back} placed orders" if rollback else ''))
+        if uncancelled:
+            logger.error(f"Batch order rollback left {uncancelled} orders open")
+        return {
+            'success': failed == 0,
+            'results': results,
+            'placed': placed,
+            'failed': failed,
+            'rolled_back': rolled_back,
+            'uncancelled': uncancelled
+        }
+
+    def _place_chunk(self, orders: List[Dict[str, Any]], indices: List[int]) -> List[Dict[str, Any]]:
+        mass_order = getattr(self.api, 'place_mass_order', None)
+        if mass_order is not None and len(indices) > 1:
+            symbol = orders[indices[0]]['symbol']
+            try:
+                response = self._call(mass_order, symbol, [orders[i] for i in indices])
+            except Exception as e:
+                response = {'error': str(e)}
+            return mass_order_results(response, len(indices))
+
+        outcome = []
+        for i in indices:
+            order = orders[i]
+            try:
+                response = self._call(self.api.place_limit_order, order['symbol'], order['side'], order['quantity'],
+                                      order['price'])
+            except Exception as e:
+                response = {'error': str(e)}
+            if isinstance(response, dict) and 'error' not in response:
+                outcome.append({'success': True, 'order_id': _order_id(response)})
+            else:
+                error = response.get('error') if isinstance(response, dict) else 'Invalid response'
+                outcome.append({'success': False, 'error': error})
+        return outcome
+
+    def _rollback(self, results: List[Dict[str, Any]]) -> int:
+        """Cancel every successfully placed order; returns how many were cancelled
+
+        Orders that cannot be cancelled (no order id, or the cancel failed)
+        keep ``cancelled=False`` and a ``cancel_error``.
+        """
+        placed = [r for r in results if r['success']]
+        for result in placed:
+            if result.get('order_id') is None:
+                result['cancelled'] = False
+                result['cancel_error'] = 'No order id to cancel'
+        cancellable = [r for r in placed if r.get('order_id') is not None]
+
+        def cancel(result):
+            try:
+                return self._call(self.api.cancel_order, result['symbol'], result['order_id'])
+            except Exception as e:
+                return {'error': str(e)}
+
+        if self.pipeline is not None:
+            responses = self.pipeline.map(cancel, cancellable)
+        else:
+            responses = [cancel(r) for r in cancellable]
+
+        cancelled = 0
+        for result, response in zip(cancellable, responses):
+            ok = isinstance(response, dict) and 'error' not in response
+            result['cancelled'] = ok
+            if not ok:
+                result['cancel_error'] = response.get('error') if isinstance(response, dict) else 'Invalid response'
+            cancelled += ok
+        return cancelled
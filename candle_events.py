@@ -0,0 +1,139 @@
+"""
+``candle_closed`` events for strategy triggering.
+
+The CandleStore reports a close as soon as a streamed trade or a kline
+fetch opens the next bar. Quiet markets may see no trade for a while after
+a boundary, so a timer also wakes at every subscribed interval boundary
+(plus a small grace period) and confirms the close from the store. Each
+(symbol, interval, bar) is delivered once, whichever path sees it first.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from candle_store import interval_ms, normalize_interval
+from symbols import format_symbol
+
+logger = logging.getLogger(__name__)
+
+MULTI_TF_STRATEGIES = ('RSI_STRATEGY', 'ADVANCED_STRATEGY')
+
+# callback(symbol, interval, open_time of the bar that closed)
+CandleClosed = Callable[[str, str, int], None]
+
+
+def strategy_intervals(config: Dict[str, Any], strategy: str, default: str = '5M') -> List[str]:
+    """Kline intervals a strategy reads, primary interval first"""
+    intervals = [normalize_interval(default)]
+    multi_tf = config.get('rsi', {}).get('multi_tf', {})
+    if strategy in MULTI_TF_STRATEGIES and multi_tf.get('enabled'):
+        for tf in multi_tf.get('timeframes', []):
+            interval = normalize_interval(tf)
+            if interval not in intervals:
+                intervals.append(interval)
+    return intervals
+
+
+class CandleEventBus:
+    """Delivers candle_closed(symbol, interval, open_time) to subscribers"""
+
+    def __init__(self, candle_store=None, grace: float = 0.5):
+        self.candle_store = candle_store
+        self.grace = float(grace)
+        self._subscribers: Dict[Tuple[str, str], Dict[int, CandleClosed]] = {}
+        self._emitted: Dict[Tuple[str, str], int] = {}
+        self._next_token = 1
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.emitted = 0
+
+    def subscribe(self, symbol: str, interval: str, callback: CandleClosed) -> int:
+        """Register a callback for one (symbol, interval); returns a token for unsubscribe"""
+        key = (format_symbol(symbol), normalize_interval(interval))
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers.setdefault(key, {})[token] = callback
+        self._wake.set()
+        return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            for key, callbacks in list(self._subscribers.items()):
+                if callbacks.pop(token, None) is not None and not callbacks:
+                    del self._subscribers[key]
+
+    def subscriptions(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(self._subscribers)
+
+    def emit(self, symbol: str, interval: str, open_time: int) -> bool:
+        """Deliver a close unless this bar (or a later one) was already delivered"""
+        key = (format_symbol(symbol), normalize_interval(interval))
+        open_time = int(open_time)
+        with self._lock:
+            if self._emitted.get(key, -1) >= open_time:
+                return False
+            self._emitted[key] = open_time
+            callbacks = list(self._subscribers.get(key, {}).values())
+        self.emitted += 1
+        for callback in callbacks:
+            try:
+                callback(key[0], key[1], open_time)
+            except Exception as e:
+                logger.error(f"candle_closed handler failed for {key[0]} {key[1]}: {e}")
+        return True
+
+    # ---- boundary timer --------------------------------------------------------------
+
+    def check(self, now: Optional[float] = None) -> int:
+        """Emit closes that boundaries have passed but no trade has reported yet"""
+        now_ms = int((time.time() if now is None else now) * 1000)
+        fired = 0
+        for symbol, interval in self.subscriptions():
+            step = interval_ms(interval)
+            closed = now_ms - now_ms % step - step
+            if self._emitted.get((symbol, interval), -1) >= closed:
+                continue
+            if self.candle_store is not None:
+                times, _ = self.candle_store.get(symbol, interval, 2)
+                if not len(times) or int(times[-1]) < closed:
+                    continue
+            fired += self.emit(symbol, interval, closed)
+        return fired
+
+    def next_boundary(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the next subscribed interval boundary (plus grace)"""
+        now_ms = int((time.time() if now is None else now) * 1000)
+        steps = {interval_ms(interval) for _, interval in self.subscriptions()}
+        if not steps:
+            return None
+        return min(step - now_ms % step for step in steps) / 1000.0 + self.grace
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='candle-events', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Candle boundary check failed: {e}")
+            self._wake.clear()
+            # Sleeps until the next boundary; a new subscription wakes it to re-plan
+            self._wake.wait(self.next_boundary() or 60.0)
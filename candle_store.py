@@ -0,0 +1,371 @@
+"""
+In-process kline store backed by NumPy ring buffers.
+
+Each (symbol, interval) pair is seeded once from REST and then kept current
+from websocket trades or small incremental fetches, so charts, technical
+analysis and strategy tests read the same candles from memory instead of
+refetching 100 klines per request.
+
+With a ``base_interval`` (1M), higher intervals are derived: they are seeded
+from REST once for history, and from then on only the base interval is
+refreshed and every derived bar is rebuilt from base bars, so all
+timeframes agree with each other. A derived bucket whose start is older
+than the base history keeps its seeded open and volume until base bars
+cover it completely.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from symbols import format_symbol
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+INTERVAL_ALIASES = {'1H': '60M'}
+
+INTERVAL_MS = {
+    '1M': 60_000,
+    '5M': 5 * 60_000,
+    '15M': 15 * 60_000,
+    '30M': 30 * 60_000,
+    '60M': 60 * 60_000,
+    '4H': 4 * 60 * 60_000,
+    '8H': 8 * 60 * 60_000,
+    '12H': 12 * 60 * 60_000,
+    '1D': 24 * 60 * 60_000,
+}
+
+
+def normalize_interval(interval: str) -> str:
+    """Convert interval to Pionex format (5m -> 5M, 1H -> 60M)"""
+    interval = (interval or '5M').upper()
+    return INTERVAL_ALIASES.get(interval, interval)
+
+
+def interval_ms(interval: str) -> int:
+    """Length of one candle in milliseconds"""
+    return INTERVAL_MS.get(normalize_interval(interval), 5 * 60_000)
+
+
+def parse_klines(klines: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse list or dict klines into sorted (times, ohlcv) arrays"""
+    times = []
+    values = []
+    for kline in klines:
+        try:
+            if isinstance(kline, dict):
+                times.append(int(kline['time']))
+                values.append([float(kline[c]) for c in COLUMNS])
+            elif len(kline) >= 6:
+                times.append(int(kline[0]))
+                values.append([float(v) for v in kline[1:6]])
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning(f"Error processing kline data: {e}")
+    times = np.asarray(times, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64).reshape(-1, len(COLUMNS))
+    order = np.argsort(times, kind='stable')
+    return times[order], values[order]
+
+
+def resample(times: np.ndarray, values: np.ndarray, step: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Aggregate sorted OHLCV bars into `step`-ms buckets"""
+    if not len(times):
+        return times[:0], values[:0]
+    buckets = times - times % step
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.concatenate((starts[1:], [len(times)])) - 1
+    out = np.empty((len(starts), len(COLUMNS)), dtype=np.float64)
+    out[:, 0] = values[starts, 0]
+    out[:, 1] = np.maximum.reduceat(values[:, 1], starts)
+    out[:, 2] = np.minimum.reduceat(values[:, 2], starts)
+    out[:, 3] = values[ends, 3]
+    out[:, 4] = np.add.reduceat(values[:, 4], starts)
+    return buckets[starts], out
+
+
+def extract_klines(response: Dict[str, Any]) -> List[Any]:
+    """Pull the kline list out of a get_klines response"""
+    if not isinstance(response, dict) or 'error' in response:
+        return []
+    data = response.get('data')
+    if isinstance(data, dict) and 'klines' in data:
+        return data['klines'] or []
+    if isinstance(data, list):
+        return data
+    return []
+
+
+class CandleRing:
+    """Fixed-capacity chronological OHLCV buffer"""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = int(capacity)
+        self.times = np.zeros(self.capacity, dtype=np.int64)
+        self.values = np.zeros((self.capacity, len(COLUMNS)), dtype=np.float64)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def last_time(self) -> Optional[int]:
+        if not self.count:
+            return None
+        return int(self.times[(self.start + self.count - 1) % self.capacity])
+
+    def extend(self, times: np.ndarray, values: np.ndarray):
+        """Merge candles; the open bar is replaced, older bars are ignored"""
+        for t, row in zip(times, values):
+            self.upsert(int(t), row)
+
+    def upsert(self, open_time: int, row) -> bool:
+        """Insert or replace one candle; returns True if a new bar was appended"""
+        last = self.last_time
+        if last is not None and open_time < last:
+            return False
+        if last is not None and open_time == last:
+            self.values[(self.start + self.count - 1) % self.capacity] = row
+            return False
+        idx = (self.start + self.count) % self.capacity
+        self.times[idx] = open_time
+        self.values[idx] = row
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+        return True
+
+    def apply_trade(self, open_time: int, price: float, size: float) -> bool:
+        """Fold a trade into the bar starting at open_time"""
+        last = self.last_time
+        if last is not None and open_time == last:
+            idx = (self.start + self.count - 1) % self.capacity
+            bar = self.values[idx]
+            bar[1] = max(bar[1], price)
+            bar[2] = min(bar[2], price)
+            bar[3] = price
+            bar[4] += size
+            return False
+        return self.upsert(open_time, (price, price, price, price, size))
+
+    def last(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the latest n candles in chronological order"""
+        n = self.count if n is None else min(int(n), self.count)
+        first = self.start + self.count - n
+        if first + n <= self.capacity or first >= self.capacity:
+            first %= self.capacity
+            return self.times[first:first + n].copy(), self.values[first:first + n].copy()
+        idx = np.arange(first, first + n) % self.capacity
+        return self.times[idx], self.values[idx]
+
+
+class CandleStore:
+    """Per-(symbol, interval) candle cache shared by charts, analysis and strategies"""
+
+    def __init__(self, api, capacity: int = 1000, seed_limit: int = 500, min_refresh: float = 5.0,
+                 base_interval: Optional[str] = None):
+        self.api = api
+        self.capacity = int(capacity)
+        self.seed_limit = int(seed_limit)
+        self.min_refresh = float(min_refresh)
+        self.base_interval = normalize_interval(base_interval) if base_interval else None
+        self._rings: Dict[Tuple[str, str], CandleRing] = {}
+        self._last_fetch: Dict[Tuple[str, str], float] = {}
+        self._streamed: Dict[Tuple[str, str], float] = {}
+        self._seeded = set()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # listener(symbol, interval, open_time) when a new bar closes the previous one
+        self.close_listeners = []
+
+    def get(self, symbol: str, interval: str = '5M', limit: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the latest candles as (times, ohlcv) arrays, fetching only when needed"""
+        key = (format_symbol(symbol), normalize_interval(interval))
+        if self.is_derived(key[1]):
+            return self._get_derived(key, limit)
+        ring = self._rings.get(key)
+        if ring is None or len(ring) < limit or self._needs_refresh(key, ring):
+            self._fetch(key)
+            ring = self._rings.get(key)
+        if ring is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(COLUMNS)))
+        # Copy under the lock append/upsert hold, so a reader never sees a half-written bar
+        with self._key_lock(key):
+            return ring.last(limit)
+
+    def is_derived(self, interval: str) -> bool:
+        """True if `interval` is built from base-interval bars"""
+        if not self.base_interval:
+            return False
+        interval = normalize_interval(interval)
+        base = INTERVAL_MS.get(self.base_interval)
+        step = INTERVAL_MS.get(interval)
+        return interval != self.base_interval and bool(base and step) and step % base == 0
+
+    def _get_derived(self, key: Tuple[str, str], limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        base_key = (key[0], self.base_interval)
+        base = self._rings.get(base_key)
+        if base is None or self._needs_refresh(base_key, base):
+            self._fetch(base_key)
+        ring = self._rings.get(key)
+        if ring is None or len(ring) < limit:
+            # History beyond the base ring comes from REST once; the current bars from base data
+            self._fetch(key)
+            self._resample(key)
+            ring = self._rings.get(key)
+        if ring is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(COLUMNS)))
+        with self._key_lock(key):
+            return ring.last(limit)
+
+    def _resample(self, key: Tuple[str, str], since: Optional[int] = None):
+        """Rebuild derived bars of `key` from base bars at or after `since`"""
+        base_ring = self._rings.get((key[0], self.base_interval))
+        if base_ring is None or not len(base_ring):
+            return
+        with self._key_lock((key[0], self.base_interval)):
+            times, values = base_ring.last()
+        step = interval_ms(key[1])
+        covered_from = int(times[0])
+        if since is not None:
+            keep = times >= since - since % step
+            times, values = times[keep], values[keep]
+        buckets, bars = resample(times, values, step)
+        if not len(buckets):
+            return
+        with self._key_lock(key):
+            ring = self._ring(key)
+            before = ring.last_time
+            for open_time, row in zip(buckets.tolist(), bars):
+                if open_time < covered_from and ring.last_time == open_time:
+                    # Base bars start mid-bucket: keep the seeded open and volume
+                    _, seeded = ring.last(1)
+                    row = (seeded[0, 0], max(seeded[0, 1], row[1]), min(seeded[0, 2], row[2]),
+                           row[3], max(seeded[0, 4], row[4]))
+                ring.upsert(open_time, row)
+            closed = self._closed_bar(ring, before)
+        self._notify_close(key, closed)
+
+    def _propagate(self, symbol: str, since: int):
+        """Push new base bars into every derived ring of the symbol"""
+        with self._lock:
+            derived = [key for key in self._rings if key[0] == symbol and self.is_derived(key[1])]
+        for key in derived:
+            self._resample(key, since)
+
+    def get_market_data(self, symbol: str, interval: str = '5M', limit: int = 100) -> pd.DataFrame:
+        """Get candles as a DataFrame (same shape as TradingStrategies.get_market_data)"""
+        times, values = self.get(symbol, interval, limit)
+        if not len(times):
+            return pd.DataFrame(columns=['timestamp', *COLUMNS])
+        df = pd.DataFrame(values, columns=list(COLUMNS))
+        df.insert(0, 'timestamp', pd.to_datetime(times, unit='ms'))
+        return df
+
+    def apply_trade(self, symbol: str, price: float, size: float, timestamp: int):
+        """Fold a streamed trade into every tracked interval for the symbol"""
+        symbol = format_symbol(symbol)
+        now = time.time()
+        with self._lock:
+            rings = [(key, ring) for key, ring in self._rings.items() if key[0] == symbol]
+        for key, ring in rings:
+            step = interval_ms(key[1])
+            with self._key_lock(key):
+                before = ring.last_time
+                ring.apply_trade(int(timestamp) - int(timestamp) % step, float(price), float(size))
+                closed = self._closed_bar(ring, before)
+            self._streamed[key] = now
+            self._notify_close(key, closed)
+
+    def update(self, symbol: str, interval: str, klines: List[Any]):
+        """Merge klines received from a stream or another fetch"""
+        key = (format_symbol(symbol), normalize_interval(interval))
+        times, values = parse_klines(klines)
+        with self._key_lock(key):
+            ring = self._ring(key)
+            before = ring.last_time
+            ring.extend(times, values)
+            closed = self._closed_bar(ring, before)
+        self._notify_close(key, closed)
+        if len(times) and key[1] == self.base_interval:
+            self._propagate(key[0], int(times[0]))
+
+    def tracked(self) -> List[Tuple[str, str]]:
+        """(symbol, interval) pairs currently held in memory"""
+        with self._lock:
+            return list(self._rings)
+
+    def _needs_refresh(self, key: Tuple[str, str], ring: CandleRing) -> bool:
+        """Poll at most once per min_refresh, and only while the stream is silent"""
+        now = time.time()
+        if now - self._streamed.get(key, 0) < self.min_refresh:
+            return False
+        return now - self._last_fetch.get(key, 0) >= self.min_refresh
+
+    def _fetch(self, key: Tuple[str, str]):
+        with self._key_lock(key):
+            # Another thread may have refreshed while we waited; failed
+            # fetches are not retried before min_refresh either
+            current = self._rings.get(key)
+            if time.time() - self._last_fetch.get(key, 0) < self.min_refresh:
+                return
+            if key not in self._seeded or current is None or not len(current):
+                limit = self.seed_limit
+            else:
+                missed = (time.time() * 1000 - current.last_time) // interval_ms(key[1]) + 2
+                limit = int(min(self.seed_limit, max(2, missed)))
+            self._last_fetch[key] = time.time()
+            try:
+                response = self.api.get_klines(symbol=key[0], interval=key[1], limit=limit)
+            except Exception as e:
+                logger.error(f"Error fetching klines for {key[0]} ({key[1]}): {e}")
+                return
+            times, values = parse_klines(extract_klines(response))
+            if not len(times):
+                return
+            ring = self._ring(key)
+            before = ring.last_time
+            ring.extend(times, values)
+            closed = self._closed_bar(ring, before)
+            self._seeded.add(key)
+        self._notify_close(key, closed)
+        if key[1] == self.base_interval:
+            self._propagate(key[0], int(times[0]))
+
+    @staticmethod
+    def _closed_bar(ring: CandleRing, before: Optional[int]) -> Optional[int]:
+        """Open time of the bar closed by a merge that started a newer bar"""
+        if before is None or ring.last_time is None or ring.last_time <= before or len(ring) < 2:
+            return None
+        return int(ring.last(2)[0][0])
+
+    def _notify_close(self, key: Tuple[str, str], closed: Optional[int]):
+        if closed is None:
+            return
+        for listener in self.close_listeners:
+            try:
+                listener(key[0], key[1], closed)
+            except Exception as e:
+                logger.error(f"Candle close listener failed for {key[0]} {key[1]}: {e}")
+
+    def _ring(self, key: Tuple[str, str]) -> CandleRing:
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = self._rings[key] = CandleRing(self.capacity)
+            return ring
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
@@ -0,0 +1,151 @@
+"""
+Push-based dashboard updates over Socket.IO.
+
+A single background task reads the shared account snapshot and strategy
+status, diffs them against what was last sent, and emits only the changes
+to the rooms that have subscribers. The cost per cycle is independent of
+the number of open browser tabs.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CHANNELS = ('account', 'positions', 'strategies')
+
+
+def diff_balance(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the balance fields that changed since the previous snapshot"""
+    if previous is None:
+        return dict(current)
+    changed = {key: value for key, value in current.items() if previous.get(key) != value}
+    for key in previous:
+        if key not in current:
+            changed[key] = None
+    return changed
+
+
+def diff_positions(previous: Optional[List[Dict[str, Any]]], current: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return upserted and removed positions keyed by symbol"""
+    previous_by_symbol = {p.get('symbol'): p for p in (previous or [])}
+    current_by_symbol = {p.get('symbol'): p for p in current}
+    upserted = [p for symbol, p in current_by_symbol.items() if previous_by_symbol.get(symbol) != p]
+    removed = [symbol for symbol in previous_by_symbol if symbol not in current_by_symbol]
+    return {'upserted': upserted, 'removed': removed}
+
+
+class DashboardPublisher:
+    """Publishes account, position and strategy deltas to subscribed rooms"""
+
+    def __init__(self, socketio, trading_bot, interval: float = 2.0):
+        self.socketio = socketio
+        self.trading_bot = trading_bot
+        self.interval = float(interval)
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, Set[str]] = {}
+        self._publish_lock = threading.Lock()
+        self._last_sent: Dict[str, Any] = {}
+        self._running = False
+
+    def start(self):
+        """Start the background publishing task"""
+        if self._running:
+            return
+        self._running = True
+        self.socketio.start_background_task(self._run)
+        logger.info("Dashboard publisher started")
+
+    def stop(self):
+        """Stop the background publishing task"""
+        self._running = False
+
+    def subscribe(self, sid: str, channels: List[str]) -> List[str]:
+        """Register a client for channels and return the accepted ones"""
+        accepted = [c for c in channels if c in CHANNELS]
+        with self._lock:
+            self._subscriptions.setdefault(sid, set()).update(accepted)
+        return accepted
+
+    def unsubscribe(self, sid: str, channels: Optional[List[str]] = None):
+        """Remove a client from some or all channels"""
+        with self._lock:
+            if channels is None:
+                self._subscriptions.pop(sid, None)
+            elif sid in self._subscriptions:
+                self._subscriptions[sid].difference_update(channels)
+
+    def active_channels(self) -> Set[str]:
+        """Channels with at least one subscriber"""
+        with self._lock:
+            active = set()
+            for channels in self._subscriptions.values():
+                active.update(channels)
+            return active
+
+    def send_snapshot(self, sid: str, channels: List[str]):
+        """Send the full current state of channels to a newly subscribed client"""
+        with self._publish_lock:
+            for channel in channels:
+                state = self._last_sent.get(channel)
+                if state is None:
+                    state = self._collect(channel)
+                    if state is None:
+                        continue
+                    self._last_sent[channel] = state
+                self._emit(channel, state, None, full=True, to=sid)
+
+    def publish(self, channels: Optional[List[str]] = None):
+        """Collect state for active channels and emit anything that changed"""
+        active = self.active_channels()
+        with self._publish_lock:
+            for channel in (channels or CHANNELS):
+                if channel not in active:
+                    continue
+                state = self._collect(channel)
+                if state is None:
+                    continue
+                previous = self._last_sent.get(channel)
+                if previous is not None and _fingerprint(previous) == _fingerprint(state):
+                    continue
+                self._last_sent[channel] = state
+                self._emit(channel, state, previous, full=previous is None, to=channel)
+
+    def _run(self):
+        while self._running:
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Error publishing dashboard updates: {e}")
+            self.socketio.sleep(self.interval)
+
+    def _collect(self, channel: str) -> Optional[Any]:
+        if channel == 'account':
+            result = self.trading_bot.get_account_balance()
+            return result['data'] if result.get('success') else None
+        if channel == 'positions':
+            result = self.trading_bot.get_positions()
+            return result['data'] if result.get('success') else None
+        if channel == 'strategies':
+            auto_trading = self.trading_bot.get_auto_trading_status()
+            strategy = self.trading_bot.get_current_strategy()
+            if not auto_trading.get('success') or not strategy.get('success'):
+                return None
+            return {'auto_trading': auto_trading['data'], 'strategy': strategy['data']}
+        return None
+
+    def _emit(self, channel: str, state: Any, previous: Any, full: bool, to: str):
+        if channel == 'account':
+            payload = {'full': full, 'data': state if full else diff_balance(previous, state)}
+            self.socketio.emit('account_delta', payload, to=to)
+        elif channel == 'positions':
+            delta = diff_positions(None if full else previous, state)
+            self.socketio.emit('position_delta', {'full': full, **delta}, to=to)
+        elif channel == 'strategies':
+            self.socketio.emit('strategy_status', state, to=to)
+
+
+def _fingerprint(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
@@ -0,0 +1,487 @@
+"""
+SQLite storage for users, settings, trades, strategies and portfolio snapshots.
+
+The database runs in WAL mode so readers never block the writer. Each thread
+keeps its own connection, and SQL text is kept constant so sqlite3's
+per-connection statement cache reuses the compiled statements. All writes go
+through a single writer thread that commits whatever is queued in one
+transaction. Concurrent auto-trader writes therefore never contend for the
+write lock ("database is locked"), and they share one fsync instead of
+paying for one each.
+"""
+
+import base64
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from snapshot_codec import DELTA, INSERT_SNAPSHOT, KEYFRAME, SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        first_name TEXT,
+        last_name TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_active BOOLEAN DEFAULT 1
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_settings (
+        user_id INTEGER PRIMARY KEY,
+        default_strategy TEXT DEFAULT 'RSI_STRATEGY',
+        default_leverage INTEGER DEFAULT 10,
+        auto_trading BOOLEAN DEFAULT 0,
+        risk_percentage REAL DEFAULT 10.0,
+        max_positions INTEGER DEFAULT 5,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS trading_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        symbol TEXT,
+        side TEXT,
+        order_type TEXT,
+        quantity REAL,
+        price REAL,
+        status TEXT,
+        order_id TEXT,
+        strategy TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS active_strategies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        symbol TEXT,
+        strategy_type TEXT,
+        parameters TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        total_value REAL,
+        total_pnl REAL,
+        positions_count INTEGER,
+        snapshot_data TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )""",
+)
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = (
+    ("CREATE INDEX IF NOT EXISTS idx_trading_history_user_created ON trading_history (user_id, created_at)",
+     "CREATE INDEX IF NOT EXISTS idx_trading_history_symbol_created ON trading_history (symbol, created_at)",
+     "CREATE INDEX IF NOT EXISTS idx_trading_history_strategy_created ON trading_history (strategy, created_at)",
+     "CREATE INDEX IF NOT EXISTS idx_trading_history_created ON trading_history (created_at)",
+     "CREATE INDEX IF NOT EXISTS idx_trading_history_order_id ON trading_history (order_id)",
+     "CREATE INDEX IF NOT EXISTS idx_active_strategies_user ON active_strategies (user_id, is_active)",
+     "CREATE INDEX IF NOT EXISTS idx_portfolio_snapshots_user ON portfolio_snapshots (user_id, created_at)"),
+    # Performance rollups (see performance.py)
+    ("""CREATE TABLE IF NOT EXISTS equity_rollups (
+        user_id INTEGER NOT NULL,
+        bucket TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        open REAL, high REAL, low REAL, close REAL,
+        pnl REAL,
+        samples INTEGER DEFAULT 0,
+        PRIMARY KEY (user_id, bucket, ts)
+    ) WITHOUT ROWID""",
+     """CREATE TABLE IF NOT EXISTS strategy_rollups (
+        user_id INTEGER NOT NULL,
+        strategy TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        trades INTEGER DEFAULT 0,
+        wins INTEGER DEFAULT 0,
+        losses INTEGER DEFAULT 0,
+        realized_pnl REAL DEFAULT 0,
+        volume REAL DEFAULT 0,
+        PRIMARY KEY (user_id, strategy, bucket, ts)
+    ) WITHOUT ROWID""",
+     """CREATE TABLE IF NOT EXISTS rollup_positions (
+        user_id INTEGER NOT NULL,
+        symbol TEXT NOT NULL,
+        strategy TEXT NOT NULL,
+        quantity REAL DEFAULT 0,
+        cost REAL DEFAULT 0,
+        PRIMARY KEY (user_id, symbol, strategy)
+    ) WITHOUT ROWID""",
+     """CREATE TABLE IF NOT EXISTS rollup_state (
+        name TEXT PRIMARY KEY,
+        last_id INTEGER DEFAULT 0
+    )"""),
+    # Trades still open when the rollups passed them, re-checked on every refresh
+    ("CREATE TABLE IF NOT EXISTS rollup_pending (id INTEGER PRIMARY KEY)",),
+)
+
+HISTORY_FILTERS = {
+    'user_id': 'user_id = ?',
+    'symbol': 'symbol = ?',
+    'strategy': 'strategy = ?',
+    'side': 'side = ?',
+    'start': 'created_at >= ?',
+    'end': 'created_at < ?',
+}
+
+SETTING_COLUMNS = ('default_strategy', 'default_leverage', 'auto_trading', 'risk_percentage', 'max_positions')
+
+INSERT_USER = ("INSERT INTO users (user_id, username, first_name, last_name) VALUES (?, ?, ?, ?) "
+               "ON CONFLICT(user_id) DO UPDATE SET username = excluded.username, "
+               "first_name = excluded.first_name, last_name = excluded.last_name")
+INSERT_SETTINGS = "INSERT OR IGNORE INTO user_settings (user_id) VALUES (?)"
+UPDATE_SETTING = {
+    column: f"UPDATE user_settings SET {column} = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?"
+    for column in SETTING_COLUMNS
+}
+INSERT_TRADE = ("INSERT INTO trading_history (user_id, symbol, side, order_type, quantity, price, status, "
+                "order_id, strategy) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+UPDATE_TRADE_STATUS = "UPDATE trading_history SET status = ? WHERE order_id = ?"
+INSERT_STRATEGY = ("INSERT INTO active_strategies (user_id, symbol, strategy_type, parameters) "
+                   "VALUES (?, ?, ?, ?)")
+DEACTIVATE_STRATEGY = "UPDATE active_strategies SET is_active = 0 WHERE id = ?"
+
+SELECT_USER = "SELECT * FROM users WHERE user_id = ?"
+SELECT_SETTINGS = "SELECT * FROM user_settings WHERE user_id = ?"
+SELECT_RECENT_TRADES = "SELECT * FROM trading_history ORDER BY id DESC LIMIT ?"
+SELECT_USER_TRADES = "SELECT * FROM trading_history WHERE user_id = ? ORDER BY id DESC LIMIT ?"
+SELECT_STRATEGIES = "SELECT * FROM active_strategies WHERE user_id = ? AND is_active = 1 ORDER BY id"
+SELECT_SNAPSHOTS = "SELECT * FROM portfolio_snapshots WHERE user_id = ? ORDER BY id DESC LIMIT ?"
+
+_STOP = object()
+
+
+class _Write:
+    __slots__ = ('sql', 'params', 'done', 'result', 'error', 'on_error')
+
+    def __init__(self, sql: Any, params: Sequence[Any], on_error: Optional[Callable[[], None]] = None):
+        self.sql = sql
+        self.params = params
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.on_error = on_error
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended on"""
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return created_at, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid history cursor') from e
+
+
+def normalize_timestamp(value) -> str:
+    """Bound in created_at's own 'YYYY-MM-DD HH:MM:SS' (UTC) form, so the string comparison is chronological"""
+    try:
+        moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip())
+    except ValueError as e:
+        raise ValueError(f'Invalid timestamp: {value!r}') from e
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class Database:
+    """Thread-safe SQLite access with WAL, per-thread connections and batched writes"""
+
+    def __init__(self, db_path: str = 'trading_bot.db', batch_size: int = 500, statement_cache: int = 128,
+                 write_timeout: float = 30.0, snapshot_keyframe_interval: int = 50):
+        self.db_path = db_path
+        self.batch_size = int(batch_size)
+        self.statement_cache = int(statement_cache)
+        self.write_timeout = float(write_timeout)
+        self._local = threading.local()
+        self._connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._connections_lock = threading.Lock()
+        self._queue: 'queue.Queue' = queue.Queue()
+        self.stats = {'writes': 0, 'transactions': 0}
+        # Portfolio snapshots are stored as keyframes plus deltas
+        self.snapshot_writer = SnapshotWriter(self, snapshot_keyframe_interval)
+
+        self.init_database()
+        self._writer = threading.Thread(target=self._write_loop, name='db-writer', daemon=True)
+        self._writer.start()
+
+    # ---- connections -----------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                               cached_statements=self.statement_cache, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        with self._connections_lock:
+            self._prune_connections()
+            self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _prune_connections(self):
+        """Close connections whose threads have exited (caller holds the lock)"""
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened on first use)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def init_database(self):
+        """Create tables if they don't exist"""
+        conn = self.connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        self.migrate()
+
+    def migrate(self):
+        """Apply pending schema migrations"""
+        conn = self.connection()
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {number}')
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+            logger.info(f"Applied database migration {number}")
+
+    # ---- writes ----------------------------------------------------------------
+
+    def execute_write(self, sql: Any, params: Any = (), wait: bool = True,
+                      on_error: Optional[Callable[[], None]] = None) -> Optional[int]:
+        """Queue a write (positional or named params); returns lastrowid when `wait` is true
+
+        `sql` may also be a callable taking the writer's connection; it runs
+        inside the write transaction and its return value is the result.
+        """
+        write = _Write(sql, params if isinstance(params, dict) else tuple(params), on_error)
+        self._queue.put(write)
+        if not wait:
+            return None
+        self._wait(write)
+        return write.result
+
+    def execute_transaction(self, statements: Sequence[Sequence[Any]], wait: bool = True):
+        """Queue several (sql, params) writes that commit or fail together"""
+        write = _Write(None, [(sql, tuple(params)) for sql, params in statements])
+        self._queue.put(write)
+        if wait:
+            self._wait(write)
+
+    def _wait(self, write: _Write):
+        if not write.done.wait(self.write_timeout):
+            raise TimeoutError(f"Database write not committed within {self.write_timeout}s")
+        if write.error is not None:
+            raise write.error
+
+    def flush(self):
+        """Block until every queued write is committed"""
+        self.execute_write('SELECT 1')
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._commit(conn, batch)
+                    return
+                batch.append(item)
+            self._commit(conn, batch)
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Write]):
+        """Apply a batch in one transaction; a failing write is rolled back alone
+
+        Any exception (not only sqlite3.Error, e.g. OverflowError from a bad
+        parameter) is attached to its write, and every write is always
+        marked done, so neither the writer thread nor the callers hang.
+        """
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for write in batch:
+                conn.execute('SAVEPOINT write')
+                try:
+                    if write.sql is None:
+                        for sql, params in write.params:
+                            conn.execute(sql, params)
+                    elif callable(write.sql):
+                        write.result = write.sql(conn)
+                    else:
+                        write.result = conn.execute(write.sql, write.params).lastrowid
+                    conn.execute('RELEASE write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write')
+                    conn.execute('RELEASE write')
+                    write.error = e
+                    logger.error(f"Database write failed: {e}")
+            conn.execute('COMMIT')
+        except Exception as e:
+            logger.error(f"Database commit failed: {e}")
+            if conn.in_transaction:
+                try:
+                    conn.execute('ROLLBACK')
+                except sqlite3.Error as rollback_error:
+                    logger.error(f"Database rollback failed: {rollback_error}")
+            for write in batch:
+                write.error = write.error or e
+        finally:
+            self.stats['writes'] += len(batch)
+            self.stats['transactions'] += 1
+            for write in batch:
+                if write.error is not None and write.on_error is not None:
+                    write.on_error()
+                write.done.set()
+
+    # ---- reads -----------------------------------------------------------------
+
+    def _fetch_all(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.connection().execute(sql, params).fetchall()]
+
+    def _fetch_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[Dict[str, Any]]:
+        row = self.connection().execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+    # ---- users and settings ------------------------------------------------------
+
+    def add_user(self, user_id: int, username: str = None, first_name: str = None, last_name: str = None):
+        """Create or update a user and make sure they have a settings row"""
+        self.execute_write(INSERT_USER, (user_id, username, first_name, last_name), wait=False)
+        self.execute_write(INSERT_SETTINGS, (user_id,))
+
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(SELECT_USER, (user_id,))
+
+    def get_user_settings(self, user_id: int) -> Dict[str, Any]:
+        return self._fetch_one(SELECT_SETTINGS, (user_id,)) or {}
+
+    def update_user_setting(self, user_id: int, key: str, value: Any):
+        """Set one user_settings column"""
+        if key not in UPDATE_SETTING:
+            raise ValueError(f'Unknown user setting: {key}')
+        self.execute_write(INSERT_SETTINGS, (user_id,), wait=False)
+        self.execute_write(UPDATE_SETTING[key], (value, user_id))
+
+    # ---- trades ------------------------------------------------------------------
+
+    def add_trade(self, user_id: int, symbol: str, side: str, order_type: str, quantity: float, price: float,
+                  status: str = 'FILLED', order_id: str = None, strategy: str = None, wait: bool = True) -> Optional[int]:
+        """Record a trade; returns its row id unless `wait` is false"""
+        params = (user_id, symbol, side, order_type, quantity, price, status,
+                  str(order_id) if order_id is not None else None, strategy)
+        return self.execute_write(INSERT_TRADE, params, wait=wait)
+
+    def update_trade_status(self, order_id: str, status: str):
+        self.execute_write(UPDATE_TRADE_STATUS, (status, str(order_id)))
+
+    def get_recent_trades(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return self._fetch_all(SELECT_RECENT_TRADES, (limit,))
+
+    def get_user_trades(self, user_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        return self._fetch_all(SELECT_USER_TRADES, (user_id, limit))
+
+    def get_trade_history_page(self, cursor: str = None, limit: int = 50, **filters) -> Dict[str, Any]:
+        """Newest-first page of trades plus a cursor for the next page
+
+        Filters: user_id, symbol, strategy, side, start and end (created_at
+        bounds, end exclusive; any ISO 8601 form, ValueError if unparseable). Pages are keyed on (created_at, id), so each
+        page is an index range scan however deep the client has paged.
+        """
+        unknown = set(filters) - set(HISTORY_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown history filter(s): {', '.join(sorted(unknown))}")
+        clauses, params = [], []
+        for name, clause in HISTORY_FILTERS.items():
+            if filters.get(name) is not None:
+                clauses.append(clause)
+                params.append(normalize_timestamp(filters[name]) if name in ('start', 'end') else filters[name])
+        if cursor:
+            clauses.append('(created_at, id) < (?, ?)')
+            params.extend(decode_cursor(cursor))
+        limit = max(1, min(int(limit), 500))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ''
+        sql = f"SELECT * FROM trading_history {where}ORDER BY created_at DESC, id DESC LIMIT ?"
+        rows = self._fetch_all(sql, (*params, limit + 1))
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+        return {'trades': rows, 'next_cursor': next_cursor}
+
+    # ---- strategies and snapshots ------------------------------------------------
+
+    def add_active_strategy(self, user_id: int, symbol: str, strategy_type: str,
+                            parameters: Dict[str, Any] = None) -> int:
+        return self.execute_write(INSERT_STRATEGY, (user_id, symbol, strategy_type, json.dumps(parameters or {})))
+
+    def deactivate_strategy(self, strategy_id: int):
+        self.execute_write(DEACTIVATE_STRATEGY, (strategy_id,))
+
+    def get_active_strategies(self, user_id: int) -> List[Dict[str, Any]]:
+        strategies = self._fetch_all(SELECT_STRATEGIES, (user_id,))
+        for strategy in strategies:
+            strategy['parameters'] = json.loads(strategy['parameters'] or '{}')
+        return strategies
+
+    def save_portfolio_snapshot(self, user_id: int, total_value: float, total_pnl: float,
+                                positions_count: int, snapshot_data: Any = None, wait: bool = True) -> Optional[int]:
+        """Store a snapshot; snapshot_data is encoded as a keyframe or delta unless it already is"""
+        if isinstance(snapshot_data, str) and snapshot_data.startswith((KEYFRAME, DELTA)):
+            return self.execute_write(INSERT_SNAPSHOT, (user_id, total_value, total_pnl, positions_count,
+                                                        snapshot_data), wait=wait)
+        if isinstance(snapshot_data, str):
+            try:
+                snapshot_data = json.loads(snapshot_data)
+            except ValueError:
+                pass
+        return self.snapshot_writer.write(user_id, total_value, total_pnl, positions_count, snapshot_data, wait=wait)
+
+    def get_portfolio_snapshots(self, user_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        return self._fetch_all(SELECT_SNAPSHOTS, (user_id, limit))
+
+    def close(self):
+        """Commit pending writes and close every connection"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self._connections_lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
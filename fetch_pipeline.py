@@ -0,0 +1,78 @@
+"""
+Dependency-aware concurrent fetch layer.
+
+Independent exchange calls run in parallel on a bounded thread pool; a task
+starts as soon as the tasks it depends on have finished and receives their
+results as keyword arguments. Request latency becomes the longest chain of
+round-trips instead of their sum.
+"""
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Task = Union[Callable[..., Any], Tuple[Callable[..., Any], Sequence[str]]]
+
+
+class FetchPipeline:
+    """Bounded thread pool that runs a small graph of fetch tasks"""
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = int(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Run a single call on the pool"""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """Apply fn to every item concurrently, preserving order"""
+        return list(self._executor.map(fn, items))
+
+    def run(self, tasks: Dict[str, Task], timeout: float = None) -> Dict[str, Any]:
+        """Run named tasks, respecting dependencies
+
+        Each task is either a callable with no dependencies or a
+        ``(callable, [dependency names])`` tuple; the callable is invoked with
+        the dependencies' results as keyword arguments. The first failure is
+        re-raised and tasks that depend on it are not started.
+        """
+        graph = {}
+        for name, task in tasks.items():
+            fn, deps = (task, ()) if callable(task) else (task[0], tuple(task[1]))
+            unknown = [d for d in deps if d not in tasks]
+            if unknown:
+                raise ValueError(f"Task '{name}' depends on unknown task(s): {', '.join(unknown)}")
+            graph[name] = (fn, deps)
+
+        results: Dict[str, Any] = {}
+        pending = dict(graph)
+        running: Dict[Future, str] = {}
+
+        while pending or running:
+            for name in [n for n, (_, deps) in pending.items() if all(d in results for d in deps)]:
+                fn, deps = pending.pop(name)
+                running[self._executor.submit(fn, **{d: results[d] for d in deps})] = name
+            if not running:
+                raise ValueError(f"Dependency cycle between tasks: {', '.join(pending)}")
+
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"Fetch tasks timed out: {', '.join(running.values())}")
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    logger.error(f"Fetch task '{name}' failed: {error}")
+                    raise error
+                results[name] = future.result()
+
+        return results
+
+    def shutdown(self):
+        """Stop accepting work and release the pool threads"""
+        self._executor.shutdown(wait=False)
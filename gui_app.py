@@ -7,7 +7,7 @@ import json
 from datetime import datetime
 from pathlib import Path
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import webbrowser
 from dotenv import load_dotenv
 
@@ -18,7 +18,7 @@ from config_loader import get_config, reload_config
 from pionex_api import PionexAPI
 from trading_strategies import TradingStrategies
 from database import Database
-from auto_trader import get_auto_trader, start_auto_trading, stop_auto_trading, restart_auto_trading, get_auto_trading_status
+from auto_trader import get_auto_trader
 from futures_trading import (
     get_futures_trader, create_futures_grid, create_hedging_grid,
     get_dynamic_limits, check_liquidation_risk, get_strategy_status,
@@ -28,6 +28,21 @@ from backtesting import (
     run_backtest, enable_paper_trading, disable_paper_trading, get_paper_trading_ledger
 )
 from pionex_ws import PionexWebSocket
+from account_cache import AccountSnapshotCache
+from dashboard_publisher import DashboardPublisher, CHANNELS as DASHBOARD_CHANNELS
+from price_stream import PriceFanout, price_room
+from candle_store import CandleStore, normalize_interval
+from candle_events import CandleEventBus, strategy_intervals
+from indicators import IndicatorEngine
+from market_scanner import MarketScanner
+from fetch_pipeline import FetchPipeline
+from api_scheduler import build_scheduled_api
+from batch_orders import BatchOrderSubmitter
+from trade_archive import TradeArchive
+from snapshot_codec import SnapshotReader
+from performance import PerformanceRollups
+from trader_scheduler import TraderScheduler
+from symbols import format_symbol
 
 # Load environment variables
 load_dotenv()
@@ -47,17 +62,94 @@ logger = logging.getLogger(__name__)
 
 class TradingBotGUI:
     def __init__(self):
-        self.api = PionexAPI()
+        self.config = get_config()
+        # Pooled session + per-weight-class rate limiting; orders jump the queue
+        self.api = build_scheduled_api(PionexAPI(), self.config.get('api', {}))
         self.strategies = TradingStrategies(self.api)
         self.db = Database()
-        self.config = get_config()
+        
+        # Cold history/snapshots roll over to Parquet partitions by user and month
+        archive_config = self.config.get('archive', {})
+        self.archive = TradeArchive(
+            self.db,
+            archive_config.get('path', 'data/archive'),
+            archive_config.get('retention_days', 90)
+        )
+        if archive_config.get('enabled', False):
+            self.archive.start(archive_config.get('interval_hours', 24))
+        self.snapshot_reader = SnapshotReader(self.db)
+        
+        # Minute/hour/day PnL and equity rollups behind /api/performance
+        self.performance = PerformanceRollups(self.db)
+        self.performance.start(self.config.get('performance', {}).get('refresh_seconds', 30))
+        
+        # Shared balance/positions snapshot for all tabs and trade checks
+        cache_config = self.config.get('account_cache', {})
+        self.account_cache = AccountSnapshotCache(
+            self.api,
+            ttl=cache_config.get('ttl_seconds', 5) if cache_config.get('enabled', True) else 0
+        )
         
         # Initialize WebSocket for real-time data
         self.ws = None
         self.ws_connected = False
-        self.real_time_data = {}
         self.ws_thread = None
         
+        # Last price / top of book per symbol, fanned out to Socket.IO rooms
+        stream_config = self.config.get('price_stream', {})
+        self.price_fanout = PriceFanout(
+            socketio, self.api,
+            throttle=stream_config.get('throttle_seconds', 0.25),
+            stale_after=stream_config.get('stale_after_seconds', 5)
+        )
+        self.real_time_data = self.price_fanout.book
+        
+        # In-memory klines shared by charts, analysis and strategies
+        candle_config = self.config.get('candle_store', {})
+        self.candle_store = CandleStore(
+            self.api,
+            capacity=candle_config.get('capacity', 1000),
+            seed_limit=candle_config.get('seed_limit', 500),
+            min_refresh=candle_config.get('min_refresh_seconds', 5),
+            base_interval=candle_config.get('base_interval')
+        )
+        self.price_fanout.trade_listeners.append(self.candle_store.apply_trade)
+        self._prefetched = threading.local()
+        self.strategies.get_market_data = self._strategy_market_data
+        
+        # candle_closed events from the stream (or the bar boundary) trigger strategy evaluation
+        self.candle_events = CandleEventBus(self.candle_store, grace=candle_config.get('close_grace_seconds', 0.5))
+        self.candle_store.close_listeners.append(self.candle_events.emit)
+        self.candle_events.start()
+        
+        # Streaming RSI/MACD/Bollinger state per symbol and interval
+        self.indicators = IndicatorEngine(self.config)
+        
+        # Runs independent exchange calls concurrently on a bounded pool
+        self.fetcher = FetchPipeline(self.config.get('fetch_pipeline', {}).get('max_workers', 8))
+        
+        # Whole-market strategy scans over stacked candle arrays
+        self.scanner = MarketScanner(self.api, self.candle_store, self.config, pipeline=self.fetcher)
+        
+        # Grid/hedge deployments submit many orders as concurrent chunks
+        self.batch_orders = BatchOrderSubmitter(
+            self.api, self.fetcher, self.config.get('batch_orders', {}).get('chunk_size', 20)
+        )
+        
+        # One scheduler thread and a shared pool run every user's auto-trader
+        trader_config = self.config.get('auto_trading', {})
+        self.trader_step = trader_config.get('evaluation_step', 'run_trading_cycle')
+        self.trader_scheduler = TraderScheduler(
+            self.candle_store, self._create_trader,
+            max_workers=trader_config.get('max_workers', 4),
+            poll_interval=trader_config.get('poll_seconds', 5),
+            interval=trader_config.get('interval', '5M'),
+            lookback=trader_config.get('lookback', 200),
+            bus=self.candle_events if trader_config.get('event_driven', True) else None,
+            evaluate=self._evaluate_trader
+        )
+        self.trader_scheduler.start()
+        
         # Start WebSocket connection
         self._start_websocket()
         
@@ -65,6 +157,26 @@ class TradingBotGUI:
         self.auto_trading_enabled = False
         self.current_user = None
     
+    def _user_strategy(self, user_id):
+        settings = self.db.get_user_settings(user_id)
+        return settings.get('default_strategy') or self.config.get('default_strategy', 'RSI_STRATEGY')
+    
+    def _create_trader(self, user_id):
+        """The user's auto_trader instance; the scheduler keeps exactly one per user
+
+        Fails (and so enable_auto_trading fails) when the instance has no
+        callable auto_trading.evaluation_step, instead of erroring on every bar.
+        """
+        trader = get_auto_trader(user_id)
+        if not callable(getattr(trader, self.trader_step, None)):
+            raise AttributeError(f"{type(trader).__name__} has no '{self.trader_step}' method; "
+                                 f"set auto_trading.evaluation_step to its evaluation entry point")
+        return trader
+    
+    def _evaluate_trader(self, trader, symbol, times, values):
+        """Run the auto_trader's evaluation step (checked in _create_trader) for a closed candle"""
+        return getattr(trader, self.trader_step)(symbol)
+    
     def check_auth(self, user_id: str) -> bool:
         """Check if user is authorized"""
         allowed_users = self.config.get('allowed_users', [])
@@ -73,7 +185,7 @@ class TradingBotGUI:
     def get_account_balance(self):
         """Get account balance"""
         try:
-            balance = self.api.get_account_balance()
+            balance = self.account_cache.get_balance()
             return {'success': True, 'data': balance}
         except Exception as e:
             logger.error(f"Error getting balance: {e}")
@@ -82,7 +194,7 @@ class TradingBotGUI:
     def get_positions(self):
         """Get current positions"""
         try:
-            positions_response = self.api.get_positions()
+            positions_response = self.account_cache.get_positions()
             
             if 'error' in positions_response:
                 return {'success': False, 'error': positions_response['error']}
@@ -111,8 +223,8 @@ class TradingBotGUI:
     def get_portfolio(self):
         """Get portfolio information"""
         try:
-            balance = self.api.get_account_balance()
-            positions_response = self.api.get_positions()
+            balance = self.account_cache.get_balance()
+            positions_response = self.account_cache.get_positions()
             
             if 'error' in balance:
                 return {'success': False, 'error': balance['error']}
@@ -141,6 +253,13 @@ class TradingBotGUI:
                     }
                     positions.append(position)
             
+            try:
+                summary = self.performance.report(self.current_user or 1, bucket='day',
+                                                  price_lookup=self.get_real_time_price)
+                total_pnl = summary['realized_pnl'] + summary['unrealized_pnl']
+            except Exception as e:
+                logger.warning(f"Could not compute PnL from rollups: {e}")
+            
             portfolio = {
                 'balance': balance,
                 'positions': positions,
@@ -154,12 +273,14 @@ class TradingBotGUI:
             logger.error(f"Error getting portfolio: {e}")
             return {'success': False, 'error': str(e)}
     
-    def get_trading_history(self):
-        """Get trading history"""
+    def get_trading_history(self, cursor=None, limit=50, **filters):
+        """Get one page of trading history (newest first)"""
         try:
-            # Get recent trades from database
-            trades = self.db.get_recent_trades(limit=50)
-            return {'success': True, 'data': trades}
+            page = self.db.get_trade_history_page(cursor=cursor, limit=limit, **filters)
+            return {'success': True, 'data': page['trades'], 'next_cursor': page['next_cursor']}
+        except ValueError as e:
+            # Bad cursor, filter name or start/end bound: the client's fault
+            return {'success': False, 'error': str(e), 'bad_request': True}
         except Exception as e:
             logger.error(f"Error getting trading history: {e}")
             return {'success': False, 'error': str(e)}
@@ -212,6 +333,9 @@ class TradingBotGUI:
             # Reload config
             reload_config()
             
+            # Indicator periods may have changed
+            self.indicators.reset()
+            
             return {'success': True, 'message': 'Settings updated successfully'}
         except Exception as e:
             logger.error(f"Error updating settings: {e}")
@@ -242,7 +366,7 @@ class TradingBotGUI:
                 }
             
             self.auto_trading_enabled = True
-            start_auto_trading(self.current_user or 1)
+            self.trader_scheduler.start_user(self.current_user or 1, self.config.get('trading_pair', 'BTC_USDT'))
             return {'success': True, 'message': 'Auto trading enabled'}
         except Exception as e:
             logger.error(f"Error enabling auto trading: {e}")
@@ -252,7 +376,7 @@ class TradingBotGUI:
         """Disable auto trading"""
         try:
             self.auto_trading_enabled = False
-            stop_auto_trading(self.current_user or 1)
+            self.trader_scheduler.stop_user(self.current_user or 1)
             return {'success': True, 'message': 'Auto trading disabled'}
         except Exception as e:
             logger.error(f"Error disabling auto trading: {e}")
@@ -261,7 +385,7 @@ class TradingBotGUI:
     def get_auto_trading_status(self):
         """Get auto trading status"""
         try:
-            status = get_auto_trading_status(self.current_user or 1)
+            status = self.trader_scheduler.status(self.current_user or 1)
             return {'success': True, 'data': status}
         except Exception as e:
             logger.error(f"Error getting auto trading status: {e}")
@@ -328,11 +452,81 @@ class TradingBotGUI:
             else:
                 return {'success': False, 'error': 'Invalid order type'}
             
+            # Balances are stale as soon as an order reaches the exchange
+            self.account_cache.invalidate()
+            
             return {'success': True, 'data': order}
         except Exception as e:
             logger.error(f"Error executing trade: {e}")
             return {'success': False, 'error': str(e)}
     
+    def execute_batch_trade(self, orders, rollback=False):
+        """Place many limit orders at once (grid levels, hedges)"""
+        try:
+            max_orders = self.config.get('futures', {}).get('grid', {}).get('max_grids', 100)
+            if not orders:
+                return {'success': False, 'error': 'No orders provided'}
+            if len(orders) > max_orders:
+                return {'success': False, 'error': f'Too many orders: {len(orders)} (max {max_orders})'}
+            for order in orders:
+                if order.get('side') not in ('BUY', 'SELL') or not order.get('symbol'):
+                    return {'success': False, 'error': f'Invalid order: {order}'}
+                if float(order.get('quantity', 0)) <= 0 or float(order.get('price', 0)) <= 0:
+                    return {'success': False, 'error': f'Quantity and price must be positive: {order}'}
+            
+            balance_response = self.get_account_balance()
+            if not balance_response['success']:
+                return {'success': False, 'error': 'Failed to check account balance'}
+            available_balance = float(balance_response['data'].get('available', 0))
+            required_usdt = sum(float(o['quantity']) * float(o['price']) for o in orders if o['side'] == 'BUY')
+            if required_usdt > available_balance:
+                return {
+                    'success': False,
+                    'error': f'Insufficient USDT balance. Required: ${required_usdt:.2f}, Available: ${available_balance:.2f}'
+                }
+            
+            result = self.batch_orders.submit(orders, rollback=rollback)
+            self.account_cache.invalidate()
+            return {'success': result['success'], 'data': result}
+        except Exception as e:
+            logger.error(f"Error executing batch trade: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def get_equity_curve(self, user_id=None, start=None, end=None):
+        """Portfolio value and PnL over time from stored snapshots"""
+        try:
+            curve = self.snapshot_reader.equity_curve(
+                user_id if user_id is not None else self.current_user or 1, start, end
+            )
+            return {'success': True, 'data': [
+                {'time': created_at, 'total_value': value, 'total_pnl': pnl} for created_at, value, pnl in curve
+            ]}
+        except Exception as e:
+            logger.error(f"Error getting equity curve: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def get_performance(self, user_id=None, start=None, end=None, bucket=None):
+        """Equity curve, PnL, drawdown and per-strategy win rates from the background-refreshed rollups"""
+        try:
+            report = self.performance.report(
+                user_id if user_id is not None else self.current_user or 1, start, end, bucket,
+                price_lookup=self.get_real_time_price
+            )
+            return {'success': True, 'data': report}
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error getting performance: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def get_monthly_report(self, user_id=None, start=None, end=None):
+        """Monthly trade volume and portfolio PnL across live and archived data"""
+        try:
+            return {'success': True, 'data': self.archive.monthly_report(user_id, start, end)}
+        except Exception as e:
+            logger.error(f"Error building monthly report: {e}")
+            return {'success': False, 'error': str(e)}
+    
     def validate_trade_requirements(self, symbol, side, quantity, order_type='MARKET', price=None):
         """Validate trade requirements before execution"""
         try:
@@ -410,9 +604,9 @@ class TradingBotGUI:
                 formatted_symbol = symbol
             
             # Try to get market data from klines first
-            market_data = self.strategies.get_market_data(formatted_symbol)
+            times, values = self.candle_store.get(formatted_symbol, '5M', self.candle_store.seed_limit)
             
-            if market_data.empty:
+            if not len(times):
                 # Fallback to basic ticker data if klines fail
                 ticker_response = self.api.get_ticker_price(formatted_symbol)
                 if 'data' in ticker_response and 'price' in ticker_response['data']:
@@ -438,26 +632,12 @@ class TradingBotGUI:
                 else:
                     return {'success': False, 'error': f"Could not get price data for {symbol}"}
             
-            # Calculate indicators from klines data
-            prices = market_data['close'].tolist()
-            rsi = self.strategies.calculate_rsi(prices)
-            macd_line, macd_signal, macd_histogram = self.strategies.calculate_macd(prices)
-            bb_upper, bb_middle, bb_lower = self.strategies.calculate_bollinger_bands(prices)
+            # Only candles closed since the last call are folded into the indicator state
+            indicators = self.indicators.analyze(formatted_symbol, '5M', times, values[:, 3])
             
             analysis = {
                 'symbol': symbol,
-                'current_price': prices[-1] if prices else 0,
-                'rsi': rsi[-1] if rsi else 50,
-                'macd': {
-                    'line': macd_line[-1] if macd_line else 0,
-                    'signal': macd_signal[-1] if macd_signal else 0,
-                    'histogram': macd_histogram[-1] if macd_histogram else 0
-                },
-                'bollinger_bands': {
-                    'upper': bb_upper[-1] if bb_upper else 0,
-                    'middle': bb_middle[-1] if bb_middle else 0,
-                    'lower': bb_lower[-1] if bb_lower else 0
-                },
+                **indicators,
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -470,6 +650,7 @@ class TradingBotGUI:
         """Start WebSocket connection for real-time data"""
         try:
             self.ws = PionexWebSocket()
+            self.price_fanout.attach(self.ws)
             self.ws_connected = True
             logger.info("WebSocket connection started")
         except Exception as e:
@@ -479,6 +660,10 @@ class TradingBotGUI:
     def get_real_time_price(self, symbol: str) -> float:
         """Get real-time price for a symbol"""
         try:
+            # Streamed price while it is fresh, REST otherwise
+            price = self.price_fanout.get_last_price(symbol)
+            if price:
+                return price
             return self.api.get_real_time_price(symbol)
         except Exception as e:
             logger.error(f"Error getting real-time price for {symbol}: {e}")
@@ -547,6 +732,27 @@ class TradingBotGUI:
             logger.error(f"Error updating strategy: {e}")
             return {'success': False, 'error': str(e)}
     
+    def _strategy_market_data(self, symbol: str, interval: str = '5M', limit: int = 100):
+        """Strategy market data: frames prefetched for the current call, else the candle store"""
+        frames = getattr(self._prefetched, 'frames', None) or {}
+        df = frames.get((format_symbol(symbol), normalize_interval(interval)))
+        if df is not None and len(df) >= limit:
+            return df.tail(limit).reset_index(drop=True)
+        return self.candle_store.get_market_data(symbol, interval, limit)
+
+    def _run_strategy(self, strategy_name: str, symbol: str, balance: float):
+        """Evaluate one TradingStrategies strategy"""
+        runners = {
+            'RSI_STRATEGY': self.strategies.rsi_strategy,
+            'VOLUME_FILTER_STRATEGY': self.strategies.volume_filter_strategy,
+            'ADVANCED_STRATEGY': self.strategies.advanced_strategy,
+            'GRID_TRADING_STRATEGY': self.strategies.grid_trading_strategy,
+            'DCA_STRATEGY': self.strategies.dca_strategy,
+        }
+        if strategy_name not in runners:
+            raise ValueError(f'Unknown strategy: {strategy_name}')
+        return runners[strategy_name](symbol, balance)
+
     def test_strategy(self, strategy_name: str, symbol: str = None):
         """Test a trading strategy with current market data"""
         try:
@@ -562,31 +768,32 @@ class TradingBotGUI:
             elif 'BUSD' in symbol and '_' not in symbol:
                 formatted_symbol = symbol.replace('BUSD', '_BUSD')
             
-            # Get current balance for strategy testing
-            balance_response = self.get_account_balance()
+            # Balance and every timeframe the strategy reads are fetched concurrently;
+            # the strategy's own get_market_data calls are then served these frames
+            intervals = strategy_intervals(self.config, strategy_name)
+            tasks = {'balance': self.get_account_balance}
+            for interval in intervals:
+                tasks[interval] = lambda interval=interval: self.candle_store.get_market_data(
+                    formatted_symbol, interval, 100)
+            fetched = self.fetcher.run(tasks)
+            
+            balance_response = fetched['balance']
             if not balance_response['success']:
                 return {'success': False, 'error': 'Failed to get account balance for strategy testing'}
             
             balance = float(balance_response['data'].get('available', 0))
             
-            # Get market data with correct symbol format
-            df = self.strategies.get_market_data(formatted_symbol, '5M', 100)
+            df = fetched[intervals[0]]
             if df.empty:
                 return {'success': False, 'error': 'No market data available for testing'}
             
             # Test the strategy with balance parameter
-            if strategy_name == 'RSI_STRATEGY':
-                signal = self.strategies.rsi_strategy(formatted_symbol, balance)
-            elif strategy_name == 'VOLUME_FILTER_STRATEGY':
-                signal = self.strategies.volume_filter_strategy(formatted_symbol, balance)
-            elif strategy_name == 'ADVANCED_STRATEGY':
-                signal = self.strategies.advanced_strategy(formatted_symbol, balance)
-            elif strategy_name == 'GRID_TRADING_STRATEGY':
-                signal = self.strategies.grid_trading_strategy(formatted_symbol, balance)
-            elif strategy_name == 'DCA_STRATEGY':
-                signal = self.strategies.dca_strategy(formatted_symbol, balance)
-            else:
-                return {'success': False, 'error': f'Unknown strategy: {strategy_name}'}
+            self._prefetched.frames = {(format_symbol(formatted_symbol), interval): fetched[interval]
+                                       for interval in intervals}
+            try:
+                signal = self._run_strategy(strategy_name, formatted_symbol, balance)
+            finally:
+                self._prefetched.frames = None
             
             # Format test results
             test_result = {
@@ -606,9 +813,28 @@ class TradingBotGUI:
             logger.error(f"Error testing strategy {strategy_name}: {e}")
             return {'success': False, 'error': str(e)}
 
+    def scan_market(self, symbols=None, interval='5M', candles=100, strategies=None, quote='USDT', top=50):
+        """Evaluate strategies across many symbols and rank the signals"""
+        try:
+            result = self.scanner.scan(
+                symbols=symbols, interval=interval, candles=candles,
+                strategies=strategies, quote=quote, top=top
+            )
+            result['timestamp'] = datetime.now().isoformat()
+            return {'success': True, 'data': result}
+        except Exception as e:
+            logger.error(f"Error scanning market: {e}")
+            return {'success': False, 'error': str(e)}
+
 # Initialize trading bot
 trading_bot = TradingBotGUI()
 
+# Push dashboard changes to subscribed clients instead of having each tab poll
+dashboard_publisher = DashboardPublisher(
+    socketio, trading_bot,
+    interval=config.get('gui', {}).get('push_interval', 2)
+)
+
 # Routes
 @app.route('/')
 def index():
@@ -635,8 +861,53 @@ def api_portfolio():
 
 @app.route('/api/history')
 def api_history():
-    """API endpoint for trading history"""
-    result = trading_bot.get_trading_history()
+    """API endpoint for trading history (keyset-paginated)"""
+    filters = {
+        name: request.args.get(name)
+        for name in ('symbol', 'strategy', 'side', 'start', 'end')
+        if request.args.get(name)
+    }
+    if request.args.get('user_id'):
+        filters['user_id'] = request.args.get('user_id', type=int)
+    if 'side' in filters:
+        filters['side'] = filters['side'].upper()
+    result = trading_bot.get_trading_history(
+        cursor=request.args.get('cursor'),
+        limit=request.args.get('limit', 50, type=int),
+        **filters
+    )
+    status = 400 if result.pop('bad_request', False) else 200
+    return jsonify(result), status
+
+@app.route('/api/performance')
+def api_performance():
+    """API endpoint for performance rollups"""
+    result = trading_bot.get_performance(
+        request.args.get('user_id', type=int),
+        request.args.get('start'),
+        request.args.get('end'),
+        request.args.get('bucket')
+    )
+    return jsonify(result)
+
+@app.route('/api/portfolio/equity')
+def api_equity_curve():
+    """API endpoint for the portfolio equity curve"""
+    result = trading_bot.get_equity_curve(
+        request.args.get('user_id', type=int),
+        request.args.get('start'),
+        request.args.get('end')
+    )
+    return jsonify(result)
+
+@app.route('/api/reports/monthly')
+def api_monthly_report():
+    """API endpoint for monthly trade and PnL rollups"""
+    result = trading_bot.get_monthly_report(
+        request.args.get('user_id', type=int),
+        request.args.get('start'),
+        request.args.get('end')
+    )
     return jsonify(result)
 
 @app.route('/api/settings')
@@ -656,12 +927,14 @@ def api_update_settings():
 def api_enable_auto_trading():
     """API endpoint for enabling auto trading"""
     result = trading_bot.enable_auto_trading()
+    dashboard_publisher.publish(['strategies'])
     return jsonify(result)
 
 @app.route('/api/auto-trading/disable', methods=['POST'])
 def api_disable_auto_trading():
     """API endpoint for disabling auto trading"""
     result = trading_bot.disable_auto_trading()
+    dashboard_publisher.publish(['strategies'])
     return jsonify(result)
 
 @app.route('/api/auto-trading/status')
@@ -681,6 +954,17 @@ def api_trade():
     price = data.get('price')
     
     result = trading_bot.execute_manual_trade(symbol, side, quantity, order_type, price)
+    if result.get('success'):
+        dashboard_publisher.publish(['account', 'positions'])
+    return jsonify(result)
+
+@app.route('/api/trade/batch', methods=['POST'])
+def api_batch_trade():
+    """API endpoint for placing many limit orders at once"""
+    data = request.get_json() or {}
+    result = trading_bot.execute_batch_trade(data.get('orders', []), bool(data.get('rollback', False)))
+    if result.get('data', {}).get('placed'):
+        dashboard_publisher.publish(['account', 'positions'])
     return jsonify(result)
 
 @app.route('/api/trade/validate', methods=['POST'])
@@ -702,6 +986,21 @@ def api_analysis(symbol):
     result = trading_bot.get_technical_analysis(symbol)
     return jsonify(result)
 
+@app.route('/api/scan')
+def api_scan():
+    """API endpoint for the multi-symbol market scanner"""
+    symbols = request.args.get('symbols')
+    strategies = request.args.get('strategies')
+    result = trading_bot.scan_market(
+        symbols=symbols.split(',') if symbols else None,
+        interval=request.args.get('interval', '5M'),
+        candles=request.args.get('candles', 100, type=int),
+        strategies=strategies.split(',') if strategies else None,
+        quote=request.args.get('quote', 'USDT'),
+        top=request.args.get('top', 50, type=int)
+    )
+    return jsonify(result)
+
 @app.route('/api/chart-data/<symbol>')
 def api_chart_data(symbol):
     """Get chart data for a symbol"""
@@ -718,86 +1017,38 @@ def api_chart_data(symbol):
         elif 'BUSD' in symbol and '_' not in symbol:
             formatted_symbol = symbol.replace('BUSD', '_BUSD')
         
-        logger.info(f"Fetching chart data for symbol: {symbol} -> {formatted_symbol} with timeframe: {timeframe}")
+        logger.debug(f"Fetching chart data for symbol: {symbol} -> {formatted_symbol} with timeframe: {timeframe}")
         
         # Try multiple intervals to get the best data, starting with requested timeframe
         intervals_to_try = [timeframe, '5M', '1M', '15M', '1H']
-        klines_data = []
+        times, values = [], []
         
         for interval in intervals_to_try:
-            try:
-                logger.info(f"Trying interval {interval} for {formatted_symbol}")
-                klines_response = trading_bot.api.get_klines(
-                    symbol=formatted_symbol,
-                    interval=interval,
-                    limit=100
-                )
-                
-                if 'error' not in klines_response:
-                    # Handle different response formats
-                    if 'data' in klines_response:
-                        if isinstance(klines_response['data'], dict) and 'klines' in klines_response['data']:
-                            klines_data = klines_response['data']['klines']
-                        elif isinstance(klines_response['data'], list):
-                            klines_data = klines_response['data']
-                    
-                    if klines_data:
-                        logger.info(f"Successfully got {len(klines_data)} data points with interval {interval}")
-                        break
-                        
-            except Exception as e:
-                logger.warning(f"Failed to get klines with interval {interval}: {e}")
-                continue
+            times, values = trading_bot.candle_store.get(formatted_symbol, interval, 100)
+            if len(times):
+                break
         
-        if not klines_data:
+        if not len(times):
             logger.warning(f"No klines data received for {formatted_symbol} with any interval")
             return jsonify({'success': False, 'error': 'No data available for this symbol'})
         
         # Process klines data for chart
         chart_data = {
-            'labels': [],
-            'prices': [],
-            'volumes': [],
-            'timestamps': [],
-            'high': [],
-            'low': [],
-            'open': [],
+            'labels': [datetime.fromtimestamp(t / 1000).strftime('%H:%M') for t in times.tolist()],
+            'prices': values[:, 3].tolist(),
+            'volumes': values[:, 4].tolist(),
+            'timestamps': times.tolist(),
+            'high': values[:, 1].tolist(),
+            'low': values[:, 2].tolist(),
+            'open': values[:, 0].tolist(),
             'timeframe': interval  # Use the successful interval
         }
         
-        for kline in klines_data:
-            try:
-                # Handle different kline formats
-                if len(kline) >= 6:
-                    timestamp = int(kline[0])  # Open time
-                    open_price = float(kline[1])
-                    high_price = float(kline[2])
-                    low_price = float(kline[3])
-                    close_price = float(kline[4])
-                    volume = float(kline[5])
-                    
-                    # Use close price for the main chart
-                    chart_data['prices'].append(close_price)
-                    chart_data['volumes'].append(volume)
-                    chart_data['timestamps'].append(timestamp)
-                    chart_data['high'].append(high_price)
-                    chart_data['low'].append(low_price)
-                    chart_data['open'].append(open_price)
-                    
-                    # Format time for labels
-                    from datetime import datetime
-                    time_obj = datetime.fromtimestamp(timestamp / 1000)
-                    chart_data['labels'].append(time_obj.strftime('%H:%M'))
-                    
-            except (IndexError, ValueError, TypeError) as e:
-                logger.warning(f"Error processing kline data: {e}")
-                continue
-        
         if not chart_data['prices']:
             logger.error(f"No valid chart data processed for {symbol}")
             return jsonify({'success': False, 'error': 'Failed to process chart data'})
         
-        logger.info(f"Successfully processed {len(chart_data['prices'])} data points for {symbol}")
+        logger.debug(f"Successfully processed {len(chart_data['prices'])} data points for {symbol}")
         
         return jsonify({
             'success': True, 
@@ -827,6 +1078,7 @@ def api_update_strategy():
         return jsonify({'success': False, 'error': 'Strategy name is required'})
     
     result = trading_bot.update_strategy(strategy_name)
+    dashboard_publisher.publish(['strategies'])
     return jsonify(result)
 
 @app.route('/api/strategy/test', methods=['POST'])
@@ -851,15 +1103,49 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection"""
+    dashboard_publisher.unsubscribe(request.sid)
+    trading_bot.price_fanout.unsubscribe(request.sid)
     print('Client disconnected')
 
+@socketio.on('subscribe_dashboard')
+def handle_subscribe_dashboard(data):
+    """Subscribe to pushed account, position and strategy updates"""
+    requested = (data or {}).get('channels') or list(DASHBOARD_CHANNELS)
+    channels = dashboard_publisher.subscribe(request.sid, requested)
+    for channel in channels:
+        join_room(channel)
+    dashboard_publisher.start()
+    dashboard_publisher.send_snapshot(request.sid, channels)
+
+@socketio.on('unsubscribe_dashboard')
+def handle_unsubscribe_dashboard(data):
+    """Unsubscribe from pushed dashboard updates"""
+    channels = (data or {}).get('channels') or list(DASHBOARD_CHANNELS)
+    dashboard_publisher.unsubscribe(request.sid, channels)
+    for channel in channels:
+        leave_room(channel)
+
 @socketio.on('subscribe_price')
 def handle_subscribe_price(data):
     """Handle price subscription"""
     symbol = data.get('symbol')
     if symbol:
         # Subscribe to real-time price updates
-        emit('price_update', {'symbol': symbol, 'price': trading_bot.get_real_time_price(symbol)})
+        symbol = trading_bot.price_fanout.subscribe(request.sid, symbol)
+        join_room(price_room(symbol))
+        trading_bot.price_fanout.start()
+        quote = trading_bot.price_fanout.get_quote(symbol)
+        if quote is None:
+            quote = {'symbol': symbol, 'price': trading_bot.get_real_time_price(symbol)}
+        emit('price_update', quote)
+
+@socketio.on('unsubscribe_price')
+def handle_unsubscribe_price(data):
+    """Handle price unsubscription"""
+    symbol = data.get('symbol')
+    if symbol:
+        trading_bot.price_fanout.unsubscribe(request.sid, symbol)
+        leave_room(price_room(symbol))
 
 def open_browser():
     """Open browser to the application"""
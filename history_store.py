@@ -0,0 +1,214 @@
+"""
+On-disk historical candle store for offline backtests.
+
+Closed candles are kept per symbol and interval as fixed-width column files
+(``<root>/<SYMBOL>/<INTERVAL>/time.i8``, ``open.f8`` ... ``volume.f8``) in
+ascending time order. Reads memory-map the columns and slice them by time
+range, so a backtest over years of candles starts without parsing or copying
+anything. ``backfill`` pages ``get_klines`` backwards from the exchange and
+appends or prepends only what is missing. Paging needs ``end_time``, which
+AsyncPionexAPI supports; its coroutines run on the store's own event loop,
+so ``backfill`` stays a plain blocking call (not to be used from inside a
+running loop).
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from candle_store import COLUMNS, extract_klines, interval_ms, normalize_interval, parse_klines
+from symbols import format_symbol
+
+logger = logging.getLogger(__name__)
+
+TIME_FILE = 'time.i8'
+
+
+def _column_file(name: str) -> str:
+    return f'{name}.f8'
+
+
+class HistoryStore:
+    """Memory-mapped OHLCV columns per (symbol, interval)"""
+
+    def __init__(self, root: str = 'data/candles', api=None, page_limit: int = 500):
+        self.root = root
+        self.api = api
+        self.page_limit = int(page_limit)
+        self._maps: Dict[Tuple[str, str], Tuple[int, np.ndarray, Dict[str, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def close(self):
+        """Close the event loop used for an async API client"""
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, format_symbol(symbol), normalize_interval(interval))
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+    def keys(self):
+        """Stored (symbol, interval) pairs"""
+        if not os.path.isdir(self.root):
+            return
+        for symbol in sorted(os.listdir(self.root)):
+            for interval in sorted(os.listdir(os.path.join(self.root, symbol))):
+                yield symbol, interval
+
+    # ---- reading ---------------------------------------------------------------
+
+    def _mapped(self, symbol: str, interval: str):
+        key = (format_symbol(symbol), normalize_interval(interval))
+        path = self._dir(*key)
+        time_path = os.path.join(path, TIME_FILE)
+        size = os.path.getsize(time_path) if os.path.exists(time_path) else 0
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached[0] == size:
+                return cached[1], cached[2]
+            if size == 0:
+                times = np.empty(0, dtype=np.int64)
+                columns = {name: np.empty(0, dtype=np.float64) for name in COLUMNS}
+            else:
+                times = np.memmap(time_path, dtype='<i8', mode='r')
+                columns = {name: np.memmap(os.path.join(path, _column_file(name)), dtype='<f8', mode='r',
+                                           shape=times.shape)
+                           for name in COLUMNS}
+            self._maps[key] = (size, times, columns)
+            return times, columns
+
+    def span(self, symbol: str, interval: str) -> Optional[Tuple[int, int]]:
+        """(first, last) stored candle open times"""
+        times, _ = self._mapped(symbol, interval)
+        return (int(times[0]), int(times[-1])) if len(times) else None
+
+    def load(self, symbol: str, interval: str, start: Optional[int] = None,
+             end: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Zero-copy views of candles with start <= open time < end (ms)"""
+        times, columns = self._mapped(symbol, interval)
+        lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side='left'))
+        return times[lo:hi], {name: column[lo:hi] for name, column in columns.items()}
+
+    # ---- writing ---------------------------------------------------------------
+
+    def write(self, symbol: str, interval: str, times: np.ndarray, values: np.ndarray) -> int:
+        """Store candles not already present; returns how many were added
+
+        Candles newer than the stored range are appended; older ones are
+        prepended (one rewrite). Rows inside the stored range are ignored.
+        """
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(COLUMNS))
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+        keep = np.concatenate(([True], np.diff(times) > 0)) if len(times) else np.zeros(0, dtype=bool)
+        times, values = times[keep], values[keep]
+
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        span = self.span(symbol, interval)
+        if span is None:
+            before, after = np.zeros(len(times), dtype=bool), np.ones(len(times), dtype=bool)
+        else:
+            before, after = times < span[0], times > span[1]
+
+        if after.any():
+            self._append(path, times[after], values[after])
+        if before.any():
+            self._prepend(path, symbol, interval, times[before], values[before])
+        return int(before.sum() + after.sum())
+
+    def _append(self, path: str, times: np.ndarray, values: np.ndarray):
+        # Value columns first, time last: a crash never exposes times without values
+        for i, name in enumerate(COLUMNS):
+            with open(os.path.join(path, _column_file(name)), 'ab') as f:
+                values[:, i].astype('<f8').tofile(f)
+        with open(os.path.join(path, TIME_FILE), 'ab') as f:
+            times.astype('<i8').tofile(f)
+
+    def _prepend(self, path: str, symbol: str, interval: str, times: np.ndarray, values: np.ndarray):
+        old_times, old_columns = self._mapped(symbol, interval)
+        merged = {TIME_FILE: np.concatenate([times, np.asarray(old_times)]).astype('<i8')}
+        for i, name in enumerate(COLUMNS):
+            merged[_column_file(name)] = np.concatenate([values[:, i], np.asarray(old_columns[name])]).astype('<f8')
+        with self._lock:
+            self._maps.pop((format_symbol(symbol), normalize_interval(interval)), None)
+        del old_times, old_columns
+        for filename in [f for f in merged if f != TIME_FILE] + [TIME_FILE]:
+            tmp = os.path.join(path, filename + '.tmp')
+            merged[filename].tofile(tmp)
+            os.replace(tmp, os.path.join(path, filename))
+
+    # ---- downloading -------------------------------------------------------------
+
+    def _get_klines(self, symbol: str, interval: str, end_time: int):
+        """One page of klines ending at end_time (ms)"""
+        try:
+            response = self.api.get_klines(symbol=symbol, interval=interval, limit=self.page_limit,
+                                           end_time=end_time)
+        except TypeError as e:
+            raise ValueError(f'{type(self.api).__name__}.get_klines cannot page by end_time; '
+                             f'backfill with AsyncPionexAPI') from e
+        if inspect.isawaitable(response):
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            response = self._loop.run_until_complete(response)
+        return response
+
+    def backfill(self, symbol: str, interval: str, start: int, end: Optional[int] = None,
+                 max_pages: int = 100000) -> Dict[str, Any]:
+        """Download closed candles in [start, end) that are not stored yet"""
+        if self.api is None:
+            raise ValueError('HistoryStore has no API client to download from')
+        symbol, interval = format_symbol(symbol), normalize_interval(interval)
+        step = interval_ms(interval)
+        now = int(time.time() * 1000)
+        end = min(end if end is not None else now, now - now % step)
+        span = self.span(symbol, interval)
+
+        # Missing ranges: newer than what's stored, then older than it
+        ranges = [(start, end)] if span is None else [
+            (max(start, span[1] + step), end),
+            (start, min(end, span[0]))
+        ]
+        added, pages = 0, 0
+        for lo, hi in ranges:
+            # Pages arrive newest first. Writing each range once keeps older pages from
+            # falling inside a span the newer ones already extended, and rewrites the
+            # files once instead of once per page when prepending
+            page_times, page_values = [], []
+            cursor = hi
+            while cursor > lo and pages < max_pages:
+                response = self._get_klines(symbol, interval, cursor - 1)
+                pages += 1
+                times, values = parse_klines(extract_klines(response))
+                if not len(times):
+                    break
+                mask = (times >= lo) & (times < hi) & (times + step <= now)
+                page_times.append(times[mask])
+                page_values.append(values[mask])
+                if times[0] >= cursor:
+                    break
+                cursor = int(times[0])
+            if page_times:
+                added += self.write(symbol, interval, np.concatenate(page_times), np.concatenate(page_values))
+        logger.info(f"Backfilled {added} {interval} candles for {symbol} in {pages} requests")
+        return {'symbol': symbol, 'interval': interval, 'added': added, 'requests': pages,
+                'span': self.span(symbol, interval)}
+
+    def arrays(self, symbol: str, interval: str, start: Optional[int] = None,
+               end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """OHLCV views plus 'time', ready for vector_backtest.run_vector_backtest"""
+        times, columns = self.load(symbol, interval, start, end)
+        return {'time': times, **columns}
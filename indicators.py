@@ -0,0 +1,364 @@
+"""
+Incremental indicator engine.
+
+RSI (Wilder smoothing), MACD (EMA based) and Bollinger Bands (rolling
+mean/variance) are kept as running state per (symbol, interval), so each new
+candle costs O(1) instead of recomputing the whole series. The still-open
+candle is evaluated with ``peek`` and is only committed once it closes.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.signal import lfilter
+
+from symbols import format_symbol
+
+
+class EMAState:
+    """Exponential moving average seeded with the SMA of the first `period` values"""
+
+    def __init__(self, period: int):
+        self.period = int(period)
+        self.alpha = 2.0 / (self.period + 1)
+        self.value: Optional[float] = None
+        self._seed_sum = 0.0
+        self._seed_count = 0
+
+    def update(self, x: float) -> Optional[float]:
+        self.value = self.peek(x)
+        if self._seed_count < self.period:
+            self._seed_sum += x
+            self._seed_count += 1
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        if self._seed_count < self.period - 1:
+            return None
+        if self._seed_count == self.period - 1:
+            return (self._seed_sum + x) / self.period
+        return self.value + self.alpha * (x - self.value)
+
+
+class RSIState:
+    """Wilder RSI"""
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.prev: Optional[float] = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.count = 0
+        self.value: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        result = self._step(close)
+        self.prev, self.avg_gain, self.avg_loss, self.count, self.value = result
+        return self.value
+
+    def peek(self, close: float) -> Optional[float]:
+        return self._step(close)[4]
+
+    def _step(self, close: float) -> Tuple:
+        if self.prev is None:
+            return close, 0.0, 0.0, 0, None
+        change = close - self.prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        count = self.count + 1
+        if count <= self.period:
+            avg_gain = self.avg_gain + gain / self.period
+            avg_loss = self.avg_loss + loss / self.period
+        else:
+            avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        value = None
+        if count >= self.period:
+            if avg_loss == 0:
+                value = 100.0 if avg_gain > 0 else 50.0
+            else:
+                value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return close, avg_gain, avg_loss, count, value
+
+
+class MACDState:
+    """MACD line, signal and histogram"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+        self.value: Optional[Tuple[float, float, float]] = None
+
+    def update(self, close: float) -> Optional[Tuple[float, float, float]]:
+        fast = self.fast.update(close)
+        slow = self.slow.update(close)
+        if fast is None or slow is None:
+            return None
+        line = fast - slow
+        signal = self.signal.update(line)
+        self.value = None if signal is None else (line, signal, line - signal)
+        return self.value
+
+    def peek(self, close: float) -> Optional[Tuple[float, float, float]]:
+        fast = self.fast.peek(close)
+        slow = self.slow.peek(close)
+        if fast is None or slow is None:
+            return None
+        line = fast - slow
+        signal = self.signal.peek(line)
+        return None if signal is None else (line, signal, line - signal)
+
+
+class BollingerState:
+    """Rolling mean and population standard deviation bands"""
+
+    def __init__(self, window: int = 20, n_std: float = 2.0):
+        self.window = int(window)
+        self.n_std = float(n_std)
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.value: Optional[Tuple[float, float, float]] = None
+
+    def update(self, close: float) -> Optional[Tuple[float, float, float]]:
+        self.values.append(close)
+        self.total += close
+        self.total_sq += close * close
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        self.value = self._bands(len(self.values), self.total, self.total_sq)
+        return self.value
+
+    def peek(self, close: float) -> Optional[Tuple[float, float, float]]:
+        count, total, total_sq = len(self.values) + 1, self.total + close, self.total_sq + close * close
+        if count > self.window:
+            old = self.values[0]
+            count, total, total_sq = count - 1, total - old, total_sq - old * old
+        return self._bands(count, total, total_sq)
+
+    def _bands(self, count: int, total: float, total_sq: float) -> Optional[Tuple[float, float, float]]:
+        if count < self.window:
+            return None
+        mean = total / count
+        std = math.sqrt(max(total_sq / count - mean * mean, 0.0))
+        return mean + self.n_std * std, mean, mean - self.n_std * std
+
+
+class IndicatorSet:
+    """RSI, MACD and Bollinger state for one symbol and interval"""
+
+    def __init__(self, config: Dict[str, Any]):
+        rsi = config.get('rsi', {})
+        macd = config.get('macd', {})
+        bb = config.get('bollinger_bands', {})
+        self.rsi = RSIState(rsi.get('period', 14))
+        self.macd = MACDState(macd.get('fast', 12), macd.get('slow', 26), macd.get('signal', 9))
+        self.bollinger = BollingerState(bb.get('window', 20), bb.get('n_std', 2.0))
+        self.last_time: Optional[int] = None
+
+    def commit(self, close: float):
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.bollinger.update(close)
+
+    def snapshot(self, close: float) -> Dict[str, Any]:
+        """Indicator values including the open candle at `close`"""
+        rsi = self.rsi.peek(close)
+        macd = self.macd.peek(close)
+        bands = self.bollinger.peek(close)
+        return {
+            'current_price': close,
+            'rsi': rsi if rsi is not None else 50,
+            'macd': {
+                'line': macd[0] if macd else 0,
+                'signal': macd[1] if macd else 0,
+                'histogram': macd[2] if macd else 0
+            },
+            'bollinger_bands': {
+                'upper': bands[0] if bands else 0,
+                'middle': bands[1] if bands else 0,
+                'lower': bands[2] if bands else 0
+            }
+        }
+
+
+class IndicatorEngine:
+    """Incremental indicators keyed per symbol and interval"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self._sets: Dict[Tuple[str, str], IndicatorSet] = {}
+        self._lock = threading.Lock()
+
+    def analyze(self, symbol: str, interval: str, times: Sequence[int], closes: Sequence[float]) -> Dict[str, Any]:
+        """Commit newly closed candles and return indicators for the latest one
+
+        The last element of `times`/`closes` is treated as the open candle.
+        """
+        if not len(times):
+            return {}
+        times = np.asarray(times)
+        key = (format_symbol(symbol), interval.upper())
+        with self._lock:
+            return self._analyze(key, times, closes)
+
+    def _analyze(self, key: Tuple[str, str], times: np.ndarray, closes: Sequence[float]) -> Dict[str, Any]:
+        indicators = self._sets.get(key)
+        # Start over if the history no longer connects to the committed state
+        if indicators is None or (indicators.last_time is not None and times[0] > indicators.last_time):
+            indicators = self._sets[key] = IndicatorSet(self.config)
+
+        # Only candles closed since the previous call are committed
+        start = 0 if indicators.last_time is None else int(np.searchsorted(times, indicators.last_time, side='right'))
+        for i in range(start, len(times) - 1):
+            indicators.commit(float(closes[i]))
+            indicators.last_time = int(times[i])
+
+        return indicators.snapshot(float(closes[-1]))
+
+    def reset(self, symbol: Optional[str] = None):
+        """Drop state (e.g. after indicator settings change)"""
+        with self._lock:
+            if symbol is None:
+                self._sets.clear()
+            else:
+                symbol = format_symbol(symbol)
+                for key in [k for k in self._sets if k[0] == symbol]:
+                    del self._sets[key]
+
+
+# Vectorized series over the last axis, for 1-D (candles) or 2-D
+# (symbols x candles) arrays. Values before warm-up are NaN and match the
+# streaming state classes above. Recursive smoothing runs through
+# scipy's lfilter, so long histories cost no Python-level loop.
+
+def smooth(values: np.ndarray, alpha: float, initial) -> np.ndarray:
+    """y[t] = y[t-1] + alpha * (x[t] - y[t-1]) starting from `initial`"""
+    decay = 1.0 - alpha
+    zi = (decay * np.asarray(initial, dtype=np.float64))[..., np.newaxis]
+    return lfilter([alpha], [1.0, -decay], values, axis=-1, zi=zi)[0]
+
+
+def ema_series(values, period: int) -> np.ndarray:
+    """EMA seeded with the SMA of the first `period` values"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    period = int(period)
+    if values.shape[-1] < period:
+        return out
+    alpha = 2.0 / (period + 1)
+    seed = values[..., :period].mean(axis=-1)
+    out[..., period - 1] = seed
+    if values.shape[-1] > period:
+        out[..., period:] = smooth(values[..., period:], alpha, seed)
+    return out
+
+
+def rsi_series(close, period: int = 14) -> np.ndarray:
+    """Wilder RSI"""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape, np.nan)
+    period = int(period)
+    if close.shape[-1] <= period:
+        return out
+    deltas = np.diff(close, axis=-1)
+    gains = np.maximum(deltas, 0.0)
+    losses = np.maximum(-deltas, 0.0)
+    avg_gain = gains[..., :period].mean(axis=-1)
+    avg_loss = losses[..., :period].mean(axis=-1)
+
+    def _rsi(g, l):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = 100.0 - 100.0 / (1.0 + g / l)
+        rs = np.where(l == 0, np.where(g > 0, 100.0, 50.0), rs)
+        return rs
+
+    out[..., period] = _rsi(avg_gain, avg_loss)
+    if deltas.shape[-1] > period:
+        # Wilder smoothing is an EMA with alpha = 1 / period
+        gain_series = smooth(gains[..., period:], 1.0 / period, avg_gain)
+        loss_series = smooth(losses[..., period:], 1.0 / period, avg_loss)
+        out[..., period + 1:] = _rsi(gain_series, loss_series)
+    return out
+
+
+def atr_series(high, low, close, period: int = 14) -> np.ndarray:
+    """Wilder average true range"""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    out = np.full(close.shape, np.nan)
+    period = int(period)
+    if close.shape[-1] <= period:
+        return out
+    prev_close = close[..., :-1]
+    true_range = np.maximum(high[..., 1:] - low[..., 1:],
+                            np.maximum(np.abs(high[..., 1:] - prev_close), np.abs(low[..., 1:] - prev_close)))
+    seed = true_range[..., :period].mean(axis=-1)
+    out[..., period] = seed
+    if true_range.shape[-1] > period:
+        out[..., period + 1:] = smooth(true_range[..., period:], 1.0 / period, seed)
+    return out
+
+
+def macd_series(close, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal and histogram"""
+    close = np.asarray(close, dtype=np.float64)
+    line = ema_series(close, fast) - ema_series(close, slow)
+    signal_line = np.full(close.shape, np.nan)
+    start = int(max(fast, slow)) - 1
+    if close.shape[-1] > start:
+        signal_line[..., start:] = ema_series(line[..., start:], signal)
+    return line, signal_line, line - signal_line
+
+
+def rolling_window(values, window: int) -> np.ndarray:
+    """Zero-copy (..., T - window + 1, window) view of trailing windows"""
+    return np.lib.stride_tricks.sliding_window_view(np.asarray(values, dtype=np.float64), int(window), axis=-1)
+
+
+def rolling_mean_std(values, window: int, chunk: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and population standard deviation of each trailing window (T - window + 1 values)
+
+    Uses running sums like BollingerState, so the cost does not grow with
+    the window. Sums restart every `chunk` outputs on values offset by the
+    chunk's first value, which keeps the variance accurate on long histories.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    window = int(window)
+    count = values.shape[-1] - window + 1
+    chunks = -(-count // chunk)
+    length = chunk + window - 1
+    tail = np.repeat(values[..., -1:], chunks * chunk + window - 1 - values.shape[-1], axis=-1)
+    padded = np.concatenate([values, tail], axis=-1)
+    segments = np.lib.stride_tricks.sliding_window_view(padded, length, axis=-1)[..., ::chunk, :]
+    offset = segments[..., :1]
+    centred = segments - offset
+    total = np.zeros(centred.shape[:-1] + (length + 1,))
+    total_sq = np.zeros_like(total)
+    np.cumsum(centred, axis=-1, out=total[..., 1:])
+    np.cumsum(centred * centred, axis=-1, out=total_sq[..., 1:])
+    mean = (total[..., window:] - total[..., :-window]) / window
+    variance = (total_sq[..., window:] - total_sq[..., :-window]) / window - mean * mean
+    shape = values.shape[:-1] + (-1,)
+    mean = (mean + offset).reshape(shape)[..., :count]
+    std = np.sqrt(np.maximum(variance, 0.0)).reshape(shape)[..., :count]
+    return mean, std
+
+
+def bollinger_series(close, window: int = 20, n_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Upper, middle and lower bands (population standard deviation)"""
+    close = np.asarray(close, dtype=np.float64)
+    upper = np.full(close.shape, np.nan)
+    middle = np.full(close.shape, np.nan)
+    lower = np.full(close.shape, np.nan)
+    window = int(window)
+    if close.shape[-1] >= window:
+        mean, std = rolling_mean_std(close, window)
+        middle[..., window - 1:] = mean
+        upper[..., window - 1:] = mean + n_std * std
+        lower[..., window - 1:] = mean - n_std * std
+    return upper, middle, lower
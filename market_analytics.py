@@ -0,0 +1,303 @@
+"""
+Volume and price-structure analytics for the advanced strategy.
+
+On-balance volume trend and OBV/price divergence (``obv_analysis``),
+pivot-based support/resistance with trend classification
+(``support_resistance``) and the volume spike ratio (``volume_filter``) are
+computed over every bar of 1-D (candles) or 2-D (symbols x candles) arrays
+without per-bar Python loops. Rolling extrema use the van Herk/Gil-Werman
+block scan, so their cost does not grow with the window, and a pivot is a
+bar equal to the extremum of the window centred on it. A pivot is only
+confirmed ``pivot_bars`` bars later, so no value looks ahead.
+
+``AnalyticsState`` applies the same rules to closed bars of one symbol with
+monotonic deques, costing O(1) amortised per bar and reproducing the
+vectorized values.
+"""
+
+import logging
+import math
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from indicators import EMAState, ema_series
+
+logger = logging.getLogger(__name__)
+
+
+def _settings(config: Optional[Dict[str, Any]]):
+    """(obv window, trend threshold, S/R window, pivot bars) from the strategy config"""
+    config = config or {}
+    obv_config = config.get('obv_analysis', {})
+    sr_config = config.get('support_resistance', {})
+    window = max(1, int(sr_config.get('window', 20)))
+    pivot_bars = max(1, int(sr_config.get('pivot_bars', max(1, window // 4))))
+    return (max(1, int(obv_config.get('window', window))), float(obv_config.get('trend_strength_threshold', 0.3)),
+            window, pivot_bars)
+
+
+def _rolling_extreme(values, window: int, ufunc, fill: float) -> np.ndarray:
+    """Trailing-window max/min aligned to the window's last bar (NaN before)"""
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    window = int(window)
+    out = np.full(values.shape, np.nan)
+    if window < 1 or n < window:
+        return out
+    if window == 1:
+        out[...] = values
+        return out
+    # Running extremes from the start (prefix) and end (suffix) of each block of
+    # `window` bars; any window spans at most two blocks: suffix[start] op prefix[end]
+    blocks = -(-n // window)
+    padded = np.concatenate([values, np.full(values.shape[:-1] + (blocks * window - n,), fill)], axis=-1)
+    shaped = padded.reshape(values.shape[:-1] + (blocks, window))
+    prefix = ufunc.accumulate(shaped, axis=-1).reshape(padded.shape)
+    suffix = ufunc.accumulate(shaped[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+    out[..., window - 1:] = ufunc(suffix[..., :n - window + 1], prefix[..., window - 1:n])
+    return out
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """Highest value of each trailing window"""
+    return _rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """Lowest value of each trailing window"""
+    return _rolling_extreme(values, window, np.minimum, np.inf)
+
+
+def pivot_masks(high, low, left: int, right: int):
+    """Bars whose high (low) is the extreme of `left` bars before through `right` bars after"""
+    high, low = np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64)
+    n = high.shape[-1]
+    span = left + right + 1
+    pivot_high = np.zeros(high.shape, dtype=bool)
+    pivot_low = np.zeros(low.shape, dtype=bool)
+    if n >= span:
+        pivot_high[..., left:n - right] = high[..., left:n - right] == rolling_max(high, span)[..., span - 1:]
+        pivot_low[..., left:n - right] = low[..., left:n - right] == rolling_min(low, span)[..., span - 1:]
+    return pivot_high, pivot_low
+
+
+def _last_index(mask: np.ndarray) -> np.ndarray:
+    """Index of the latest True at or before each bar (-1 before the first)"""
+    return np.maximum.accumulate(np.where(mask, np.arange(mask.shape[-1]), -1), axis=-1)
+
+
+def _delay(index: np.ndarray, bars: int) -> np.ndarray:
+    """Index series as seen `bars` bars later"""
+    out = np.full(index.shape, -1)
+    if bars < index.shape[-1]:
+        out[..., bars:] = index[..., :index.shape[-1] - bars]
+    return out
+
+
+def _take(values: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """values[index] along the last axis (index -1 reads the first bar)"""
+    n = values.shape[-1]
+    rows = np.arange(0, values.size, n).reshape(values.shape[:-1] + (1,))
+    return values.reshape(-1)[np.maximum(index, 0) + rows]
+
+
+def obv_series(close, volume) -> np.ndarray:
+    """On-balance volume, starting at zero on the first bar"""
+    close, volume = np.asarray(close, dtype=np.float64), np.asarray(volume, dtype=np.float64)
+    out = np.zeros(close.shape)
+    if close.shape[-1] > 1:
+        out[..., 1:] = np.cumsum(np.sign(np.diff(close, axis=-1)) * volume[..., 1:], axis=-1)
+    return out
+
+
+def obv_strength(obv: np.ndarray, volume, window: int) -> np.ndarray:
+    """OBV change over `window` bars as a fraction of the volume traded (-1..1)"""
+    cumulative = np.cumsum(np.asarray(volume, dtype=np.float64), axis=-1)
+    out = np.full(obv.shape, np.nan)
+    if obv.shape[-1] > window:
+        traded = cumulative[..., window:] - cumulative[..., :-window]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[..., window:] = np.where(traded > 0, (obv[..., window:] - obv[..., :-window]) / traded, 0.0)
+    return out
+
+
+def volume_ratio(volume, ema_period: int = 20, multiplier: float = 1.5) -> np.ndarray:
+    """Volume relative to `multiplier` times its EMA (above 1.0 is a spike)"""
+    volume = np.asarray(volume, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nan_to_num(volume / (ema_series(volume, ema_period) * multiplier))
+
+
+def analyze(high, low, close, volume, config: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+    """OBV, support/resistance, trend and divergence for every bar
+
+    ``trend`` is 1 for higher highs and higher lows between the last two
+    confirmed pivots, -1 for lower highs and lower lows. ``divergence`` is 1
+    when price made a lower pivot low but OBV a higher one (bullish), -1 for
+    a higher price high on a lower OBV high, and expires `window` bars after
+    the pivot.
+    """
+    obv_window, threshold, window, pivot_bars = _settings(config)
+    high, low, close, volume = (np.asarray(a, dtype=np.float64) for a in (high, low, close, volume))
+    obv = obv_series(close, volume)
+    strength = obv_strength(obv, volume, obv_window)
+    with np.errstate(invalid='ignore'):
+        obv_direction = np.where(strength >= threshold, 1, np.where(strength <= -threshold, -1, 0))
+
+    pivot_high, pivot_low = pivot_masks(high, low, pivot_bars, pivot_bars)
+    bars = np.arange(close.shape[-1])
+    sides = {}
+    for name, prices, mask in (('high', high, pivot_high), ('low', low, pivot_low)):
+        # Compare each pivot with the one before it, then carry the result forward
+        # from the bar that confirms it
+        latest = _last_index(mask)
+        before = _delay(latest, 1)
+        compared = mask & (before >= 0)
+        price_change = np.where(compared, np.sign(prices - _take(prices, before)), 0.0)
+        obv_change = np.where(compared, np.sign(obv - _take(obv, before)), 0.0)
+        last = _delay(latest, pivot_bars)
+        seen = last >= 0
+        sides[name] = (last, np.where(seen, _take(prices, last), np.nan),
+                       np.where(seen, _take(price_change, last), 0.0), np.where(seen, _take(obv_change, last), 0.0))
+
+    high_last, resistance, high_change, high_obv = sides['high']
+    low_last, support, low_change, low_obv = sides['low']
+    trend = np.where((high_change > 0) & (low_change > 0), 1, np.where((high_change < 0) & (low_change < 0), -1, 0))
+    bearish = (high_change > 0) & (high_obv < 0) & (bars - high_last <= window)
+    bullish = (low_change < 0) & (low_obv > 0) & (bars - low_last <= window)
+    return {
+        'obv': obv,
+        'obv_strength': strength,
+        'obv_direction': obv_direction,
+        'support': support,
+        'resistance': resistance,
+        'trend': trend,
+        'divergence': bullish.astype(int) - bearish,
+    }
+
+
+class RollingExtremum:
+    """Trailing-window max (or min) with a monotonic deque"""
+
+    def __init__(self, window: int, mode: str = 'max'):
+        if mode not in ('max', 'min'):
+            raise ValueError(f'Unknown extremum mode: {mode}')
+        self.window = int(window)
+        self.sign = 1.0 if mode == 'max' else -1.0
+        self.count = 0
+        self._queue = deque()  # (bar, signed value), signed values decreasing
+
+    def update(self, x: float) -> Optional[float]:
+        signed = self.sign * x
+        while self._queue and self._queue[-1][1] <= signed:
+            self._queue.pop()
+        self._queue.append((self.count, signed))
+        self.count += 1
+        if self._queue[0][0] <= self.count - 1 - self.window:
+            self._queue.popleft()
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        if self.count + 1 < self.window:
+            return None
+        best = self.sign * x
+        for bar, signed in self._queue:
+            if bar > self.count - self.window:
+                best = max(best, signed)
+                break
+        return self.sign * best
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.count < self.window:
+            return None
+        return self.sign * self._queue[0][1]
+
+
+class AnalyticsState:
+    """Incremental ``analyze`` for closed bars of one symbol"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.obv_window, self.threshold, self.window, self.pivot_bars = _settings(config)
+        span = 2 * self.pivot_bars + 1
+        self.range_high = RollingExtremum(span, 'max')
+        self.range_low = RollingExtremum(span, 'min')
+        self.bars = 0
+        self.obv = 0.0
+        self.traded = 0.0
+        self._prev_close: Optional[float] = None
+        self._flow = deque(maxlen=self.obv_window + 1)  # (obv, cumulative volume)
+        self._recent = deque(maxlen=self.pivot_bars + 1)  # (high, low, obv)
+        self._pivots = {'high': deque(maxlen=2), 'low': deque(maxlen=2)}  # (bar, price, obv)
+
+    def update(self, high: float, low: float, close: float, volume: float) -> Dict[str, float]:
+        """Add a closed bar; returns the values ``analyze`` gives for it"""
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        if self._prev_close is not None:
+            self.obv += math.copysign(volume, close - self._prev_close) if close != self._prev_close else 0.0
+        self._prev_close = close
+        self.traded += volume
+        self._flow.append((self.obv, self.traded))
+        self._recent.append((high, low, self.obv))
+        top, bottom = self.range_high.update(high), self.range_low.update(low)
+        if top is not None:
+            bar = self.bars - self.pivot_bars
+            centre_high, centre_low, centre_obv = self._recent[0]
+            if centre_high == top:
+                self._pivots['high'].append((bar, centre_high, centre_obv))
+            if centre_low == bottom:
+                self._pivots['low'].append((bar, centre_low, centre_obv))
+        self.bars += 1
+        return self.value
+
+    @property
+    def value(self) -> Dict[str, float]:
+        strength = math.nan
+        if len(self._flow) > self.obv_window:
+            (old_obv, old_traded), (obv, traded) = self._flow[0], self._flow[-1]
+            strength = (obv - old_obv) / (traded - old_traded) if traded - old_traded > 0 else 0.0
+        obv_direction = 1 if strength >= self.threshold else -1 if strength <= -self.threshold else 0
+
+        now = self.bars - 1
+        changes = {}
+        for name, pivots in self._pivots.items():
+            if len(pivots) == 2:
+                (_, prev_price, prev_obv), (_, price, obv) = pivots
+                changes[name] = ((price > prev_price) - (price < prev_price), (obv > prev_obv) - (obv < prev_obv))
+            else:
+                changes[name] = (0, 0)
+        high_change, high_obv = changes['high']
+        low_change, low_obv = changes['low']
+        trend = 1 if high_change > 0 and low_change > 0 else -1 if high_change < 0 and low_change < 0 else 0
+        bearish = high_change > 0 and high_obv < 0 and now - self._pivots['high'][-1][0] <= self.window
+        bullish = low_change < 0 and low_obv > 0 and now - self._pivots['low'][-1][0] <= self.window
+        return {
+            'obv': self.obv,
+            'obv_strength': strength,
+            'obv_direction': obv_direction,
+            'support': self._pivots['low'][-1][1] if self._pivots['low'] else math.nan,
+            'resistance': self._pivots['high'][-1][1] if self._pivots['high'] else math.nan,
+            'trend': trend,
+            'divergence': int(bullish) - int(bearish),
+        }
+
+
+class VolumeRatioState:
+    """Incremental ``volume_ratio``"""
+
+    def __init__(self, ema_period: int = 20, multiplier: float = 1.5):
+        self.ema = EMAState(ema_period)
+        self.multiplier = float(multiplier)
+
+    def update(self, volume: float) -> float:
+        return self._ratio(volume, self.ema.update(volume))
+
+    def peek(self, volume: float) -> float:
+        return self._ratio(volume, self.ema.peek(volume))
+
+    def _ratio(self, volume: float, ema: Optional[float]) -> float:
+        if not ema:
+            return 0.0
+        return volume / (ema * self.multiplier)
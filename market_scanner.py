@@ -0,0 +1,293 @@
+"""
+Vectorized multi-symbol market scanner.
+
+Candles for every scanned pair are stacked into 2-D arrays
+(symbols x candles) and all five built-in strategies are evaluated over the
+whole matrix in one pass, producing a ranked signal table. The per-bar
+signal series are shared with the vectorized backtester.
+
+The rules are simplified approximations of the built-in strategies, not
+the ``TradingStrategies`` logic itself, and every scan result says so.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from candle_patterns import detect_patterns
+from indicators import bollinger_series, macd_series, rolling_window, rsi_series
+from market_analytics import analyze, rolling_max, rolling_min, volume_ratio
+from symbols import format_symbol
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = (
+    'RSI_STRATEGY',
+    'VOLUME_FILTER_STRATEGY',
+    'ADVANCED_STRATEGY',
+    'GRID_TRADING_STRATEGY',
+    'DCA_STRATEGY',
+)
+
+ACTIONS = {1: 'BUY', -1: 'SELL', 0: 'HOLD'}
+
+SIGNAL_MODEL = 'approximation'
+SIGNAL_MODEL_NOTE = 'Vectorized approximations of the built-in strategies, not TradingStrategies output'
+
+
+def _shift(series: np.ndarray) -> np.ndarray:
+    """Previous bar's value (the first bar repeats itself)"""
+    shifted = np.empty_like(series)
+    shifted[..., 1:] = series[..., :-1]
+    shifted[..., :1] = series[..., :1]
+    return shifted
+
+
+def _rolling(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Trailing-window reduction aligned to the window's last bar (NaN before)"""
+    out = np.full(values.shape, np.nan)
+    out[..., window - 1:] = reducer(rolling_window(values, window), axis=-1)
+    return out
+
+
+# Signal functions work on every bar of 1-D (candles) or 2-D (symbols x
+# candles) arrays: the scanner reads the last bar, the backtester all of them.
+
+def rsi_signals(close: np.ndarray, config: Dict[str, Any]):
+    """BUY when RSI is oversold, SELL when overbought"""
+    rsi_config = config.get('rsi', {})
+    oversold = rsi_config.get('oversold', 30)
+    overbought = rsi_config.get('overbought', 70)
+    rsi = rsi_series(close, rsi_config.get('period', 14))
+    direction = np.where(rsi < oversold, 1, np.where(rsi > overbought, -1, 0))
+    with np.errstate(invalid='ignore'):
+        confidence = np.where(
+            direction > 0, (oversold - rsi) / max(oversold, 1e-9),
+            np.where(direction < 0, (rsi - overbought) / max(100 - overbought, 1e-9), 0.0)
+        )
+    return direction, np.clip(np.nan_to_num(confidence), 0.0, 1.0), {'rsi': rsi}
+
+
+def volume_filter_signals(open_: np.ndarray, close: np.ndarray, volume: np.ndarray, config: Dict[str, Any]):
+    """Trade in the candle's direction when volume spikes above its EMA"""
+    vf_config = config.get('volume_filter', {})
+    ratio = volume_ratio(volume, vf_config.get('ema_period', 20), vf_config.get('multiplier', 1.5))
+    spike = ratio > 1.0
+    candle = np.sign(close - open_).astype(int)
+    direction = np.where(spike, candle, 0)
+    confidence = np.where(direction != 0, np.clip(ratio - 1.0, 0.0, 1.0), 0.0)
+    return direction, confidence, {'volume_ratio': ratio}
+
+
+def advanced_signals(open_, high, low, close, volume, config: Dict[str, Any]):
+    """Vote across RSI, MACD crossover, volume spike, Bollinger position, candlestick patterns and OBV/pivot analytics"""
+    rsi_dir, _, extra = rsi_signals(close, config)
+    vol_dir, _, vol_extra = volume_filter_signals(open_, close, volume, config)
+
+    macd_config = config.get('macd', {})
+    _, _, histogram = macd_series(close, macd_config.get('fast', 12), macd_config.get('slow', 26),
+                                  macd_config.get('signal', 9))
+    hist_now = np.nan_to_num(histogram)
+    hist_prev = _shift(hist_now)
+    macd_dir = np.sign(hist_now).astype(int)
+    crossover = (np.sign(hist_now) != np.sign(hist_prev)) & (hist_now != 0)
+
+    bb_config = config.get('bollinger_bands', {})
+    upper, _, lower = bollinger_series(close, bb_config.get('window', 20), bb_config.get('n_std', 2.0))
+    with np.errstate(invalid='ignore'):
+        bb_dir = np.where(close < lower, 1, np.where(close > upper, -1, 0))
+
+    score = rsi_dir + macd_dir * np.where(crossover, 2, 1) + vol_dir + bb_dir
+    if config.get('candlestick_analysis', {}).get('enabled'):
+        patterns = detect_patterns(open_, high, low, close, config)
+        score = score + patterns['direction']
+        extra = {**extra, 'pattern_bits': patterns['bits'], 'pattern_strength': patterns['strength']}
+    obv_config = config.get('obv_analysis', {})
+    trend_analysis = config.get('support_resistance', {}).get('trend_analysis')
+    if obv_config.get('enabled') or trend_analysis:
+        analytics = analyze(high, low, close, volume, config)
+        if obv_config.get('enabled'):
+            score = score + analytics['obv_direction']
+            if obv_config.get('divergence_detection'):
+                score = score + analytics['divergence']
+        if trend_analysis:
+            score = score + analytics['trend']
+        extra = {**extra, **{key: analytics[key] for key in
+                             ('obv_strength', 'divergence', 'support', 'resistance', 'trend')}}
+    direction = np.where(score >= 2, 1, np.where(score <= -2, -1, 0))
+    confidence = np.clip(np.abs(score) / 5.0, 0.0, 1.0) * (direction != 0)
+    return direction, confidence, {**extra, **vol_extra, 'macd_histogram': hist_now, 'score': score}
+
+
+def grid_signals(high: np.ndarray, low: np.ndarray, close: np.ndarray, config: Dict[str, Any]):
+    """Buy near the bottom and sell near the top of the recent range"""
+    window = int(config.get('support_resistance', {}).get('window', 20))
+    window = max(1, min(window, close.shape[-1]))
+    range_high = rolling_max(high, window)
+    range_low = rolling_min(low, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        position = np.nan_to_num((close - range_low) / (range_high - range_low), nan=0.5)
+    direction = np.where(position < 0.2, 1, np.where(position > 0.8, -1, 0))
+    confidence = np.where(direction != 0, np.clip(np.abs(position - 0.5) * 2, 0.0, 1.0), 0.0)
+    return direction, confidence, {'range_position': position}
+
+
+def dca_signals(close: np.ndarray, config: Dict[str, Any]):
+    """Accumulate when price trades below its moving average"""
+    window = int(config.get('bollinger_bands', {}).get('window', 20))
+    window = max(1, min(window, close.shape[-1]))
+    average = _rolling(close, window, np.mean)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discount = (average - close) / average
+    threshold = config.get('stop_loss_percentage', 1.5) / 100.0
+    with np.errstate(invalid='ignore'):
+        direction = np.where(discount >= threshold, 1, 0)
+    confidence = np.where(direction > 0, np.clip(np.nan_to_num(discount) / (threshold * 3), 0.0, 1.0), 0.0)
+    return direction, confidence, {'discount': discount}
+
+
+def signal_series(arrays: Dict[str, np.ndarray], config: Dict[str, Any],
+                  strategies: Sequence[str] = STRATEGIES) -> Dict[str, Dict[str, np.ndarray]]:
+    """Direction (1 BUY, -1 SELL, 0 HOLD), confidence and indicators for every bar"""
+    o, h, l, c, v = (np.asarray(arrays[k], dtype=np.float64) for k in ('open', 'high', 'low', 'close', 'volume'))
+    results = {}
+    for name in strategies:
+        if name == 'RSI_STRATEGY':
+            direction, confidence, extra = rsi_signals(c, config)
+        elif name == 'VOLUME_FILTER_STRATEGY':
+            direction, confidence, extra = volume_filter_signals(o, c, v, config)
+        elif name == 'ADVANCED_STRATEGY':
+            direction, confidence, extra = advanced_signals(o, h, l, c, v, config)
+        elif name == 'GRID_TRADING_STRATEGY':
+            direction, confidence, extra = grid_signals(h, l, c, config)
+        elif name == 'DCA_STRATEGY':
+            direction, confidence, extra = dca_signals(c, config)
+        else:
+            raise ValueError(f'Unknown strategy: {name}')
+        results[name] = {'direction': direction, 'confidence': confidence, **extra}
+    return results
+
+
+def evaluate_strategies(arrays: Dict[str, np.ndarray], config: Dict[str, Any],
+                        strategies: Sequence[str] = STRATEGIES) -> Dict[str, Dict[str, np.ndarray]]:
+    """Evaluate strategies over (symbols x candles) OHLCV arrays
+
+    Returns per strategy the direction (1 BUY, -1 SELL, 0 HOLD), confidence
+    and indicator values for each symbol's latest candle.
+    """
+    series = signal_series(arrays, config, strategies)
+    return {name: {key: value[..., -1] for key, value in result.items()} for name, result in series.items()}
+
+
+def rank_signals(symbols: Sequence[str], close: np.ndarray,
+                 results: Dict[str, Dict[str, np.ndarray]], top: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Build the ranked signal table (strongest net signal first)"""
+    names = list(results)
+    directions = np.stack([results[n]['direction'] for n in names])
+    confidences = np.stack([results[n]['confidence'] for n in names])
+    score = (directions * confidences).sum(axis=0)
+    order = np.argsort(-np.abs(score), kind='stable')
+    if top:
+        order = order[:top]
+    price = close[..., -1]
+
+    table = []
+    for i in order.tolist():
+        net = float(score[i])
+        table.append({
+            'symbol': symbols[i],
+            'price': float(price[i]),
+            'action': 'BUY' if net > 0 else 'SELL' if net < 0 else 'HOLD',
+            'score': round(net, 4),
+            'signals': {
+                name: {
+                    'action': ACTIONS[int(results[name]['direction'][i])],
+                    'confidence': round(float(results[name]['confidence'][i]), 4)
+                }
+                for name in names
+            }
+        })
+    return table
+
+
+class MarketScanner:
+    """Scans many pairs at once using candles from the shared CandleStore"""
+
+    def __init__(self, api, candle_store, config: Dict[str, Any], symbols_ttl: float = 300.0, pipeline=None):
+        self.api = api
+        self.candle_store = candle_store
+        self.config = config
+        self.pipeline = pipeline
+        self.symbols_ttl = symbols_ttl
+        self._symbols: List[str] = []
+        self._symbols_at = 0.0
+        self._lock = threading.Lock()
+
+    def list_symbols(self, quote: str = 'USDT') -> List[str]:
+        """All exchange pairs quoted in `quote` (cached)"""
+        with self._lock:
+            if not self._symbols or time.time() - self._symbols_at > self.symbols_ttl:
+                response = self.api.get_trading_pairs()
+                data = response.get('data', {}) if isinstance(response, dict) else {}
+                symbols = []
+                for item in data.get('symbols', []):
+                    name = item.get('symbol') if isinstance(item, dict) else item
+                    if name:
+                        symbols.append(format_symbol(name))
+                if symbols:
+                    self._symbols, self._symbols_at = symbols, time.time()
+            return [s for s in self._symbols if s.endswith('_' + quote.upper())]
+
+    def load_arrays(self, symbols: Sequence[str], interval: str, candles: int):
+        """Stack the latest `candles` bars of each symbol into 2-D arrays"""
+        fetch = lambda symbol: self.candle_store.get(symbol, interval, candles)
+        if self.pipeline is not None:
+            loaded = self.pipeline.map(fetch, symbols)
+        else:
+            loaded = [fetch(symbol) for symbol in symbols]
+
+        kept, rows = [], []
+        for symbol, (times, values) in zip(symbols, loaded):
+            if len(times) < candles:
+                continue
+            kept.append(format_symbol(symbol))
+            rows.append(values)
+        if not rows:
+            return kept, {}
+        stacked = np.stack(rows)
+        arrays = {name: stacked[:, :, i] for i, name in enumerate(('open', 'high', 'low', 'close', 'volume'))}
+        return kept, arrays
+
+    def scan(self, symbols: Optional[Sequence[str]] = None, interval: str = '5M', candles: int = 100,
+             strategies: Optional[Sequence[str]] = None, quote: str = 'USDT',
+             top: Optional[int] = 50) -> Dict[str, Any]:
+        """Evaluate strategies across symbols and return a ranked signal table"""
+        started = time.perf_counter()
+        # More candles than the store holds would skip every symbol and refetch each call
+        candles = max(1, min(int(candles), getattr(self.candle_store, 'capacity', candles)))
+        symbols = [format_symbol(s) for s in symbols] if symbols else self.list_symbols(quote)
+        strategies = list(strategies or STRATEGIES)
+        kept, arrays = self.load_arrays(symbols, interval, candles)
+        loaded = time.perf_counter()
+        if not kept:
+            return {'symbols_scanned': 0, 'signals': [], 'interval': interval, 'candles': candles,
+                    'signal_model': SIGNAL_MODEL, 'signal_model_note': SIGNAL_MODEL_NOTE}
+
+        results = evaluate_strategies(arrays, self.config, strategies)
+        table = rank_signals(kept, arrays['close'], results, top)
+        finished = time.perf_counter()
+        return {
+            'symbols_requested': len(symbols),
+            'symbols_scanned': len(kept),
+            'interval': interval,
+            'candles': candles,
+            'strategies': strategies,
+            'signal_model': SIGNAL_MODEL,
+            'signal_model_note': SIGNAL_MODEL_NOTE,
+            'signals': table,
+            'load_ms': round((loaded - started) * 1000, 2),
+            'evaluate_ms': round((finished - loaded) * 1000, 2)
+        }
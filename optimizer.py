@@ -0,0 +1,275 @@
+"""
+Parallel strategy parameter optimizer.
+
+Grid, random and walk-forward sweeps over config parameters (dotted paths
+such as ``rsi.period`` or ``macd.fast``) run ``vector_backtest.run_vector_backtest``
+on a process pool, so they score the vectorized approximations of the
+strategies, not TradingStrategies itself. Candles are copied once into a shared-memory block that
+every worker maps, so tasks only carry their parameters. Finished
+evaluations are appended to an optional JSONL checkpoint keyed by the
+parameters, the candle window and hashes of the config and candles;
+re-running the same sweep on the same inputs skips work already done.
+"""
+
+import copy
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from market_scanner import SIGNAL_MODEL
+from vector_backtest import OHLCV, run_vector_backtest
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('total_return', 'max_drawdown', 'win_rate', 'num_trades', 'final_balance')
+
+# Worker-process state set by _attach
+_worker: Dict[str, Any] = {}
+
+
+def apply_params(config: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of `config` with dotted-path overrides applied"""
+    config = copy.deepcopy(config)
+    for path, value in params.items():
+        node = config
+        keys = path.split('.')
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+    return config
+
+
+def valid_params(params: Dict[str, Any]) -> bool:
+    """Reject combinations that make no sense (fast MACD >= slow, oversold >= overbought)"""
+    if params.get('macd.fast', 0) >= params.get('macd.slow', float('inf')):
+        return False
+    if params.get('rsi.oversold', 0) >= params.get('rsi.overbought', float('inf')):
+        return False
+    return True
+
+
+def grid_space(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the listed values"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_space(space: Dict[str, Any], samples: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Random draws; a (low, high) tuple is a uniform range, a list is a choice"""
+    rng = random.Random(seed)
+    drawn = []
+    for _ in range(samples):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                params[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) \
+                    else round(rng.uniform(low, high), 6)
+            else:
+                params[name] = rng.choice(list(values))
+        drawn.append(params)
+    return drawn
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def config_digest(config: Dict[str, Any]) -> str:
+    """Stable hash of a config, so checkpoints from another config are not reused"""
+    return _digest(json.dumps(config, sort_keys=True, default=str).encode())
+
+
+def _task_key(strategy: str, params: Dict[str, Any], start: int, end: int, fingerprint: str) -> str:
+    return json.dumps([strategy, sorted(params.items()), start, end, fingerprint])
+
+
+def _attach(name: str, shape: Tuple[int, int], config: Dict[str, Any]):
+    """Pool initializer: map the shared candle block in this worker"""
+    block = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    _worker.update(block=block, data=data, config=config)
+
+
+def _evaluate(strategy: str, params: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+    data = _worker['data'][:, start:end]
+    arrays = {name: data[i] for i, name in enumerate(OHLCV)}
+    result = run_vector_backtest(arrays, strategy, apply_params(_worker['config'], params))
+    return {metric: result[metric] for metric in METRICS}
+
+
+class SharedCandles:
+    """OHLCV arrays copied into one (5 x candles) shared-memory block"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        length = len(arrays['close'])
+        self.shape = (len(OHLCV), length)
+        self.block = shared_memory.SharedMemory(create=True, size=max(1, 8 * length * len(OHLCV)))
+        data = np.ndarray(self.shape, dtype=np.float64, buffer=self.block.buf)
+        for i, name in enumerate(OHLCV):
+            data[i] = arrays[name]
+        self.data = data
+
+    def digest(self, start: int, end: int) -> str:
+        """Hash of the candles in [start, end)"""
+        return _digest(np.ascontiguousarray(self.data[:, start:end]).tobytes())
+
+    @property
+    def name(self) -> str:
+        return self.block.name
+
+    def close(self):
+        self.data = None
+        self.block.close()
+        self.block.unlink()
+
+
+class Optimizer:
+    """Runs parameter sweeps for one strategy on a process pool"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], config: Dict[str, Any], strategy: str,
+                 metric: str = 'total_return', max_workers: Optional[int] = None,
+                 checkpoint: Optional[str] = None):
+        if metric not in METRICS:
+            raise ValueError(f'Unknown metric: {metric}')
+        self.config = config
+        self.strategy = strategy
+        self.metric = metric
+        self.checkpoint = checkpoint
+        self.candles = SharedCandles(arrays)
+        self.length = self.candles.shape[1]
+        self._config_digest = config_digest(config)
+        self._fingerprints: Dict[Tuple[int, int], str] = {}
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_attach,
+                                         initargs=(self.candles.name, self.candles.shape, config))
+        self._done = self._load_checkpoint()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the workers and release the shared candles"""
+        self._pool.shutdown(wait=True)
+        self.candles.close()
+
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        done = {}
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        done[entry['key']] = entry['metrics']
+        return done
+
+    def _fingerprint(self, start: int, end: int) -> str:
+        """Config and candle hashes for a window; a checkpoint only matches the same inputs"""
+        window = (start, end)
+        if window not in self._fingerprints:
+            self._fingerprints[window] = f"{self._config_digest}:{self.candles.digest(start, end)}"
+        return self._fingerprints[window]
+
+    def evaluate(self, candidates: Sequence[Dict[str, Any]], start: int = 0,
+                 end: Optional[int] = None) -> Dict[str, Any]:
+        """Backtest every valid candidate on candles [start, end)"""
+        started = time.perf_counter()
+        end = self.length if end is None else end
+        candidates = [p for p in candidates if valid_params(p)]
+        results, pending = [], {}
+        resumed = 0
+        fingerprint = self._fingerprint(start, end)
+        for params in candidates:
+            key = _task_key(self.strategy, params, start, end, fingerprint)
+            if key in self._done:
+                results.append({'params': params, **self._done[key]})
+                resumed += 1
+            elif key not in pending:
+                pending[key] = params
+
+        futures = {self._pool.submit(_evaluate, self.strategy, params, start, end): key
+                   for key, params in pending.items()}
+        log = open(self.checkpoint, 'a') if self.checkpoint and futures else None
+        try:
+            for future in as_completed(futures):
+                key = futures[future]
+                metrics = future.result()
+                self._done[key] = metrics
+                results.append({'params': pending[key], **metrics})
+                if log is not None:
+                    log.write(json.dumps({'key': key, 'metrics': metrics}) + '\n')
+                    log.flush()
+        finally:
+            if log is not None:
+                log.close()
+
+        return {
+            'strategy': self.strategy,
+            'metric': self.metric,
+            'signal_model': SIGNAL_MODEL,
+            'evaluated': len(futures),
+            'resumed': resumed,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            'leaderboard': self.rank(results)
+        }
+
+    def rank(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Best first (max_drawdown closest to zero counts as best)"""
+        def score(entry):
+            value = entry.get(self.metric)
+            return float('-inf') if value is None else value
+        return sorted(results, key=score, reverse=True)
+
+    def grid(self, space: Dict[str, Sequence[Any]], top: int = 20) -> Dict[str, Any]:
+        report = self.evaluate(grid_space(space))
+        report['leaderboard'] = report['leaderboard'][:top]
+        return report
+
+    def random(self, space: Dict[str, Any], samples: int = 100, seed: int = 0, top: int = 20) -> Dict[str, Any]:
+        report = self.evaluate(random_space(space, samples, seed))
+        report['leaderboard'] = report['leaderboard'][:top]
+        return report
+
+    def walk_forward(self, space: Dict[str, Any], folds: int = 4, train_fraction: float = 0.75,
+                     samples: Optional[int] = None, seed: int = 0) -> Dict[str, Any]:
+        """Optimize on each fold's training window and score the winner on the following test window"""
+        candidates = random_space(space, samples, seed) if samples else grid_space(space)
+        fold_size = self.length // folds
+        report = []
+        for fold in range(folds):
+            start = fold * fold_size
+            end = self.length if fold == folds - 1 else start + fold_size
+            split = start + int((end - start) * train_fraction)
+            train = self.evaluate(candidates, start, split)
+            if not train['leaderboard']:
+                continue
+            best = train['leaderboard'][0]
+            test = self.evaluate([best['params']], split, end)['leaderboard'][0]
+            report.append({
+                'fold': fold,
+                'train': [start, split],
+                'test': [split, end],
+                'params': best['params'],
+                'in_sample': {m: best[m] for m in METRICS},
+                'out_of_sample': {m: test[m] for m in METRICS}
+            })
+        out_of_sample = [f['out_of_sample']['total_return'] for f in report]
+        return {
+            'strategy': self.strategy,
+            'metric': self.metric,
+            'signal_model': SIGNAL_MODEL,
+            'folds': report,
+            'out_of_sample_return': float(np.prod([1 + r for r in out_of_sample]) - 1) if report else None
+        }
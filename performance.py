@@ -0,0 +1,297 @@
+"""
+Incrementally maintained performance rollups.
+
+New trading_history and portfolio_snapshots rows are folded into
+per-minute, per-hour and per-day buckets: equity OHLC from snapshots, and
+trade count, wins, losses, realized PnL and volume per strategy from fills.
+Realized PnL uses average cost per (user, symbol, strategy). Each refresh
+only reads rows past a stored id watermark plus the orders that were still
+open when it passed them (rollup_pending), and reports only read the rollup
+tables, so a year of history costs a few hundred day rows.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Orders in these states may still fill; they are re-checked until they settle
+OPEN_STATUSES = {'NEW', 'OPEN', 'PENDING', 'PARTIALLY_FILLED'}
+SKIP_STATUSES = {'CANCELED', 'CANCELLED', 'REJECTED', 'FAILED', 'EXPIRED'}
+
+UPSERT_EQUITY = (
+    "INSERT INTO equity_rollups (user_id, bucket, ts, open, high, low, close, pnl, samples) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (user_id, bucket, ts) DO UPDATE SET "
+    "high = max(high, excluded.high), low = min(low, excluded.low), close = excluded.close, "
+    "pnl = excluded.pnl, samples = samples + excluded.samples"
+)
+UPSERT_STRATEGY = (
+    "INSERT INTO strategy_rollups (user_id, strategy, bucket, ts, trades, wins, losses, realized_pnl, volume) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (user_id, strategy, bucket, ts) DO UPDATE SET "
+    "trades = trades + excluded.trades, wins = wins + excluded.wins, losses = losses + excluded.losses, "
+    "realized_pnl = realized_pnl + excluded.realized_pnl, volume = volume + excluded.volume"
+)
+UPSERT_POSITION = "INSERT OR REPLACE INTO rollup_positions (user_id, symbol, strategy, quantity, cost) VALUES (?, ?, ?, ?, ?)"
+UPSERT_STATE = "INSERT OR REPLACE INTO rollup_state (name, last_id) VALUES (?, ?)"
+
+SELECT_NEW_TRADES = (
+    "SELECT id, IFNULL(user_id, 0), symbol, side, quantity, price, status, IFNULL(strategy, 'MANUAL'), created_at "
+    "FROM trading_history WHERE id > ? ORDER BY id LIMIT ?"
+)
+SELECT_PENDING_TRADES = (
+    "SELECT p.id, IFNULL(t.user_id, 0), t.symbol, t.side, t.quantity, t.price, t.status, "
+    "IFNULL(t.strategy, 'MANUAL'), t.created_at "
+    "FROM rollup_pending p LEFT JOIN trading_history t ON t.id = p.id ORDER BY p.id"
+)
+INSERT_PENDING = "INSERT OR IGNORE INTO rollup_pending (id) VALUES (?)"
+DELETE_PENDING = "DELETE FROM rollup_pending WHERE id = ?"
+SELECT_NEW_SNAPSHOTS = (
+    "SELECT id, IFNULL(user_id, 0), total_value, total_pnl, created_at "
+    "FROM portfolio_snapshots WHERE id > ? ORDER BY id LIMIT ?"
+)
+
+
+def to_epoch(value: Any) -> int:
+    """SQLite CURRENT_TIMESTAMP text (UTC), ISO strings or numbers -> epoch seconds"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def max_drawdown(high: np.ndarray, low: np.ndarray) -> float:
+    """Largest peak-to-trough decline as a fraction (0.0 to -1.0) at bucket resolution"""
+    if not len(high):
+        return 0.0
+    peak = np.maximum.accumulate(high)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(peak > 0, low / peak - 1.0, 0.0)
+    return float(min(drawdown.min(), 0.0))
+
+
+class PerformanceRollups:
+    """Maintains and queries minute/hour/day performance rollups"""
+
+    def __init__(self, db, chunk_size: int = 5000):
+        self.db = db
+        self.chunk_size = int(chunk_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _watermark(self, name: str) -> int:
+        row = self.db.connection().execute("SELECT last_id FROM rollup_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def refresh(self) -> Dict[str, int]:
+        """Fold rows added since the last refresh into the rollups"""
+        with self._lock:
+            return {'trades': self._refresh_trades(), 'snapshots': self._refresh_snapshots()}
+
+    def start(self, interval_seconds: float = 30.0):
+        """Refresh periodically on a daemon thread so request handlers only read"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Performance rollup refresh failed: {e}")
+                self._stop.wait(interval_seconds)
+
+        self._thread = threading.Thread(target=run, name='performance-rollups', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_trades(self) -> int:
+        conn = self.db.connection()
+        last_id = self._watermark('trading_history')
+        positions: Dict[Tuple[int, str, str], List[float]] = {
+            (u, sym, strat): [qty, cost]
+            for u, sym, strat, qty, cost in conn.execute(
+                "SELECT user_id, symbol, strategy, quantity, cost FROM rollup_positions")
+        }
+        # Orders that were still open last time: fold the ones that have filled since
+        # (rows archived in the meantime come back empty and are simply dropped)
+        processed = self._fold_trades(conn.execute(SELECT_PENDING_TRADES).fetchall(), positions)
+        while True:
+            rows = conn.execute(SELECT_NEW_TRADES, (last_id, self.chunk_size)).fetchall()
+            if not rows:
+                return processed
+            last_id = rows[-1][0]
+            processed += self._fold_trades(rows, positions, last_id)
+
+    def _fold_trades(self, rows: List[Tuple], positions: Dict[Tuple[int, str, str], List[float]],
+                     last_id: Optional[int] = None) -> int:
+        """Fold final trades into the rollups; open ones wait in rollup_pending until they fill.
+
+        ``last_id`` is given for rows past the watermark and None for the pending re-check.
+        """
+        new = last_id is not None
+        resolved = 0
+        buckets: Dict[Tuple, List[float]] = {}
+        touched = set()
+        statements = []
+        for trade_id, user_id, symbol, side, quantity, price, status, strategy, created_at in rows:
+            status = (status or '').upper()
+            if status in OPEN_STATUSES:
+                if new:
+                    statements.append((INSERT_PENDING, (trade_id,)))
+                continue
+            if not new:
+                statements.append((DELETE_PENDING, (trade_id,)))
+                resolved += 1
+            quantity, price = float(quantity or 0), float(price or 0)
+            if status in SKIP_STATUSES or quantity <= 0 or price <= 0:
+                continue
+            key = (user_id, symbol, strategy)
+            position = positions.setdefault(key, [0.0, 0.0])
+            touched.add(key)
+            realized, win, loss = 0.0, 0, 0
+            if (side or '').upper() == 'BUY':
+                position[0] += quantity
+                position[1] += quantity * price
+            else:
+                matched = min(quantity, position[0])
+                if matched > 0:
+                    average = position[1] / position[0]
+                    realized = (price - average) * matched
+                    position[0] -= matched
+                    position[1] = 0.0 if position[0] <= 1e-12 else position[1] - average * matched
+                    win, loss = int(realized > 0), int(realized < 0)
+
+            epoch = to_epoch(created_at)
+            for bucket, size in BUCKETS.items():
+                agg = buckets.setdefault((user_id, strategy, bucket, epoch - epoch % size), [0, 0, 0, 0.0, 0.0])
+                agg[0] += 1
+                agg[1] += win
+                agg[2] += loss
+                agg[3] += realized
+                agg[4] += quantity * price
+
+        statements += [(UPSERT_STRATEGY, (*key, *agg)) for key, agg in buckets.items()]
+        statements += [(UPSERT_POSITION, (*key, *positions[key])) for key in touched]
+        if new:
+            statements.append((UPSERT_STATE, ('trading_history', last_id)))
+        if statements:
+            self.db.execute_transaction(statements)
+        return len(rows) if new else resolved
+
+    def _refresh_snapshots(self) -> int:
+        conn = self.db.connection()
+        last_id = self._watermark('portfolio_snapshots')
+        processed = 0
+        while True:
+            rows = conn.execute(SELECT_NEW_SNAPSHOTS, (last_id, self.chunk_size)).fetchall()
+            if not rows:
+                return processed
+            buckets: Dict[Tuple, List[float]] = {}
+            for _, user_id, total_value, total_pnl, created_at in rows:
+                value, pnl = float(total_value or 0), float(total_pnl or 0)
+                epoch = to_epoch(created_at)
+                for bucket, size in BUCKETS.items():
+                    key = (user_id, bucket, epoch - epoch % size)
+                    agg = buckets.get(key)
+                    if agg is None:
+                        buckets[key] = [value, value, value, value, pnl, 1]
+                    else:
+                        agg[1], agg[2] = max(agg[1], value), min(agg[2], value)
+                        agg[3], agg[4] = value, pnl
+                        agg[5] += 1
+
+            last_id = rows[-1][0]
+            statements = [(UPSERT_EQUITY, (*key, *agg)) for key, agg in buckets.items()]
+            statements.append((UPSERT_STATE, ('portfolio_snapshots', last_id)))
+            self.db.execute_transaction(statements)
+            processed += len(rows)
+
+    # ---- queries ---------------------------------------------------------------
+
+    @staticmethod
+    def choose_bucket(start: Optional[int], end: int) -> str:
+        """Finest bucket that keeps the equity series to a few thousand points"""
+        if start is None:
+            return 'day'
+        span = end - start
+        if span <= 2 * 86400:
+            return 'minute'
+        if span <= 90 * 86400:
+            return 'hour'
+        return 'day'
+
+    def report(self, user_id: Optional[int] = None, start: Any = None, end: Any = None,
+               bucket: Optional[str] = None,
+               price_lookup: Optional[Callable[[str], float]] = None) -> Dict[str, Any]:
+        """Equity curve, realized/unrealized PnL, drawdown and per-strategy win rates"""
+        uid = 0 if user_id is None else int(user_id)
+        end_ts = to_epoch(end) if end is not None else int(time.time())
+        start_ts = to_epoch(start) if start is not None else None
+        bucket = bucket or self.choose_bucket(start_ts, end_ts)
+        if bucket not in BUCKETS:
+            raise ValueError(f'Unknown bucket: {bucket}')
+        size = BUCKETS[bucket]
+        lower = 0 if start_ts is None else start_ts - start_ts % size
+        conn = self.db.connection()
+
+        equity = np.array(conn.execute(
+            "SELECT ts, open, high, low, close, pnl FROM equity_rollups "
+            "WHERE user_id = ? AND bucket = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+            (uid, bucket, lower, end_ts)
+        ).fetchall(), dtype=np.float64).reshape(-1, 6)
+
+        strategies = {}
+        realized_total = 0.0
+        for strategy, trades, wins, losses, realized, volume in conn.execute(
+                "SELECT strategy, SUM(trades), SUM(wins), SUM(losses), SUM(realized_pnl), SUM(volume) "
+                "FROM strategy_rollups WHERE user_id = ? AND bucket = ? AND ts >= ? AND ts <= ? "
+                "GROUP BY strategy ORDER BY strategy", (uid, bucket, lower, end_ts)):
+            closed = wins + losses
+            strategies[strategy] = {
+                'trades': trades,
+                'wins': wins,
+                'losses': losses,
+                'win_rate': wins / closed if closed else None,
+                'realized_pnl': realized,
+                'volume': volume
+            }
+            realized_total += realized
+
+        unrealized = 0.0
+        open_positions = []
+        for symbol, strategy, quantity, cost in conn.execute(
+                "SELECT symbol, strategy, quantity, cost FROM rollup_positions WHERE user_id = ? AND quantity > 0",
+                (uid,)):
+            average = cost / quantity
+            price = price_lookup(symbol) if price_lookup else 0.0
+            pnl = (price - average) * quantity if price else None
+            unrealized += pnl or 0.0
+            open_positions.append({'symbol': symbol, 'strategy': strategy, 'quantity': quantity,
+                                   'average_price': average, 'price': price or None, 'unrealized_pnl': pnl})
+
+        return {
+            'bucket': bucket,
+            'equity': [
+                {'time': int(ts), 'open': o, 'high': h, 'low': l, 'close': c, 'pnl': p}
+                for ts, o, h, l, c, p in equity.tolist()
+            ],
+            'current_equity': float(equity[-1, 4]) if len(equity) else None,
+            'realized_pnl': realized_total,
+            'unrealized_pnl': unrealized,
+            'max_drawdown': max_drawdown(equity[:, 2], equity[:, 3]),
+            'strategies': strategies,
+            'open_positions': open_positions
+        }
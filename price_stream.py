@@ -0,0 +1,211 @@
+"""
+Real-time price fan-out from the Pionex websocket to Socket.IO rooms.
+
+One upstream subscription per symbol feeds an in-memory last-price and
+top-of-book table. A background task flushes the symbols that changed since
+the previous flush to the ``price:<SYMBOL>`` room, so bursts of ticks are
+conflated into at most one ``price_update`` per symbol per throttle window
+regardless of how many browsers are watching.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from symbols import format_symbol
+
+logger = logging.getLogger(__name__)
+
+
+def price_room(symbol: str) -> str:
+    """Socket.IO room name for a symbol's price updates"""
+    return f"price:{format_symbol(symbol)}"
+
+
+class PriceFanout:
+    """Keeps the latest tick per symbol and broadcasts conflated updates"""
+
+    def __init__(self, socketio, api=None, throttle: float = 0.25, stale_after: float = 5.0):
+        self.socketio = socketio
+        self.api = api
+        self.throttle = float(throttle)
+        self.stale_after = float(stale_after)
+        self.book: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._subscribers: Dict[str, Set[str]] = {}
+        self._last_rest_poll: Dict[str, float] = {}
+        self._ws = None
+        self._running = False
+        # Called as listener(symbol, price, size, timestamp) for every streamed trade
+        self.trade_listeners = []
+
+    def attach(self, ws):
+        """Consume ticks from a PionexWebSocket client"""
+        self._ws = ws
+        for hook in ('add_message_handler', 'add_listener', 'add_callback'):
+            register = getattr(ws, hook, None)
+            if callable(register):
+                register(self.ingest)
+                return
+        if hasattr(ws, 'on_message'):
+            previous = ws.on_message
+            if callable(previous):
+                # Keep whatever handler the client already had; ingest the message argument too
+                def on_message(*args):
+                    previous(*args)
+                    self.ingest(args[-1])
+                ws.on_message = on_message
+            else:
+                ws.on_message = self.ingest
+        else:
+            logger.warning("PionexWebSocket exposes no message hook; using REST fallback for prices")
+
+    def start(self):
+        """Start the background flush task"""
+        if self._running:
+            return
+        self._running = True
+        self.socketio.start_background_task(self._run)
+        logger.info("Price fan-out started")
+
+    def stop(self):
+        """Stop the background flush task"""
+        self._running = False
+
+    def subscribe(self, sid: str, symbol: str) -> str:
+        """Register a client for a symbol and subscribe upstream on first use"""
+        symbol = format_symbol(symbol)
+        with self._lock:
+            first = symbol not in self._subscribers or not self._subscribers[symbol]
+            self._subscribers.setdefault(symbol, set()).add(sid)
+        if first:
+            self._upstream_subscribe(symbol)
+        return symbol
+
+    def unsubscribe(self, sid: str, symbol: Optional[str] = None):
+        """Remove a client from one symbol, or from all symbols"""
+        with self._lock:
+            symbols = [format_symbol(symbol)] if symbol else list(self._subscribers)
+            for name in symbols:
+                self._subscribers.get(name, set()).discard(sid)
+
+    def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the latest quote for a symbol from memory"""
+        with self._lock:
+            quote = self.book.get(format_symbol(symbol))
+            return dict(quote) if quote else None
+
+    def get_last_price(self, symbol: str) -> Optional[float]:
+        """Latest traded price from memory; None if unknown or older than `stale_after` (use REST then)"""
+        quote = self.get_quote(symbol)
+        if not quote or not quote.get('price') or time.time() - quote['received_at'] > self.stale_after:
+            return None
+        return float(quote['price'])
+
+    def ingest(self, message: Any):
+        """Apply one upstream websocket message (TRADE, DEPTH or TICKER topic)"""
+        try:
+            if isinstance(message, (str, bytes)):
+                message = json.loads(message)
+            if not isinstance(message, dict):
+                return
+            topic = message.get('topic')
+            symbol = message.get('symbol')
+            data = message.get('data')
+            if not symbol or data is None:
+                return
+
+            if topic == 'TRADE':
+                trades = data if isinstance(data, list) else [data]
+                for trade in trades:
+                    for listener in self.trade_listeners:
+                        listener(symbol, float(trade['price']), float(trade.get('size', 0)),
+                                 int(trade.get('timestamp', time.time() * 1000)))
+                if trades:
+                    latest = max(trades, key=lambda t: t.get('timestamp', 0))
+                    self.update(symbol, price=float(latest['price']),
+                                timestamp=latest.get('timestamp'))
+            elif topic == 'DEPTH':
+                bids = data.get('bids') or []
+                asks = data.get('asks') or []
+                self.update(
+                    symbol,
+                    bid=float(bids[0][0]) if bids else None,
+                    bid_size=float(bids[0][1]) if bids else None,
+                    ask=float(asks[0][0]) if asks else None,
+                    ask_size=float(asks[0][1]) if asks else None,
+                    timestamp=message.get('timestamp')
+                )
+            elif topic == 'TICKER':
+                self.update(symbol, price=float(data.get('close') or data.get('price')),
+                            timestamp=data.get('time') or message.get('timestamp'))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed websocket message: {e}")
+
+    def update(self, symbol: str, **fields):
+        """Merge fields into a symbol's quote and mark it for broadcast"""
+        symbol = format_symbol(symbol)
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if not fields:
+            return
+        with self._lock:
+            quote = self.book.setdefault(symbol, {'symbol': symbol})
+            quote.update(fields)
+            quote['received_at'] = time.time()
+            self._dirty.add(symbol)
+
+    def flush(self):
+        """Broadcast every changed symbol that has subscribers"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            updates = [
+                dict(self.book[symbol]) for symbol in dirty
+                if self._subscribers.get(symbol)
+            ]
+        for quote in updates:
+            self.socketio.emit('price_update', quote, to=price_room(quote['symbol']))
+
+    def _run(self):
+        while self._running:
+            try:
+                self._refresh_stale()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error in price fan-out: {e}")
+            self.socketio.sleep(self.throttle)
+
+    def _refresh_stale(self):
+        """Poll REST for watched symbols the websocket has not updated recently"""
+        if self.api is None:
+            return
+        now = time.time()
+        with self._lock:
+            stale = [
+                symbol for symbol, sids in self._subscribers.items()
+                if sids
+                and now - self.book.get(symbol, {}).get('received_at', 0) > self.stale_after
+                and now - self._last_rest_poll.get(symbol, 0) > self.stale_after
+            ]
+            for symbol in stale:
+                self._last_rest_poll[symbol] = now
+        for symbol in stale:
+            try:
+                price = self.api.get_real_time_price(symbol)
+                if price:
+                    self.update(symbol, price=float(price), timestamp=int(now * 1000))
+            except Exception as e:
+                logger.warning(f"REST price fallback failed for {symbol}: {e}")
+
+    def _upstream_subscribe(self, symbol: str):
+        if self._ws is None:
+            return
+        subscribe = getattr(self._ws, 'subscribe', None)
+        if not callable(subscribe):
+            return
+        try:
+            subscribe(symbol)
+        except Exception as e:
+            logger.warning(f"Websocket subscribe failed for {symbol}: {e}")
@@ -0,0 +1,111 @@
+"""
+Pionex request signing fast path.
+
+The HMAC key schedule is computed once per secret and copied for every
+request, canonical query strings reuse a cached key order per parameter
+set, and batches of requests that share method, path and timestamp reuse
+the hashed ``METHOD + path?query`` prefix, so only each body is hashed.
+"""
+
+import hashlib
+import hmac
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote_plus, urlencode
+
+Signed = Tuple[str, Dict[str, str]]
+
+
+def _encode(value: Any) -> str:
+    text = str(value)
+    return text if text.isascii() and text.isalnum() else quote_plus(text)
+
+
+class RequestSigner:
+    """HMAC-SHA256 signer with precomputed key state"""
+
+    def __init__(self, api_key: str, secret_key: str):
+        self.api_key = api_key or ''
+        self._mac = hmac.new((secret_key or '').encode(), digestmod=hashlib.sha256)
+        self._orders: Dict[frozenset, Tuple[Tuple[str, str], ...]] = {}
+
+    def canonical_query(self, params: Dict[str, Any]) -> str:
+        """``k=v&...`` with keys sorted, matching urlencode(sorted(params.items()))"""
+        if not params:
+            return ''
+        keys = frozenset(params)
+        order = self._orders.get(keys)
+        if order is None:
+            order = self._orders[keys] = tuple((k, quote_plus(k) + '=') for k in sorted(params))
+        return '&'.join(prefix + _encode(params[k]) for k, prefix in order)
+
+    def signature(self, payload: str) -> str:
+        mac = self._mac.copy()
+        mac.update(payload.encode())
+        return mac.hexdigest()
+
+    def sign(self, method: str, path: str, params: Optional[Dict[str, Any]] = None, body: str = '',
+             timestamp: Optional[int] = None) -> Signed:
+        """Add a timestamp and return (query string, auth headers)"""
+        query = dict(params or ())
+        query['timestamp'] = timestamp if timestamp is not None else int(time.time() * 1000)
+        query_string = self.canonical_query(query)
+        signature = self.signature(f"{method}{path}?{query_string}{body}")
+        return query_string, {'PIONEX-KEY': self.api_key, 'PIONEX-SIGNATURE': signature}
+
+    def sign_batch(self, method: str, path: str, bodies: Sequence[str],
+                   params: Optional[Dict[str, Any]] = None, timestamp: Optional[int] = None) -> List[Signed]:
+        """Sign several bodies for the same endpoint with one timestamp"""
+        query = dict(params or ())
+        query['timestamp'] = timestamp if timestamp is not None else int(time.time() * 1000)
+        query_string = self.canonical_query(query)
+        prefix = self._mac.copy()
+        prefix.update(f"{method}{path}?{query_string}".encode())
+
+        signed = []
+        for body in bodies:
+            mac = prefix.copy()
+            mac.update(body.encode())
+            signed.append((query_string, {'PIONEX-KEY': self.api_key, 'PIONEX-SIGNATURE': mac.hexdigest()}))
+        return signed
+
+
+def naive_sign(secret_key: str, method: str, path: str, params: Dict[str, Any], body: str = '') -> str:
+    """Reference implementation: fresh HMAC and urlencode per request"""
+    payload = f"{method}{path}?{urlencode(sorted(params.items()))}{body}"
+    return hmac.new(secret_key.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def benchmark(iterations: int = 20000, batch_size: int = 20) -> Dict[str, float]:
+    """Microseconds per signature for the naive, fast and batch paths"""
+    signer = RequestSigner('key', 'secret' * 8)
+    params = {'symbol': 'BTC_USDT', 'limit': 100, 'timestamp': 1700000000000}
+    body = '{"symbol":"BTC_USDT","side":"BUY","type":"LIMIT","size":"0.01","price":"42000.5"}'
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        naive_sign('secret' * 8, 'POST', '/api/v1/trade/order', params, body)
+    naive = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        signer.sign('POST', '/api/v1/trade/order', params, body, timestamp=1700000000000)
+    fast = time.perf_counter() - started
+
+    batches = max(1, iterations // batch_size)
+    bodies = [body] * batch_size
+    started = time.perf_counter()
+    for _ in range(batches):
+        signer.sign_batch('POST', '/api/v1/trade/order', bodies, {'symbol': 'BTC_USDT'}, timestamp=1700000000000)
+    batch = time.perf_counter() - started
+
+    return {
+        'naive_us': naive / iterations * 1e6,
+        'fast_us': fast / iterations * 1e6,
+        'batch_us': batch / (batches * batch_size) * 1e6
+    }
+
+
+if __name__ == '__main__':
+    for name, value in benchmark().items():
+        print(f"{name:>9}: {value:.2f}")
@@ -0,0 +1,318 @@
+"""
+Keyframe + delta encoding for portfolio snapshots.
+
+``snapshot_data`` is flattened to ``path -> value`` leaves. Every
+`keyframe_interval` snapshots a full keyframe is stored (``K:`` + base64 of
+zlib-compressed JSON); in between only the leaves that changed are stored
+as a packed binary delta (``D:`` + base64). Rows written before this format
+(plain JSON) read as keyframes. Totals stay in their own columns, so equity
+curves never need to decode ``snapshot_data`` at all.
+
+Rows are encoded inside the write transaction against the user's latest
+stored row, so several writers (Database instances or processes) sharing
+one file still produce a chain every reader can decode.
+"""
+
+import base64
+import json
+import logging
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEYFRAME = 'K:'
+DELTA = 'D:'
+SEP = '/'
+
+# Delta ops: define a key (gets the next index), set a float/int/JSON value, delete
+OP_DEFINE, OP_FLOAT, OP_INT, OP_JSON, OP_DELETE = range(5)
+
+
+def flatten(document: Any, prefix: str = '') -> Dict[str, Any]:
+    """Nested dicts -> {'a/b': leaf}; lists and scalars are leaves"""
+    if not isinstance(document, dict):
+        return {prefix: document} if prefix else {'': document}
+    leaves = {}
+    for key, value in document.items():
+        path = f"{prefix}{SEP}{key}" if prefix else str(key)
+        if isinstance(value, dict) and value:
+            leaves.update(flatten(value, path))
+        else:
+            leaves[path] = value
+    return leaves
+
+
+def unflatten(leaves: Dict[str, Any]) -> Any:
+    if list(leaves) == ['']:
+        return leaves['']
+    document: Dict[str, Any] = {}
+    for path, value in leaves.items():
+        node = document
+        parts = path.split(SEP)
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return document
+
+
+class _Epoch:
+    """Key dictionary and state since the last keyframe"""
+
+    def __init__(self, leaves: Dict[str, Any]):
+        self.keys: List[str] = list(leaves)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.leaves = dict(leaves)
+        self.count = 0
+        # id of the stored row this state ends at (None until stored)
+        self.last_id: Optional[int] = None
+
+
+def encode_keyframe(leaves: Dict[str, Any]) -> str:
+    payload = zlib.compress(json.dumps(leaves, separators=(',', ':')).encode(), 6)
+    return KEYFRAME + base64.b64encode(payload).decode()
+
+
+def encode_delta(epoch: _Epoch, leaves: Dict[str, Any]) -> str:
+    """Binary delta from epoch.leaves to `leaves` (updates the epoch)"""
+    out = bytearray()
+    previous = epoch.leaves
+    for key, value in leaves.items():
+        if key in previous and previous[key] == value and type(previous[key]) is type(value):
+            continue
+        if key not in epoch.index:
+            name = key.encode()
+            out += struct.pack('<BH', OP_DEFINE, len(name)) + name
+            epoch.index[key] = len(epoch.keys)
+            epoch.keys.append(key)
+        idx = epoch.index[key]
+        if isinstance(value, float):
+            out += struct.pack('<BHd', OP_FLOAT, idx, value)
+        elif isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63:
+            out += struct.pack('<BHq', OP_INT, idx, value)
+        else:
+            blob = json.dumps(value, separators=(',', ':')).encode()
+            out += struct.pack('<BHI', OP_JSON, idx, len(blob)) + blob
+    for key in previous:
+        if key not in leaves:
+            out += struct.pack('<BH', OP_DELETE, epoch.index[key])
+    epoch.leaves = dict(leaves)
+    return DELTA + base64.b64encode(bytes(out)).decode()
+
+
+def apply_delta(epoch: _Epoch, encoded: str):
+    """Apply a ``D:`` payload to the epoch state in place"""
+    data = base64.b64decode(encoded[len(DELTA):])
+    pos = 0
+    while pos < len(data):
+        op = data[pos]
+        if op == OP_DEFINE:
+            (length,) = struct.unpack_from('<H', data, pos + 1)
+            key = data[pos + 3:pos + 3 + length].decode()
+            epoch.index[key] = len(epoch.keys)
+            epoch.keys.append(key)
+            pos += 3 + length
+        elif op == OP_FLOAT:
+            idx, value = struct.unpack_from('<Hd', data, pos + 1)
+            epoch.leaves[epoch.keys[idx]] = value
+            pos += 11
+        elif op == OP_INT:
+            idx, value = struct.unpack_from('<Hq', data, pos + 1)
+            epoch.leaves[epoch.keys[idx]] = value
+            pos += 11
+        elif op == OP_JSON:
+            idx, length = struct.unpack_from('<HI', data, pos + 1)
+            epoch.leaves[epoch.keys[idx]] = json.loads(data[pos + 7:pos + 7 + length])
+            pos += 7 + length
+        elif op == OP_DELETE:
+            (idx,) = struct.unpack_from('<H', data, pos + 1)
+            epoch.leaves.pop(epoch.keys[idx], None)
+            pos += 3
+        else:
+            raise ValueError(f'Corrupt snapshot delta (op {op})')
+
+
+def decode_keyframe(encoded: Optional[str]) -> Dict[str, Any]:
+    if not encoded:
+        return {}
+    if encoded.startswith(KEYFRAME):
+        return json.loads(zlib.decompress(base64.b64decode(encoded[len(KEYFRAME):])))
+    return flatten(json.loads(encoded))
+
+
+def decode_series(encoded_rows: Iterable[Optional[str]]) -> List[Any]:
+    """Decode consecutive snapshot_data values that start with a keyframe"""
+    epoch = None
+    documents = []
+    for encoded in encoded_rows:
+        if encoded and encoded.startswith(DELTA):
+            if epoch is None:
+                raise ValueError('Snapshot delta without a preceding keyframe')
+            apply_delta(epoch, encoded)
+        else:
+            epoch = _Epoch(decode_keyframe(encoded))
+        documents.append(unflatten(epoch.leaves) if epoch.leaves else {})
+    return documents
+
+
+SELECT_LAST_SNAPSHOT = "SELECT MAX(id) FROM portfolio_snapshots WHERE user_id IS ?"
+SELECT_LAST_KEYFRAME = ("SELECT MAX(id) FROM portfolio_snapshots WHERE user_id IS ? AND id <= ? "
+                        "AND (snapshot_data IS NULL OR snapshot_data NOT LIKE 'D:%')")
+SELECT_CHAIN = "SELECT snapshot_data FROM portfolio_snapshots WHERE user_id IS ? AND id BETWEEN ? AND ? ORDER BY id"
+INSERT_SNAPSHOT = ("INSERT INTO portfolio_snapshots (user_id, total_value, total_pnl, positions_count, "
+                   "snapshot_data) VALUES (?, ?, ?, ?, ?)")
+
+
+class SnapshotWriter:
+    """Writes portfolio snapshots as keyframes plus deltas"""
+
+    def __init__(self, db, keyframe_interval: int = 50):
+        self.db = db
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self._epochs: Dict[Any, _Epoch] = {}
+        self._lock = threading.Lock()
+
+    def encode(self, user_id: Any, snapshot_data: Any) -> str:
+        """snapshot_data string for the next snapshot of `user_id`"""
+        leaves = flatten(snapshot_data if snapshot_data is not None else {})
+        with self._lock:
+            epoch = self._epochs.get(user_id)
+            if epoch is not None and epoch.count < self.keyframe_interval - 1:
+                epoch.count += 1
+                return encode_delta(epoch, leaves)
+            self._epochs[user_id] = _Epoch(leaves)
+            return encode_keyframe(leaves)
+
+    def _stored_epoch(self, conn, user_id: Any) -> Optional[_Epoch]:
+        """Epoch ending at the user's latest stored row (caller holds the lock)
+
+        The cached epoch is reused only when this writer stored that row;
+        otherwise (another writer, a failed write) it is rebuilt from the
+        table, from the last keyframe on.
+        """
+        last_id = conn.execute(SELECT_LAST_SNAPSHOT, (user_id,)).fetchone()[0]
+        if last_id is None:
+            return None
+        epoch = self._epochs.get(user_id)
+        if epoch is not None and epoch.last_id == last_id:
+            return epoch
+        first_id = conn.execute(SELECT_LAST_KEYFRAME, (user_id, last_id)).fetchone()[0]
+        if first_id is None:
+            return None
+        chain = [row[0] for row in conn.execute(SELECT_CHAIN, (user_id, first_id, last_id))]
+        epoch = _Epoch(decode_keyframe(chain[0]))
+        for encoded in chain[1:]:
+            apply_delta(epoch, encoded)
+        epoch.count = len(chain) - 1
+        epoch.last_id = last_id
+        return epoch
+
+    def insert(self, conn, user_id: Any, total_value: float, total_pnl: float, positions_count: int,
+               snapshot_data: Any = None) -> int:
+        """Encode and insert one snapshot; runs inside the caller's write transaction"""
+        leaves = flatten(snapshot_data if snapshot_data is not None else {})
+        with self._lock:
+            epoch = self._stored_epoch(conn, user_id)
+            if epoch is not None and epoch.count < self.keyframe_interval - 1:
+                epoch.count += 1
+                encoded = encode_delta(epoch, leaves)
+            else:
+                epoch = _Epoch(leaves)
+                encoded = encode_keyframe(leaves)
+            self._epochs[user_id] = epoch
+            epoch.last_id = None
+            epoch.last_id = conn.execute(INSERT_SNAPSHOT, (user_id, total_value, total_pnl, positions_count,
+                                                           encoded)).lastrowid
+            return epoch.last_id
+
+    def write(self, user_id: Any, total_value: float, total_pnl: float, positions_count: int,
+              snapshot_data: Any = None, wait: bool = False) -> Optional[int]:
+        """Store one snapshot through the database's writer thread"""
+        return self.db.execute_write(
+            lambda conn: self.insert(conn, user_id, total_value, total_pnl, positions_count, snapshot_data),
+            wait=wait, on_error=lambda: self.reset(user_id)
+        )
+
+    def reset(self, user_id: Any = None):
+        """Force the next snapshot to be a keyframe"""
+        with self._lock:
+            if user_id is None:
+                self._epochs.clear()
+            else:
+                self._epochs.pop(user_id, None)
+
+
+class SnapshotReader:
+    """Rebuilds snapshots at any point in time from keyframes and deltas"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def _keyframe_id(self, user_id: Any, at_id: int) -> Optional[int]:
+        row = self.db.connection().execute(
+            "SELECT id FROM portfolio_snapshots WHERE user_id IS ? AND id <= ? "
+            "AND (snapshot_data IS NULL OR snapshot_data NOT LIKE 'D:%') ORDER BY id DESC LIMIT 1",
+            (user_id, at_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def snapshot_at(self, user_id: Any, timestamp: str) -> Optional[Dict[str, Any]]:
+        """Latest snapshot created at or before `timestamp`"""
+        conn = self.db.connection()
+        target = conn.execute(
+            "SELECT id FROM portfolio_snapshots WHERE user_id IS ? AND created_at <= ? "
+            "ORDER BY created_at DESC, id DESC LIMIT 1", (user_id, timestamp)
+        ).fetchone()
+        if target is None:
+            return None
+        start = self._keyframe_id(user_id, target[0])
+        if start is None:
+            raise ValueError(f'No keyframe found for snapshot {target[0]}')
+        rows = [dict(r) for r in conn.execute(
+            "SELECT * FROM portfolio_snapshots WHERE user_id IS ? AND id BETWEEN ? AND ? ORDER BY id",
+            (user_id, start, target[0])
+        )]
+        row = rows[-1]
+        row['snapshot_data'] = decode_series(r['snapshot_data'] for r in rows)[-1]
+        return row
+
+    def history(self, user_id: Any, start: str = None, end: str = None) -> List[Dict[str, Any]]:
+        """Decoded snapshots in [start, end)"""
+        conn = self.db.connection()
+        clauses, params = ['user_id IS ?'], [user_id]
+        if start is not None:
+            clauses.append('created_at >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('created_at < ?')
+            params.append(end)
+        rows = [dict(r) for r in conn.execute(
+            f"SELECT * FROM portfolio_snapshots WHERE {' AND '.join(clauses)} ORDER BY id", params)]
+        if not rows:
+            return []
+        first = self._keyframe_id(user_id, rows[0]['id'])
+        if first is not None and first < rows[0]['id']:
+            lead = [r[0] for r in conn.execute(
+                "SELECT snapshot_data FROM portfolio_snapshots WHERE user_id IS ? AND id >= ? AND id < ? ORDER BY id",
+                (user_id, first, rows[0]['id']))]
+        else:
+            lead = []
+        documents = decode_series(lead + [r['snapshot_data'] for r in rows])[len(lead):]
+        for row, document in zip(rows, documents):
+            row['snapshot_data'] = document
+        return rows
+
+    def equity_curve(self, user_id: Any, start: str = None, end: str = None) -> List[Tuple[str, float, float]]:
+        """(created_at, total_value, total_pnl) without decoding snapshot_data"""
+        clauses, params = ['user_id IS ?'], [user_id]
+        if start is not None:
+            clauses.append('created_at >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('created_at < ?')
+            params.append(end)
+        return [tuple(r) for r in self.db.connection().execute(
+            f"SELECT created_at, total_value, total_pnl FROM portfolio_snapshots "
+            f"WHERE {' AND '.join(clauses)} ORDER BY created_at, id", params)]
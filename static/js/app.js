@@ -2,6 +2,8 @@
 let socket;
 let charts = {};
 let updateInterval;
+let dashboardState = { balance: {}, positions: {} };
+let priceSymbol = null;
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
@@ -18,11 +20,39 @@ function initializeSocket() {
     socket.on('connect', function() {
         console.log('Connected to server');
         updateConnectionStatus(true);
+        // Server pushes changes from now on; stop the fallback polling
+        socket.emit('subscribe_dashboard', { channels: ['account', 'positions', 'strategies'] });
+        stopAutoUpdate();
+        const chartSymbol = document.getElementById('chart-symbol');
+        if (chartSymbol) {
+            priceSymbol = null;
+            subscribePrice(chartSymbol.value);
+        }
     });
     
     socket.on('disconnect', function() {
         console.log('Disconnected from server');
         updateConnectionStatus(false);
+        startAutoUpdate();
+    });
+    
+    socket.on('account_delta', function(delta) {
+        dashboardState.balance = delta.full ? delta.data : Object.assign({}, dashboardState.balance, delta.data);
+        updateBalanceDisplay(dashboardState.balance);
+    });
+    
+    socket.on('position_delta', function(delta) {
+        if (delta.full) {
+            dashboardState.positions = {};
+        }
+        (delta.removed || []).forEach(symbol => delete dashboardState.positions[symbol]);
+        (delta.upserted || []).forEach(position => dashboardState.positions[position.symbol] = position);
+        updatePositionsTable(Object.values(dashboardState.positions));
+    });
+    
+    socket.on('strategy_status', function(data) {
+        updateAutoTradingStatus(data.auto_trading);
+        updateActiveStrategiesDisplay(data.strategy);
     });
     
     socket.on('price_update', function(data) {
@@ -69,6 +99,7 @@ function initializeEventListeners() {
     
     // Chart symbol change
     document.getElementById('chart-symbol').addEventListener('change', function() {
+        subscribePrice(this.value);
         loadChartData(this.value);
     });
     
@@ -113,8 +144,11 @@ function loadInitialData() {
     loadChartData(symbol);
 }
 
-// Start auto update
+// Start fallback polling (only used while the socket is disconnected)
 function startAutoUpdate() {
+    if (updateInterval || (socket && socket.connected)) {
+        return;
+    }
     updateInterval = setInterval(function() {
         loadBalance();
         loadPositions();
@@ -123,6 +157,14 @@ function startAutoUpdate() {
     }, 10000); // Update every 10 seconds
 }
 
+// Stop fallback polling
+function stopAutoUpdate() {
+    if (updateInterval) {
+        clearInterval(updateInterval);
+        updateInterval = null;
+    }
+}
+
 // Update connection status
 function updateConnectionStatus(connected) {
     const statusElement = document.getElementById('connection-status');
@@ -1155,6 +1197,18 @@ function closePosition(symbol) {
     }
 }
 
+// Switch the streamed price subscription to a new symbol
+function subscribePrice(symbol) {
+    if (!socket || !symbol || symbol === priceSymbol) {
+        return;
+    }
+    if (priceSymbol) {
+        socket.emit('unsubscribe_price', { symbol: priceSymbol });
+    }
+    priceSymbol = symbol;
+    socket.emit('subscribe_price', { symbol: symbol });
+}
+
 // Update price display
 function updatePriceDisplay(data) {
     // This would update real-time price displays
@@ -0,0 +1,18 @@
+"""
+Symbol formatting helpers shared by the GUI modules
+"""
+
+QUOTE_CURRENCIES = ('USDT', 'USDC', 'BUSD')
+
+
+def format_symbol(symbol: str) -> str:
+    """Convert symbol format for Pionex API (BTCUSDT -> BTC_USDT)"""
+    if not symbol:
+        return symbol
+    symbol = symbol.upper()
+    if '_' in symbol:
+        return symbol
+    for quote in QUOTE_CURRENCIES:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)] + '_' + quote
+    return symbol
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test account snapshot cache (no exchange access required)
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from account_cache import AccountSnapshotCache
+
+
+class FakeAPI:
+    """Counts exchange round-trips"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.balance_calls = 0
+        self.positions_calls = 0
+
+    def get_account_balance(self):
+        self.balance_calls += 1
+        time.sleep(self.delay)
+        return {'total': 100.0, 'available': 80.0, 'frozen': 20.0}
+
+    def get_positions(self):
+        self.positions_calls += 1
+        time.sleep(self.delay)
+        return {'data': {'balances': [{'currency': 'BTC', 'total': '0.5'}]}}
+
+
+def test_ttl_hit():
+    """Repeated reads inside the TTL hit the exchange once"""
+    api = FakeAPI()
+    cache = AccountSnapshotCache(api, ttl=60)
+    for _ in range(10):
+        assert cache.get_balance()['total'] == 100.0
+    assert api.balance_calls == 1
+
+
+def test_single_flight():
+    """Concurrent misses are coalesced into one call"""
+    api = FakeAPI(delay=0.1)
+    cache = AccountSnapshotCache(api, ttl=60)
+    threads = [threading.Thread(target=cache.get_positions) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert api.positions_calls == 1
+    assert cache.stats['coalesced'] == 5
+
+
+def test_invalidate():
+    """Invalidation forces a fresh read"""
+    api = FakeAPI()
+    cache = AccountSnapshotCache(api, ttl=60)
+    cache.get_balance()
+    cache.invalidate()
+    cache.get_balance()
+    assert api.balance_calls == 2
+
+
+def test_errors_not_cached():
+    """Error responses are returned but never cached"""
+    api = FakeAPI()
+    api.get_account_balance = lambda: {'error': 'rate limited'}
+    cache = AccountSnapshotCache(api, ttl=60)
+    assert 'error' in cache.get_balance()
+    assert 'balance' not in cache._entries
+
+
+if __name__ == "__main__":
+    for test in (test_ttl_hit, test_single_flight, test_invalidate, test_errors_not_cached):
+        test()
+        print(f"✅ {test.__name__}")
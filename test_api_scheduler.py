@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test rate-limit-aware API scheduler (no exchange access required)
+"""
+
+import os
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_scheduler import RequestScheduler, ScheduledAPI, configure_session, is_rate_limited, weight_class
+
+
+class FakeAPI:
+    def __init__(self):
+        self.calls = []
+
+    def get_klines(self, symbol, interval, limit):
+        self.calls.append('get_klines')
+        return {'data': {'klines': []}}
+
+    def place_market_order(self, symbol, side, quantity):
+        self.calls.append('place_market_order')
+        return {'data': {'orderId': 1}}
+
+    def get_account_balance(self):
+        self.calls.append('get_account_balance')
+        return {'error': 'HTTP 429: Too Many Requests'}
+
+
+def test_weight_classes():
+    """Methods map to order, account and market classes"""
+    assert weight_class('place_limit_order') == 'order'
+    assert weight_class('get_positions') == 'account'
+    assert weight_class('get_ticker_price') == 'market'
+
+
+def test_orders_jump_market_queue():
+    """With the shared bucket empty, a waiting order is admitted before queued market reads"""
+    scheduler = RequestScheduler(global_rate=20, global_burst=1)
+    scheduler.acquire('market')
+    admitted = []
+
+    def worker(cls):
+        scheduler.acquire(cls)
+        admitted.append(cls)
+
+    threads = [threading.Thread(target=worker, args=('market',)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.01)
+    order = threading.Thread(target=worker, args=('order',))
+    order.start()
+    for t in threads + [order]:
+        t.join()
+    assert admitted.index('order') <= 1
+
+
+def test_429_pauses_class_without_retry():
+    """A rate-limited response is returned once and the class cools down"""
+    api = FakeAPI()
+    scheduled = ScheduledAPI(api, RequestScheduler(cooldown=0.2))
+    assert is_rate_limited(scheduled.get_account_balance())
+    assert api.calls == ['get_account_balance']
+    assert scheduled.scheduler.stats['account']['throttled'] == 1
+
+    started = time.monotonic()
+    scheduled.place_market_order('BTC_USDT', 'BUY', 1)
+    assert time.monotonic() - started < 0.1
+
+    started = time.monotonic()
+    scheduled.get_account_balance()
+    assert time.monotonic() - started >= 0.15
+
+
+CLIENT_SOURCE = """
+import requests
+
+
+class Client:
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def _make_request(self, path):
+        return requests.get(self.base_url + path).json()
+
+    def unpooled(self, path):
+        return requests.get(self.base_url + path).json()
+"""
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"result": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_requests_go_through_pooled_session():
+    """_make_request calls made with module-level requests use the pooled session"""
+    module = types.ModuleType('fake_pionex_client')
+    exec(CLIENT_SOURCE, module.__dict__)
+    sys.modules[module.__name__] = module
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        api = module.Client(f'http://127.0.0.1:{server.server_port}')
+        session = configure_session(api, pool_size=4)
+        seen = []
+        session.hooks['response'].append(lambda response, *args, **kwargs: seen.append(response.url))
+
+        assert api._make_request('/a') == {'result': True}
+        assert api._make_request('/b') == {'result': True}
+        assert [url.rsplit('/', 1)[1] for url in seen] == ['a', 'b']
+        assert session.get_adapter(api.base_url).max_retries.total == 0
+        # Outside _make_request the module keeps using plain requests
+        assert api.unpooled('/c') == {'result': True} and len(seen) == 2
+
+        # A client that already has a session keeps it, with the pooled adapter mounted
+        owned = types.SimpleNamespace(session=requests.Session())
+        assert configure_session(owned, pool_size=4) is owned.session
+        assert owned.session.get_adapter('https://api.pionex.com')._pool_maxsize == 4
+    finally:
+        server.shutdown()
+        sys.modules.pop(module.__name__, None)
+
+
+if __name__ == "__main__":
+    for test in (test_weight_classes, test_orders_jump_market_queue, test_429_pauses_class_without_retry,
+                 test_requests_go_through_pooled_session):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test async Pionex client against a local aiohttp server (no exchange access required)
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from async_pionex_api import AsyncPionexAPI, order_body
+
+SECRET = 'test-secret'
+
+
+def build_app(state):
+    async def balances(request):
+        state['requests'].append(request)
+        return web.json_response({'result': True, 'data': {'balances': [
+            {'coin': 'USDT', 'free': '100.5', 'frozen': '4.5'},
+            {'coin': 'BTC', 'free': '0.1', 'frozen': '0'}
+        ]}})
+
+    async def tickers(request):
+        await asyncio.sleep(0.1)
+        return web.json_response({'result': True, 'data': {'tickers': [
+            {'symbol': request.query['symbol'], 'close': '42000.5'}
+        ]}})
+
+    async def order(request):
+        state['bodies'].append(await request.text())
+        state['requests'].append(request)
+        if 'DOWN_USDT' in state['bodies'][-1]:
+            return web.Response(status=503)
+        return web.json_response({'result': False, 'code': 'TRADE_INVALID_SYMBOL', 'message': 'invalid symbol'})
+
+    async def klines(request):
+        state['kline_calls'] += 1
+        if request.query['symbol'] == 'LIMIT_USDT':
+            return web.Response(status=429, headers={'Retry-After': '2'})
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_get('/api/v1/account/balances', balances)
+    app.router.add_get('/api/v1/market/tickers', tickers)
+    app.router.add_post('/api/v1/trade/order', order)
+    app.router.add_get('/api/v1/market/klines', klines)
+    return app
+
+
+async def with_client(scenario):
+    state = {'requests': [], 'bodies': [], 'kline_calls': 0}
+    server = TestServer(build_app(state))
+    await server.start_server()
+    config = {'api': {'retry_attempts': 2, 'retry_backoff': 0.01}}
+    try:
+        async with AsyncPionexAPI('key', SECRET, base_url=str(server.make_url('')), config=config) as api:
+            await scenario(api, state)
+    finally:
+        await server.close()
+
+
+def expected_signature(method, path_qs, body=''):
+    return hmac.new(SECRET.encode(), f"{method}{path_qs}{body}".encode(), hashlib.sha256).hexdigest()
+
+
+def test_signed_balance_request():
+    """Signed requests carry the key and an HMAC over method, sorted query and body"""
+    async def scenario(api, state):
+        balance = await api.get_account_balance()
+        assert balance == {'total': 105.0, 'available': 100.5, 'frozen': 4.5}
+        request = state['requests'][0]
+        assert request.headers['PIONEX-KEY'] == 'key'
+        assert 'timestamp' in request.query
+        assert request.headers['PIONEX-SIGNATURE'] == expected_signature('GET', request.path_qs)
+
+        positions = await api.get_positions()
+        assert [b['currency'] for b in positions['data']['balances']] == ['USDT', 'BTC']
+
+    asyncio.run(with_client(scenario))
+
+
+def test_api_error_shape():
+    """result=false becomes {'error', 'code'} and POST bodies are signed"""
+    async def scenario(api, state):
+        response = await api.place_market_order('NOPE_USDT', 'BUY', 10)
+        assert response == {'error': 'invalid symbol', 'code': 'TRADE_INVALID_SYMBOL'}
+        request = state['requests'][0]
+        assert request.headers['PIONEX-SIGNATURE'] == expected_signature('POST', request.path_qs, state['bodies'][0])
+        assert '"size":"10"' in state['bodies'][0] and 'amount' not in state['bodies'][0]
+
+    asyncio.run(with_client(scenario))
+
+
+def test_order_bodies_match_sync_client():
+    """Both clients send the same body: a base-asset size for BUY and SELL market orders"""
+    sent_async = []
+
+    async def scenario(api, state):
+        for side in ('BUY', 'SELL'):
+            await api.place_market_order('NOPE_USDT', side, 0.25)
+        await api.place_limit_order('NOPE_USDT', 'BUY', 0.25, 100)
+        sent_async.extend(json.loads(body) for body in state['bodies'])
+
+    asyncio.run(with_client(scenario))
+    expected = [order_body('NOPE_USDT', side, 'MARKET', 0.25) for side in ('BUY', 'SELL')]
+    expected.append(order_body('NOPE_USDT', 'BUY', 'LIMIT', 0.25, 100))
+    assert sent_async == expected
+    assert all(body['size'] == '0.25' and 'amount' not in body for body in sent_async)
+
+    # Compare with the sync client's request when it is installed
+    try:
+        from pionex_api import PionexAPI
+    except ImportError:
+        return
+    sent = []
+    original = PionexAPI._make_request
+    PionexAPI._make_request = lambda self, *args, **kwargs: sent.append((args, kwargs)) or {'data': {}}
+    try:
+        sync = PionexAPI()
+        for side in ('BUY', 'SELL'):
+            sync.place_market_order('NOPE_USDT', side, 0.25)
+        sync.place_limit_order('NOPE_USDT', 'BUY', 0.25, 100)
+    finally:
+        PionexAPI._make_request = original
+    bodies = [next(v for v in (*args, *kwargs.values()) if isinstance(v, dict) and 'side' in v)
+              for args, kwargs in sent]
+    assert [{k: str(v) for k, v in body.items()} for body in bodies] == expected
+
+
+def test_rate_limit_and_server_errors():
+    """429 is returned without retrying; 5xx is retried then reported"""
+    async def scenario(api, state):
+        limited = await api.get_klines('LIMIT_USDT')
+        assert limited['code'] == 'RATE_LIMIT' and limited['retry_after'] == 2.0
+        assert state['kline_calls'] == 1
+
+        failed = await api.get_klines('DOWN_USDT')
+        assert failed['status_code'] == 503
+        assert state['kline_calls'] == 3
+
+    asyncio.run(with_client(scenario))
+
+
+def test_orders_are_not_resent():
+    """A failed order POST is reported as possibly applied instead of being sent twice"""
+    async def scenario(api, state):
+        failed = await api.place_market_order('DOWN_USDT', 'BUY', 10)
+        assert failed['status_code'] == 503 and failed['outcome_unknown']
+        assert len(state['bodies']) == 1
+
+    asyncio.run(with_client(scenario))
+
+
+def test_orders_do_not_wait_for_market_data_throttle():
+    """An exhausted market bucket delays market calls only, not orders"""
+    async def scenario(api, state):
+        market = api._buckets['market']
+        market.tokens, market.rate = 0.0, 2.0
+        slow = asyncio.ensure_future(api.gather(*(api.get_real_time_price(f'C{i}_USDT') for i in range(3))))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await api.place_market_order('NOPE_USDT', 'BUY', 10)
+        assert time.monotonic() - started < 0.3
+        assert not slow.done()
+        await slow
+
+    asyncio.run(with_client(scenario))
+
+
+def test_requests_run_concurrently():
+    """Ten 100ms ticker calls overlap on one event loop"""
+    async def scenario(api, state):
+        started = time.monotonic()
+        prices = await api.gather(*(api.get_real_time_price(f'C{i}_USDT') for i in range(10)))
+        assert prices == [42000.5] * 10
+        assert time.monotonic() - started < 0.5
+
+    asyncio.run(with_client(scenario))
+
+
+if __name__ == "__main__":
+    for test in (test_signed_balance_request, test_api_error_shape, test_order_bodies_match_sync_client,
+                 test_rate_limit_and_server_errors,
+                 test_orders_are_not_resent, test_orders_do_not_wait_for_market_data_throttle,
+                 test_requests_run_concurrently):
+        test()
+        print(f"✅ {test.__name__}")
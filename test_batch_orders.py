@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test batch order submission (no exchange access required)
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from async_pionex_api import AsyncPionexAPI
+from batch_orders import BatchOrderSubmitter, chunk_orders, mass_order_results
+from fetch_pipeline import FetchPipeline
+
+
+class FakeAPI:
+    def __init__(self, fail_prices=(), delay=0.0):
+        self.fail_prices = set(fail_prices)
+        self.delay = delay
+        self.placed = []
+        self.cancelled = []
+        self._lock = threading.Lock()
+
+    def place_limit_order(self, symbol, side, quantity, price):
+        time.sleep(self.delay)
+        if price in self.fail_prices:
+            return {'error': 'insufficient balance'}
+        with self._lock:
+            self.placed.append(price)
+            return {'data': {'orderId': len(self.placed)}}
+
+    def cancel_order(self, symbol, order_id):
+        self.cancelled.append(order_id)
+        return {'data': {}}
+
+
+class MassOrderAPI(FakeAPI):
+    def __init__(self):
+        super().__init__()
+        self.mass_calls = []
+
+    def place_mass_order(self, symbol, orders):
+        self.mass_calls.append((symbol, len(orders)))
+        return {'data': {'orderIds': [{'orderId': f'{symbol}-{i}'} for i in range(len(orders))]}}
+
+
+def grid(n, symbol='BTC_USDT'):
+    return [{'symbol': symbol, 'side': 'BUY', 'quantity': 0.01, 'price': 100.0 + i} for i in range(n)]
+
+
+def test_chunking_groups_by_symbol():
+    """Chunks never mix symbols or exceed the chunk size"""
+    orders = grid(45) + grid(5, 'ETHUSDT')
+    chunks = chunk_orders(orders, 20)
+    assert [len(c) for c in chunks] == [20, 20, 5, 5]
+    assert all(orders[i]['symbol'] == 'ETHUSDT' for i in chunks[-1])
+
+
+def test_mass_order_endpoint_used_when_available():
+    """Clients with place_mass_order get one call per chunk"""
+    api = MassOrderAPI()
+    result = BatchOrderSubmitter(api, chunk_size=20).submit(grid(45))
+    assert result['success'] and result['placed'] == 45
+    assert api.mass_calls == [('BTC_USDT', 20), ('BTC_USDT', 20), ('BTC_USDT', 5)]
+    assert [r['index'] for r in result['results']] == list(range(45))
+    assert api.placed == []
+
+
+def test_chunks_run_concurrently():
+    """100 levels at 20ms each finish well under the serial time"""
+    api = FakeAPI(delay=0.02)
+    pipeline = FetchPipeline(5)
+    started = time.monotonic()
+    result = BatchOrderSubmitter(api, pipeline, chunk_size=20).submit(grid(100))
+    elapsed = time.monotonic() - started
+    pipeline.shutdown()
+    assert result['placed'] == 100
+    assert elapsed < 1.0
+
+
+def test_partial_failure_rollback():
+    """A failed level is reported and rollback cancels the placed ones"""
+    api = FakeAPI(fail_prices={102.0})
+    result = BatchOrderSubmitter(api).submit(grid(5), rollback=True)
+    assert not result['success']
+    assert result['failed'] == 1 and result['placed'] == 0
+    assert result['results'][2]['error'] == 'insufficient balance'
+    assert result['rolled_back'] == 4 and result['uncancelled'] == 0
+    assert sorted(api.cancelled) == [1, 2, 3, 4]
+
+    api = FakeAPI(fail_prices={102.0})
+    result = BatchOrderSubmitter(api).submit(grid(5))
+    assert result['rolled_back'] == 0 and api.cancelled == []
+    assert result['placed'] == 4
+
+
+class PartialMassOrderAPI(MassOrderAPI):
+    def place_mass_order(self, symbol, orders):
+        return {'data': {'orderIds': [{'orderId': 'a'}, {'code': 'TRADE_PRICE_FILTER', 'message': 'bad price'},
+                                      {}, 'd']}}
+
+
+def test_mass_order_per_order_results():
+    """Per-order errors in a mass-order response are failures; id-less orders cannot be rolled back"""
+    assert [r['success'] for r in mass_order_results({'data': {'orderIds': ['x']}}, 2)] == [True, False]
+
+    api = PartialMassOrderAPI()
+    result = BatchOrderSubmitter(api).submit(grid(5), rollback=True)
+    outcomes = result['results']
+    assert [r['success'] for r in outcomes] == [True, False, True, True, False]
+    assert outcomes[1]['error'] == 'bad price'
+    assert outcomes[4]['error'] == 'No result for order in mass-order response'
+    assert sorted(api.cancelled) == ['a', 'd']
+    assert outcomes[2]['cancelled'] is False and outcomes[2]['cancel_error'] == 'No order id to cancel'
+    assert result['rolled_back'] == 2 and result['uncancelled'] == 1 and result['placed'] == 1
+
+
+def test_async_client_orders_are_awaited():
+    """AsyncPionexAPI coroutines are awaited: mass orders, single orders and rollback cancels all reach the server"""
+    calls = []
+
+    async def mass_order(request):
+        body = json.loads(await request.text())
+        calls.append(('mass', len(body['orders'])))
+        return web.json_response({'result': True, 'data': {'orderIds': [
+            {'orderId': 100 + i} for i in range(len(body['orders']))
+        ]}})
+
+    async def order(request):
+        calls.append(('order', json.loads(await request.text())['symbol']))
+        return web.json_response({'result': False, 'code': 'TRADE_NOT_ENOUGH_MONEY', 'message': 'not enough money'})
+
+    async def cancel(request):
+        calls.append(('cancel', json.loads(await request.text())['orderId']))
+        return web.json_response({'result': True, 'data': {}})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post('/api/v1/trade/massOrder', mass_order)
+        app.router.add_post('/api/v1/trade/order', order)
+        app.router.add_delete('/api/v1/trade/order', cancel)
+        server = TestServer(app)
+        await server.start_server()
+        api = AsyncPionexAPI('key', 'secret', base_url=str(server.make_url('')), config={'api': {}})
+        submitter = BatchOrderSubmitter(api)
+        try:
+            # The submitter blocks its caller, so keep it off this (the server's) loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None, lambda: submitter.submit(grid(3) + grid(1, 'ETH_USDT'), rollback=True))
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, submitter.close)
+            await server.close()
+
+    result = asyncio.run(scenario())
+    assert [r['success'] for r in result['results']] == [True, True, True, False]
+    assert [r['order_id'] for r in result['results'][:3]] == [100, 101, 102]
+    assert result['results'][3]['error'] == 'not enough money'
+    assert result['rolled_back'] == 3 and result['placed'] == 0
+    assert sorted(calls, key=str) == sorted(
+        [('mass', 3), ('order', 'ETH_USDT'), ('cancel', 100), ('cancel', 101), ('cancel', 102)], key=str)
+
+
+if __name__ == "__main__":
+    for test in (test_chunking_groups_by_symbol, test_mass_order_endpoint_used_when_available,
+                 test_chunks_run_concurrently, test_partial_failure_rollback, test_mass_order_per_order_results,
+                 test_async_client_orders_are_awaited):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test candle_closed event bus and event-driven scheduling
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_events import CandleEventBus, strategy_intervals
+from candle_store import CandleStore
+from test_candle_store import FakeAPI
+from trader_scheduler import TraderScheduler
+
+STEP = 5 * 60_000
+MULTI_TF = {'rsi': {'multi_tf': {'enabled': True, 'timeframes': ['5m', '1h']}}}
+
+
+class RecordingTrader:
+    def __init__(self, user_id):
+        self.bars = []
+
+    def on_candle(self, symbol, times, values):
+        self.bars.append(int(times[-1]))
+
+
+def seeded_store():
+    store = CandleStore(FakeAPI(), capacity=500, seed_limit=100, min_refresh=60)
+    times, _ = store.get('BTC_USDT', '5M', 100)
+    return store, int(times[-1])
+
+
+def test_strategy_intervals():
+    """Multi-timeframe strategies trigger on every configured interval, primary first"""
+    assert strategy_intervals(MULTI_TF, 'RSI_STRATEGY') == ['5M', '60M']
+    assert strategy_intervals(MULTI_TF, 'ADVANCED_STRATEGY', '1m') == ['1M', '5M', '60M']
+    assert strategy_intervals(MULTI_TF, 'DCA_STRATEGY') == ['5M']
+    assert strategy_intervals({}, 'RSI_STRATEGY') == ['5M']
+
+
+def test_trade_opening_next_bar_emits_once():
+    """The first trade of a new bar closes the previous one; each close is delivered once"""
+    store, open_bar = seeded_store()
+    bus = CandleEventBus(store)
+    store.close_listeners.append(bus.emit)
+    events = []
+    bus.subscribe('BTCUSDT', '5m', lambda *event: events.append(event))
+
+    store.apply_trade('BTC_USDT', 100.0, 1.0, open_bar + 10)
+    assert events == []
+    store.apply_trade('BTC_USDT', 101.0, 1.0, open_bar + STEP + 5)
+    assert events == [('BTC_USDT', '5M', open_bar)]
+    store.apply_trade('BTC_USDT', 102.0, 1.0, open_bar + STEP + 6)
+    assert not bus.emit('BTC_USDT', '5M', open_bar)
+    assert len(events) == 1
+
+
+def test_boundary_timer_covers_quiet_markets():
+    """With no trade after the boundary, check() confirms the close from the store"""
+    store, open_bar = seeded_store()
+    bus = CandleEventBus(store, grace=0.5)
+    events = []
+    bus.subscribe('BTC_USDT', '5M', lambda *event: events.append(event))
+    assert bus.check(now=(open_bar + STEP + 500) / 1000) == 1
+    assert events == [('BTC_USDT', '5M', open_bar)]
+    assert bus.check(now=(open_bar + STEP + 900) / 1000) == 0
+    assert abs(bus.next_boundary(now=(open_bar + STEP) / 1000) - (STEP / 1000 + 0.5)) < 1e-9
+
+
+def test_scheduler_evaluates_only_on_close():
+    """Users are evaluated once per closed bar, within milliseconds, and never between candles"""
+    store, open_bar = seeded_store()
+    bus = CandleEventBus(store)
+    store.close_listeners.append(bus.emit)
+    scheduler = TraderScheduler(store, RecordingTrader, bus=bus, lookback=50)
+    for uid in range(100):
+        scheduler.start_user(uid, 'BTC_USDT', '5M')
+    assert bus.subscriptions() == [('BTC_USDT', '5M')]
+
+    for i in range(50):
+        store.apply_trade('BTC_USDT', 100.0 + i, 1.0, open_bar + i * 1000)
+    fetches = scheduler.fetches
+    assert fetches == 0 and scheduler.stats()['event_driven']
+
+    started = time.perf_counter()
+    store.apply_trade('BTC_USDT', 99.0, 1.0, open_bar + STEP)
+    latency = time.perf_counter() - started
+    trader = scheduler.get_trader(0)
+    assert trader.bars == [open_bar]
+    assert all(scheduler.get_trader(uid).bars == [open_bar] for uid in range(100))
+    assert scheduler.fetches == 1
+    assert latency < 0.5
+
+    # Only the traded interval triggers; other closes and repeats of the same bar do nothing
+    assert scheduler.on_candle_closed('BTC_USDT', '60M', open_bar + STEP - 3_600_000) == 0
+    assert scheduler.on_candle_closed('BTC_USDT', '5M', open_bar) == 0
+
+    for uid in range(100):
+        scheduler.stop_user(uid)
+    assert bus.subscriptions() == []
+
+
+if __name__ == '__main__':
+    for test in (test_strategy_intervals, test_trade_opening_next_bar_emits_once,
+                 test_boundary_timer_covers_quiet_markets, test_scheduler_evaluates_only_on_close):
+        test()
+        print(f'✅ {test.__name__}')
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test vectorized candlestick pattern detection
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_patterns import BITS, PatternTracker, decode_bits, detect_patterns
+from market_scanner import signal_series
+from test_vector_backtest import BASE_CONFIG, make_candles
+
+# (open, high, low, close) sequences whose last bar completes the pattern
+CASES = {
+    'engulfing': ([(10, 10.2, 8.9, 9), (8.8, 10.6, 8.7, 10.5)], 1),
+    'pin_bar': ([(10, 10.1, 7, 10.05)], 1),
+    'marubozu': ([(10, 10, 8, 8.05)], -1),
+    'three_soldiers': ([(10, 11.1, 9.9, 11), (10.5, 12.1, 10.4, 12), (11.5, 13.1, 11.4, 13)], 1),
+    'three_crows': ([(13, 13.1, 11.9, 12), (12.5, 12.6, 10.9, 11), (11.5, 11.6, 9.9, 10)], -1),
+    'morning_star': ([(12, 12.1, 9.9, 10), (9.8, 10, 9.5, 9.85), (10, 11.6, 9.9, 11.5)], 1),
+    'evening_star': ([(10, 12.1, 9.9, 12), (12.2, 12.5, 12, 12.25), (12, 12.1, 10.4, 10.5)], -1),
+}
+
+
+def columns(bars):
+    return tuple(np.array(col, dtype=np.float64) for col in zip(*bars))
+
+
+def test_each_pattern_detected():
+    """Each pattern sets its bit on the completing bar, with the expected direction"""
+    for name, (bars, sign) in CASES.items():
+        result = detect_patterns(*columns(bars))
+        assert result['bits'][-1] & BITS[name], name
+        assert np.sign(result['strength'][-1]) == sign, name
+        assert PatternTracker().update(*bars[0])['bits'] & BITS[name] == (BITS[name] if len(bars) == 1 else 0)
+    doji = detect_patterns(*columns([(10, 11, 9, 10.05)]))
+    assert decode_bits(doji['bits'][0]) == ['doji'] and doji['strength'][0] == 0.0
+
+
+def test_config_filters_and_threshold():
+    """Only configured patterns count; direction needs strength_threshold"""
+    bars = CASES['marubozu'][0]
+    config = {'candlestick_analysis': {'patterns': ['doji'], 'strength_threshold': 1.0}}
+    assert detect_patterns(*columns(bars), config)['bits'][-1] == 0
+    config = {'candlestick_analysis': {'strength_threshold': 1.0}}
+    assert detect_patterns(*columns(bars), config)['direction'][-1] == 0
+    config = {'candlestick_analysis': {'strength_threshold': 0.5}}
+    assert detect_patterns(*columns(bars), config)['direction'][-1] == -1
+    try:
+        detect_patterns(*columns(bars), patterns=['hammer'])
+        assert False, 'unknown pattern should raise'
+    except ValueError:
+        pass
+
+
+def test_incremental_matches_vectorized():
+    """PatternTracker reproduces the array results bar by bar; 2-D input matches 1-D rows"""
+    candles = make_candles(5000)
+    ohlc = [candles[k] for k in ('open', 'high', 'low', 'close')]
+    result = detect_patterns(*ohlc)
+    tracker = PatternTracker()
+    for i in range(5000):
+        live = tracker.update(*(col[i] for col in ohlc))
+        assert live['bits'] == result['bits'][i] and live['strength'] == result['strength'][i], i
+    assert np.count_nonzero(result['direction']) > 0
+
+    stacked = detect_patterns(*(col.reshape(50, 100) for col in ohlc))
+    for row in (0, 17, 49):
+        single = detect_patterns(*(col[row * 100:(row + 1) * 100] for col in ohlc))
+        assert np.array_equal(stacked['bits'][row], single['bits'])
+
+
+def test_advanced_strategy_votes_with_patterns():
+    """ADVANCED_STRATEGY exposes pattern output when candlestick analysis is enabled"""
+    candles = make_candles(500)
+    plain = signal_series(candles, BASE_CONFIG, ['ADVANCED_STRATEGY'])['ADVANCED_STRATEGY']
+    config = {**BASE_CONFIG, 'candlestick_analysis': {'enabled': True, 'strength_threshold': 1.0}}
+    voted = signal_series(candles, config, ['ADVANCED_STRATEGY'])['ADVANCED_STRATEGY']
+    assert 'pattern_bits' not in plain and 'pattern_bits' in voted
+    patterns = detect_patterns(*(candles[k] for k in ('open', 'high', 'low', 'close')), config)
+    assert np.array_equal(voted['score'], plain['score'] + patterns['direction'])
+
+
+if __name__ == '__main__':
+    for test in (test_each_pattern_detected, test_config_filters_and_threshold,
+                 test_incremental_matches_vectorized, test_advanced_strategy_votes_with_patterns):
+        test()
+        print(f'✅ {test.__name__}')
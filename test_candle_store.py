@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test in-memory kline store (no exchange access required)
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CandleRing, CandleStore, interval_ms, normalize_interval, resample
+
+
+class FakeAPI:
+    """Serves synthetic 5M klines in Pionex dict format"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_klines(self, symbol, interval, limit):
+        self.calls.append((symbol, interval, limit))
+        step = 5 * 60_000
+        end = int(time.time() * 1000) // step * step
+        klines = [{'time': end - i * step, 'open': str(i), 'high': str(i + 1),
+                   'low': str(i - 1), 'close': str(i + 0.5), 'volume': '10'}
+                  for i in range(limit)]
+        return {'data': {'klines': klines}}
+
+
+class MinuteExchange:
+    """Klines at any interval, all aggregated from one deterministic 1M series"""
+
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def minutes(start, end):
+        times = np.arange(start, end + 1, 60_000, dtype=np.int64)
+        price = 100 + np.sin(times / 3.6e6) * 5 + (times // 60_000 % 7) * 0.1
+        close = price + 0.05
+        values = np.column_stack([price, np.maximum(price, close) + 0.1, np.minimum(price, close) - 0.1,
+                                  close, np.ones(len(times))])
+        return times, values
+
+    def get_klines(self, symbol, interval, limit):
+        self.calls.append(interval)
+        step = interval_ms(interval)
+        now = int(time.time() * 1000)
+        last_minute = now - now % 60_000
+        first = now - now % step - (limit - 1) * step
+        times, values = resample(*self.minutes(first, last_minute), step)
+        return {'data': {'klines': [{'time': int(t), **dict(zip(('open', 'high', 'low', 'close', 'volume'), row))}
+                                    for t, row in zip(times, values.tolist())]}}
+
+
+def test_resample_aggregates_buckets():
+    """OHLCV buckets take first open, max high, min low, last close, summed volume"""
+    times = np.arange(0, 10) * 60_000
+    values = np.column_stack([np.arange(10.0), np.arange(10.0) + 1, np.arange(10.0) - 1,
+                              np.arange(10.0) + 0.5, np.ones(10)])
+    buckets, bars = resample(times, values, 5 * 60_000)
+    assert buckets.tolist() == [0, 300_000]
+    assert bars.tolist() == [[0.0, 5.0, -1.0, 4.5, 5.0], [5.0, 10.0, 4.0, 9.5, 5.0]]
+
+
+def test_derived_intervals_refresh_from_base():
+    """With a 1M base, refreshes hit the exchange once per symbol instead of once per interval"""
+    intervals = ('1M', '5M', '15M', '1H')
+
+    def refresh_calls(base_interval):
+        api = MinuteExchange()
+        store = CandleStore(api, capacity=1000, seed_limit=500, min_refresh=0.05, base_interval=base_interval)
+        for interval in intervals:
+            store.get('BTC_USDT', interval, 5)
+        seeds = len(api.calls)
+        for _ in range(10):
+            time.sleep(0.06)
+            for interval in intervals:
+                store.get('BTC_USDT', interval, 5)
+        return store, len(api.calls) - seeds
+
+    plain_store, plain = refresh_calls(None)
+    store, derived = refresh_calls('1M')
+    assert plain == 40 and derived == 10
+
+    base_times, base_values = store.get('BTC_USDT', '1M', 500)
+    for interval in ('5M', '15M', '1H'):
+        step = interval_ms(interval)
+        times, values = store.get('BTC_USDT', interval, 5)
+        expected_times, expected = resample(base_times, base_values, step)
+        covered = expected_times >= base_times[0]
+        assert np.array_equal(times[-2:], expected_times[covered][-2:]), interval
+        assert np.allclose(values[-2:], expected[covered][-2:]), interval
+
+
+def test_ring_wraps_in_order():
+    """The ring keeps the newest candles in chronological order"""
+    ring = CandleRing(capacity=5)
+    for t in range(8):
+        ring.upsert(t, (t, t, t, t, t))
+    times, values = ring.last()
+    assert times.tolist() == [3, 4, 5, 6, 7]
+    assert values[:, 3].tolist() == [3, 4, 5, 6, 7]
+    assert ring.last(2)[0].tolist() == [6, 7]
+
+
+def test_ring_updates_open_bar():
+    """Trades update the open bar and start a new one on rollover"""
+    ring = CandleRing(capacity=5)
+    ring.apply_trade(0, 10.0, 1.0)
+    ring.apply_trade(0, 12.0, 1.0)
+    ring.apply_trade(0, 9.0, 1.0)
+    assert ring.apply_trade(60, 11.0, 2.0) is True
+    _, values = ring.last()
+    assert values[0].tolist() == [10.0, 12.0, 9.0, 9.0, 3.0]
+    assert values[1].tolist() == [11.0, 11.0, 11.0, 11.0, 2.0]
+
+
+def test_store_seeds_once():
+    """Repeated reads are served from memory after the seed fetch"""
+    api = FakeAPI()
+    store = CandleStore(api, capacity=1000, seed_limit=300, min_refresh=60)
+    for _ in range(20):
+        times, values = store.get('BTCUSDT', '5m', 100)
+    assert len(api.calls) == 1
+    assert api.calls[0] == ('BTC_USDT', '5M', 300)
+    assert len(times) == 100 and np.all(np.diff(times) > 0)
+    df = store.get_market_data('BTC_USDT', '5M', 50)
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    assert len(df) == 50
+
+
+def test_interval_aliases():
+    """1H is requested from Pionex as 60M"""
+    assert normalize_interval('1H') == '60M'
+    assert normalize_interval('5m') == '5M'
+
+
+if __name__ == "__main__":
+    for test in (test_ring_wraps_in_order, test_ring_updates_open_bar, test_store_seeds_once,
+                 test_interval_aliases, test_resample_aggregates_buckets, test_derived_intervals_refresh_from_base):
+        test()
+        print(f"✅ {test.__name__}")
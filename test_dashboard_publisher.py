@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test dashboard delta publisher (no exchange access required)
+"""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_publisher import DashboardPublisher, diff_balance, diff_positions
+
+
+class FakeSocketIO:
+    """Records emitted events"""
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((event, data, to))
+
+    def start_background_task(self, target):
+        pass
+
+    def sleep(self, seconds):
+        pass
+
+
+class FakeBot:
+    """Returns whatever balance/positions the test sets"""
+
+    def __init__(self):
+        self.balance = {'total': 100.0, 'available': 100.0}
+        self.positions = [{'symbol': 'BTC', 'size': 0.5}]
+
+    def get_account_balance(self):
+        return {'success': True, 'data': dict(self.balance)}
+
+    def get_positions(self):
+        return {'success': True, 'data': list(self.positions)}
+
+    def get_auto_trading_status(self):
+        return {'success': True, 'data': {'is_running': False}}
+
+    def get_current_strategy(self):
+        return {'success': True, 'data': {'current_strategy': 'RSI_STRATEGY'}}
+
+
+def test_diff_helpers():
+    """Only changed fields and positions are reported"""
+    assert diff_balance({'total': 1, 'available': 1}, {'total': 2, 'available': 1}) == {'total': 2}
+    delta = diff_positions([{'symbol': 'BTC', 'size': 1}, {'symbol': 'ETH', 'size': 1}],
+                           [{'symbol': 'BTC', 'size': 2}])
+    assert delta == {'upserted': [{'symbol': 'BTC', 'size': 2}], 'removed': ['ETH']}
+
+
+def test_publish_only_on_change():
+    """Nothing is emitted when state is unchanged, and only subscribed rooms are collected"""
+    socketio, bot = FakeSocketIO(), FakeBot()
+    publisher = DashboardPublisher(socketio, bot)
+    publisher.subscribe('sid-1', ['account'])
+    publisher.subscribe('sid-2', ['account'])
+
+    publisher.publish()
+    assert [e[0] for e in socketio.events] == ['account_delta']
+    assert socketio.events[0][1]['full'] is True
+
+    publisher.publish()
+    assert len(socketio.events) == 1
+
+    bot.balance['available'] = 40.0
+    publisher.publish()
+    assert socketio.events[-1] == ('account_delta', {'full': False, 'data': {'available': 40.0}}, 'account')
+
+
+def test_unsubscribe_stops_channel():
+    """Channels without subscribers are skipped"""
+    socketio, bot = FakeSocketIO(), FakeBot()
+    publisher = DashboardPublisher(socketio, bot)
+    publisher.subscribe('sid-1', ['positions', 'bogus'])
+    assert publisher.active_channels() == {'positions'}
+    publisher.unsubscribe('sid-1')
+    publisher.publish()
+    assert socketio.events == []
+
+
+if __name__ == "__main__":
+    for test in (test_diff_helpers, test_publish_only_on_change, test_unsubscribe_stops_channel):
+        test()
+        print(f"✅ {test.__name__}")
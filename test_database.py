@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test SQLite database layer (WAL, per-thread connections, batched writes)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import MIGRATIONS, Database
+
+
+def make_db():
+    directory = tempfile.mkdtemp()
+    return Database(os.path.join(directory, 'test.db'))
+
+
+def test_wal_mode_and_schema():
+    """Database opens in WAL mode with all tables"""
+    db = make_db()
+    conn = db.connection()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'users', 'user_settings', 'trading_history', 'active_strategies', 'portfolio_snapshots'} <= tables
+    db.close()
+
+
+def test_user_settings_round_trip():
+    """Users get a default settings row that can be updated"""
+    db = make_db()
+    db.add_user(7, 'trader', 'Ada', 'L')
+    assert db.get_user_settings(7)['default_strategy'] == 'RSI_STRATEGY'
+    db.update_user_setting(7, 'default_strategy', 'ADVANCED_STRATEGY')
+    assert db.get_user_settings(7)['default_strategy'] == 'ADVANCED_STRATEGY'
+    db.update_user_setting(8, 'max_positions', 3)
+    assert db.get_user_settings(8)['max_positions'] == 3
+    try:
+        db.update_user_setting(7, 'user_id; DROP TABLE users', 1)
+        assert False, 'unknown setting accepted'
+    except ValueError:
+        pass
+    db.close()
+
+
+def test_concurrent_writes_are_batched():
+    """Many threads write at once without lock errors and share transactions"""
+    db = make_db()
+    errors = []
+
+    def worker(user_id):
+        try:
+            for i in range(100):
+                db.add_trade(user_id, 'BTC_USDT', 'BUY', 'MARKET', 0.01, 42000 + i, order_id=f'{user_id}-{i}')
+            for i in range(100):
+                db.save_portfolio_snapshot(user_id, 1000.0, 5.0, 1, {'i': i}, wait=False)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(uid,)) for uid in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.flush()
+
+    assert errors == []
+    assert len(db.get_recent_trades(limit=10000)) == 800
+    assert len(db.get_portfolio_snapshots(3, limit=1000)) == 100
+    assert db.stats['transactions'] < db.stats['writes']
+    db.close()
+
+
+def test_failed_write_does_not_poison_batch():
+    """A bad statement raises for its caller while neighbours commit"""
+    db = make_db()
+    try:
+        db.execute_write('INSERT INTO missing_table VALUES (1)')
+        assert False, 'bad write succeeded'
+    except Exception:
+        pass
+    trade_id = db.add_trade(1, 'ETH_USDT', 'SELL', 'LIMIT', 1.0, 3000.0, status='NEW', order_id=99)
+    db.update_trade_status(99, 'FILLED')
+    trades = db.get_user_trades(1)
+    assert trades[0]['id'] == trade_id and trades[0]['status'] == 'FILLED'
+
+    strategy_id = db.add_active_strategy(1, 'ETH_USDT', 'GRID', {'levels': 10})
+    assert db.get_active_strategies(1)[0]['parameters'] == {'levels': 10}
+    db.deactivate_strategy(strategy_id)
+    assert db.get_active_strategies(1) == []
+    db.close()
+
+
+def test_unexpected_errors_do_not_kill_the_writer():
+    """A non-sqlite exception fails its own write and later writes still commit"""
+    db = make_db()
+    try:
+        db.add_trade(1, 'BTC_USDT', 'BUY', 'MARKET', 2 ** 70, 100.0)
+        assert False, 'overflowing write succeeded'
+    except OverflowError:
+        pass
+    assert db._writer.is_alive()
+    trade_id = db.add_trade(1, 'BTC_USDT', 'BUY', 'MARKET', 1.0, 100.0)
+    assert db.get_user_trades(1)[0]['id'] == trade_id
+    db.close()
+
+
+def test_connections_of_exited_threads_are_closed():
+    """Per-thread connections do not accumulate as request threads come and go"""
+    db = make_db()
+    for _ in range(20):
+        thread = threading.Thread(target=lambda: db.get_user_trades(1))
+        thread.start()
+        thread.join()
+    db.connection()
+    assert len(db._connections) <= 3
+    db.close()
+
+
+def test_migrations_add_history_indexes():
+    """Migrations run once and the history queries use the new indexes"""
+    db = make_db()
+    conn = db.connection()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(MIGRATIONS)
+    db.migrate()
+    plan = ' '.join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM trading_history WHERE user_id = 1 ORDER BY created_at DESC, id DESC"))
+    assert 'idx_trading_history_user_created' in plan
+    db.close()
+
+
+def test_keyset_pagination_with_filters():
+    """Pages walk the whole filtered history without gaps or repeats"""
+    db = make_db()
+    conn = db.connection()
+    for i in range(120):
+        db.execute_write(
+            "INSERT INTO trading_history (user_id, symbol, side, strategy, created_at) VALUES (?, ?, ?, ?, ?)",
+            (1 + i % 2, 'BTC_USDT' if i % 3 else 'ETH_USDT', 'BUY' if i % 4 else 'SELL', 'RSI_STRATEGY',
+             f'2024-01-{1 + i // 10:02d} 00:00:00'), wait=False)
+    db.flush()
+
+    seen, cursor = [], None
+    while True:
+        page = db.get_trade_history_page(cursor=cursor, limit=7, user_id=1)
+        seen.extend(row['id'] for row in page['trades'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    expected = [row[0] for row in conn.execute(
+        'SELECT id FROM trading_history WHERE user_id = 1 ORDER BY created_at DESC, id DESC')]
+    assert seen == expected and len(seen) == 60
+
+    page = db.get_trade_history_page(symbol='ETH_USDT', side='SELL', start='2024-01-03', end='2024-01-07')
+    assert page['trades'] and all(
+        r['symbol'] == 'ETH_USDT' and r['side'] == 'SELL' and '2024-01-03' <= r['created_at'] < '2024-01-07'
+        for r in page['trades'])
+
+    for bad in ({'cursor': 'not-a-cursor'}, {'price': 1}):
+        try:
+            db.get_trade_history_page(**bad)
+            assert False, f'accepted {bad}'
+        except ValueError:
+            pass
+    db.close()
+
+
+def test_history_bounds_are_normalized():
+    """ISO 'T' / offset bounds compare chronologically against created_at"""
+    db = make_db()
+    for created_at in ('2026-10-16 23:59:59', '2026-10-17 20:05:25', '2026-10-18 00:00:00'):
+        db.execute_write("INSERT INTO trading_history (user_id, symbol, created_at) VALUES (1, 'BTC_USDT', ?)",
+                         (created_at,), wait=False)
+    db.flush()
+
+    def created(**bounds):
+        return [r['created_at'] for r in db.get_trade_history_page(**bounds)['trades']]
+
+    assert created(start='2026-10-17T00:00:00', end='2026-10-18T00:00:00') == ['2026-10-17 20:05:25']
+    assert created(start='2026-10-17T22:05:25+02:00') == ['2026-10-18 00:00:00', '2026-10-17 20:05:25']
+    assert created(end='2026-10-17') == ['2026-10-16 23:59:59']
+    for bad in ('yesterday', '2026-13-01'):
+        try:
+            db.get_trade_history_page(start=bad)
+            assert False, f'accepted {bad}'
+        except ValueError:
+            pass
+    db.close()
+
+
+if __name__ == "__main__":
+    for test in (test_wal_mode_and_schema, test_user_settings_round_trip, test_concurrent_writes_are_batched,
+                 test_failed_write_does_not_poison_batch, test_unexpected_errors_do_not_kill_the_writer,
+                 test_connections_of_exited_threads_are_closed, test_migrations_add_history_indexes,
+                 test_keyset_pagination_with_filters, test_history_bounds_are_normalized):
+        test()
+        print(f"✅ {test.__name__}")
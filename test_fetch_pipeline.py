@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test concurrent fetch pipeline
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_pipeline import FetchPipeline
+
+
+def slow(value, delay=0.2):
+    time.sleep(delay)
+    return value
+
+
+def test_independent_tasks_overlap():
+    """Independent fetches take as long as the slowest one"""
+    pipeline = FetchPipeline(max_workers=4)
+    started = time.perf_counter()
+    results = pipeline.run({
+        'balance': lambda: slow('balance'),
+        'klines_5M': lambda: slow('5m'),
+        'klines_60M': lambda: slow('1h'),
+    })
+    elapsed = time.perf_counter() - started
+    assert results == {'balance': 'balance', 'klines_5M': '5m', 'klines_60M': '1h'}
+    assert elapsed < 0.4
+
+
+def test_dependencies_receive_results():
+    """A dependent task gets its inputs as keyword arguments"""
+    pipeline = FetchPipeline(max_workers=2)
+    results = pipeline.run({
+        'price': lambda: 100.0,
+        'quantity': lambda: 2.0,
+        'cost': (lambda price, quantity: price * quantity, ['price', 'quantity']),
+    })
+    assert results['cost'] == 200.0
+
+
+def test_failure_stops_dependents():
+    """The first error is raised and dependents never run"""
+    pipeline = FetchPipeline(max_workers=2)
+    ran = []
+
+    def fail():
+        raise RuntimeError('exchange down')
+
+    try:
+        pipeline.run({'balance': fail, 'order': (lambda balance: ran.append(balance), ['balance'])})
+    except RuntimeError as e:
+        assert str(e) == 'exchange down'
+    else:
+        raise AssertionError('expected RuntimeError')
+    assert ran == []
+
+
+if __name__ == "__main__":
+    for test in (test_independent_tasks_overlap, test_dependencies_receive_results, test_failure_stops_dependents):
+        test()
+        print(f"✅ {test.__name__}")
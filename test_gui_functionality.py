@@ -58,6 +58,19 @@ def test_gui_functionality():
         else:
             print(f"❌ Settings failed: {settings_result.get('error', 'Unknown error')}")
         
+        # Test auto trading status contract used by the dashboard (status.is_running)
+        print("\nTesting auto trading status...")
+        enable_result = trading_bot.enable_auto_trading()
+        if enable_result['success']:
+            status = trading_bot.get_auto_trading_status()['data']
+            assert status['is_running'] is True, status
+            print("✅ Auto trading reports is_running after enabling")
+            trading_bot.disable_auto_trading()
+            assert trading_bot.get_auto_trading_status()['data']['is_running'] is False
+            print("✅ Auto trading reports not running after disabling")
+        else:
+            print(f"❌ Could not enable auto trading: {enable_result.get('error', 'Unknown error')}")
+        
         # Test trading pairs to understand correct symbol format
         print("\nTesting available trading pairs...")
         try:
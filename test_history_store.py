@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test memory-mapped candle history store and backfill downloader
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore
+from test_vector_backtest import BASE_CONFIG, make_candles
+from vector_backtest import run_vector_backtest
+
+MINUTE = 60_000
+
+
+class FakeKlinesAPI:
+    """Serves pages of 1M klines ending at end_time, newest last, including the open candle"""
+
+    def __init__(self, candles: int = 3000):
+        now = int(time.time() * 1000)
+        self.times = np.arange(now - now % MINUTE - (candles - 1) * MINUTE, now + 1, MINUTE)
+        self.calls = []
+
+    def get_klines(self, symbol, interval='5M', limit=100, end_time=None):
+        self.calls.append(end_time)
+        times = self.times if end_time is None else self.times[self.times <= end_time]
+        return {'data': {'klines': [
+            {'time': int(t), 'open': t / 1e6, 'high': t / 1e6 + 1, 'low': t / 1e6 - 1,
+             'close': t / 1e6 + 0.5, 'volume': 10.0}
+            for t in times[-limit:]
+        ]}}
+
+
+def test_write_append_prepend_and_load():
+    """Writes keep times unique and ascending; load returns zero-copy views by range"""
+    store = HistoryStore(tempfile.mkdtemp())
+    times = np.arange(100, 200, dtype=np.int64) * MINUTE
+    values = np.column_stack([times / MINUTE + i for i in range(5)]).astype(np.float64)
+
+    assert store.write('BTCUSDT', '1m', times[40:80], values[40:80]) == 40
+    assert store.write('BTC_USDT', '1M', times[60:], values[60:]) == 20
+    assert store.write('BTC_USDT', '1M', times[:50][::-1], values[:50][::-1]) == 40
+    assert store.span('BTC_USDT', '1M') == (int(times[0]), int(times[-1]))
+    assert list(store.keys()) == [('BTC_USDT', '1M')]
+
+    loaded, columns = store.load('BTC_USDT', '1M')
+    assert np.array_equal(loaded, times)
+    assert np.array_equal(columns['close'], values[:, 3])
+
+    window, columns = store.load('BTC_USDT', '1M', start=int(times[10]), end=int(times[20]))
+    assert np.array_equal(window, times[10:20])
+    assert isinstance(columns['open'].base, np.memmap) or isinstance(columns['open'], np.memmap)
+    assert not columns['open'].flags.writeable
+
+
+def test_backfill_pages_and_skips_open_candle():
+    """Backfill walks back page by page, stores only closed candles, then tops up incrementally"""
+    api = FakeKlinesAPI(3000)
+    store = HistoryStore(tempfile.mkdtemp(), api=api, page_limit=500)
+    start = int(api.times[1000])
+
+    report = store.backfill('BTC_USDT', '1M', start)
+    times, columns = store.load('BTC_USDT', '1M')
+    assert report['added'] == 1999 == len(times)
+    assert np.array_equal(times, api.times[1000:-1])
+    assert np.all(np.diff(times) == MINUTE)
+    assert np.allclose(columns['close'], api.times[1000:-1] / 1e6 + 0.5)
+
+    # Earlier history is prepended; nothing already stored is requested twice
+    api.calls.clear()
+    report = store.backfill('BTC_USDT', '1M', int(api.times[0]))
+    assert report['added'] == 1000
+    assert len(api.calls) <= 3
+    assert np.array_equal(store.load('BTC_USDT', '1M')[0], api.times[:-1])
+
+
+class FakeAsyncKlinesAPI(FakeKlinesAPI):
+    """AsyncPionexAPI-style client: get_klines is a coroutine"""
+
+    async def get_klines(self, symbol, interval='5M', limit=100, end_time=None):
+        return FakeKlinesAPI.get_klines(self, symbol, interval, limit, end_time)
+
+
+class NoEndTimeAPI:
+    def get_klines(self, symbol, interval='5M', limit=100):
+        return {'data': {'klines': []}}
+
+
+def test_backfill_newer_range_and_async_client():
+    """Pages older than the first one still land when topping up; async clients are awaited"""
+    api = FakeAsyncKlinesAPI(3000)
+    store = HistoryStore(tempfile.mkdtemp(), api=api, page_limit=10)
+    stored = api.times[-51:-41]
+    store.write('BTC_USDT', '1M', stored, np.ones((len(stored), 5)))
+
+    report = store.backfill('BTC_USDT', '1M', int(stored[0]))
+    times, _ = store.load('BTC_USDT', '1M')
+    assert report['added'] == 40 and report['requests'] >= 4
+    assert np.array_equal(times, api.times[-51:-1])
+
+    # A long download into an empty store rewrites the column files once, not once per page
+    rewrites = []
+    fresh = HistoryStore(tempfile.mkdtemp(), api=api, page_limit=10)
+    original = fresh._prepend
+    fresh._prepend = lambda *args: rewrites.append(len(args[3])) or original(*args)
+    fresh.write('BTC_USDT', '1M', api.times[-2:-1], np.ones((1, 5)))
+    fresh.backfill('BTC_USDT', '1M', int(api.times[-500]))
+    assert rewrites == [498]
+    assert np.array_equal(fresh.load('BTC_USDT', '1M')[0], api.times[-500:-1])
+    store.close()
+    fresh.close()
+
+    try:
+        HistoryStore(tempfile.mkdtemp(), api=NoEndTimeAPI()).backfill('BTC_USDT', '1M', 0)
+        assert False, 'a client that cannot page by end_time should fail'
+    except ValueError:
+        pass
+
+
+def test_backtest_offline_from_store():
+    """A reopened store feeds run_vector_backtest with no API at all"""
+    root = tempfile.mkdtemp()
+    candles = make_candles(5000)
+    times = np.arange(len(candles['close']), dtype=np.int64) * MINUTE
+    values = np.column_stack([candles[c] for c in ('open', 'high', 'low', 'close', 'volume')])
+    HistoryStore(root).write('ETH_USDT', '1M', times, values)
+
+    arrays = HistoryStore(root).arrays('ETH_USDT', '1M')
+    result = run_vector_backtest(arrays, 'RSI_STRATEGY', BASE_CONFIG, times=arrays['time'])
+    expected = run_vector_backtest(candles, 'RSI_STRATEGY', BASE_CONFIG, times=times)
+    assert result['final_balance'] == expected['final_balance']
+    assert result['num_trades'] == expected['num_trades']
+
+    try:
+        HistoryStore(root).backfill('ETH_USDT', '1M', 0)
+        assert False, 'backfill without an API should fail'
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    for test in (test_write_append_prepend_and_load, test_backfill_pages_and_skips_open_candle,
+                 test_backfill_newer_range_and_async_client, test_backtest_offline_from_store):
+        test()
+        print(f'✅ {test.__name__}')
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test incremental indicator engine against batch calculations
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import IndicatorEngine
+
+CONFIG = {
+    'rsi': {'period': 7},
+    'macd': {'fast': 12, 'slow': 26, 'signal': 9},
+    'bollinger_bands': {'window': 20, 'n_std': 2.0}
+}
+
+
+def make_prices(n=300, seed=1):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+
+def batch_rsi(prices, period):
+    deltas = np.diff(prices)
+    gains, losses = np.maximum(deltas, 0), np.maximum(-deltas, 0)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for g, l in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + g) / period
+        avg_loss = (avg_loss * (period - 1) + l) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def batch_ema(values, period):
+    ema = [np.mean(values[:period])]
+    alpha = 2 / (period + 1)
+    for v in values[period:]:
+        ema.append(ema[-1] + alpha * (v - ema[-1]))
+    return np.array(ema)
+
+
+def test_matches_batch():
+    """Streaming values equal a from-scratch calculation"""
+    prices = make_prices()
+    times = np.arange(len(prices)) * 60_000
+    result = IndicatorEngine(CONFIG).analyze('BTC_USDT', '5M', times, prices)
+
+    assert abs(result['rsi'] - batch_rsi(prices, 7)) < 1e-9
+
+    fast, slow = batch_ema(prices, 12), batch_ema(prices, 26)
+    line = fast[26 - 12:] - slow
+    signal = batch_ema(line, 9)
+    assert abs(result['macd']['line'] - line[-1]) < 1e-9
+    assert abs(result['macd']['signal'] - signal[-1]) < 1e-9
+
+    window = pd.Series(prices).rolling(20)
+    mean, std = window.mean().iloc[-1], window.std(ddof=0).iloc[-1]
+    assert abs(result['bollinger_bands']['middle'] - mean) < 1e-9
+    assert abs(result['bollinger_bands']['upper'] - (mean + 2 * std)) < 1e-6
+
+
+def test_incremental_equals_one_shot():
+    """Feeding a sliding window candle by candle gives the same answer as one pass"""
+    prices = make_prices(400, seed=7)
+    times = np.arange(len(prices)) * 60_000
+    streaming = IndicatorEngine(CONFIG)
+    for end in range(200, len(prices) + 1):
+        result = streaming.analyze('ETH_USDT', '5M', times[end - 100:end] if end > 200 else times[:end],
+                                   prices[end - 100:end] if end > 200 else prices[:end])
+    one_shot = IndicatorEngine(CONFIG).analyze('ETH_USDT', '5M', times, prices)
+    assert abs(result['rsi'] - one_shot['rsi']) < 1e-9
+    assert abs(result['macd']['histogram'] - one_shot['macd']['histogram']) < 1e-9
+
+
+def test_short_history_defaults():
+    """Too little history yields the neutral defaults"""
+    result = IndicatorEngine(CONFIG).analyze('BTC_USDT', '5M', [0, 1, 2], [1.0, 2.0, 3.0])
+    assert result['rsi'] == 50
+    assert result['macd'] == {'line': 0, 'signal': 0, 'histogram': 0}
+    assert result['current_price'] == 3.0
+
+
+if __name__ == "__main__":
+    for test in (test_matches_batch, test_incremental_equals_one_shot, test_short_history_defaults):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test OBV, support/resistance and divergence analytics
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import rolling_window
+from market_analytics import (AnalyticsState, RollingExtremum, VolumeRatioState, analyze, rolling_max,
+                              rolling_min, volume_ratio)
+from market_scanner import advanced_signals
+
+CONFIG = {
+    'obv_analysis': {'enabled': True, 'divergence_detection': True, 'trend_strength_threshold': 0.3},
+    'support_resistance': {'window': 20, 'trend_analysis': True},
+    'volume_filter': {'ema_period': 20, 'multiplier': 1.5},
+}
+ONE_BAR_PIVOTS = {'support_resistance': {'window': 20, 'pivot_bars': 1}}
+
+
+def make_bars(shape, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, shape), axis=-1)
+    high = close + rng.uniform(0, 1, shape)
+    low = close - rng.uniform(0, 1, shape)
+    volume = rng.uniform(1, 10, shape)
+    return high, low, close, volume
+
+
+def zigzag(closes, volumes):
+    closes = np.asarray(closes, dtype=np.float64)
+    return closes + 0.1, closes - 0.1, closes, np.asarray(volumes, dtype=np.float64)
+
+
+def test_rolling_extrema_match_sliding_windows():
+    """Block-scan extrema equal the brute-force window max/min for any window"""
+    high, low, _, _ = make_bars((4, 103))
+    for window in (1, 2, 7, 20, 103):
+        expected_max = rolling_window(high, window).max(axis=-1)
+        expected_min = rolling_window(low, window).min(axis=-1)
+        assert np.array_equal(rolling_max(high, window)[..., window - 1:], expected_max)
+        assert np.array_equal(rolling_min(low, window)[..., window - 1:], expected_min)
+        assert np.isnan(rolling_max(high, window)[..., :window - 1]).all()
+    assert np.isnan(rolling_max(high, 200)).all()
+
+
+def test_monotonic_deque_matches_vectorized():
+    """RollingExtremum update/peek reproduce rolling_max and rolling_min"""
+    high, low, _, _ = make_bars(300)
+    for values, mode, vectorized in ((high, 'max', rolling_max(high, 20)), (low, 'min', rolling_min(low, 20))):
+        state = RollingExtremum(20, mode)
+        for i, x in enumerate(values):
+            peeked = state.peek(x)
+            updated = state.update(x)
+            assert peeked == updated
+            assert (updated is None) if i < 19 else updated == vectorized[i]
+
+
+def test_incremental_state_matches_analyze():
+    """Feeding closed bars one at a time gives exactly the vectorized values"""
+    high, low, close, volume = make_bars(400)
+    expected = analyze(high, low, close, volume, CONFIG)
+    state = AnalyticsState(CONFIG)
+    for i in range(len(close)):
+        value = state.update(high[i], low[i], close[i], volume[i])
+        for key, series in expected.items():
+            assert np.array_equal(value[key], series[i], equal_nan=True), (i, key)
+    assert {-1, 1} <= set(expected['trend'].tolist())
+    assert np.any(expected['divergence'] != 0)
+
+    # Each row of a (symbols x candles) matrix is analyzed independently
+    matrix = make_bars((3, 150), seed=9)
+    batch = analyze(*matrix, CONFIG)
+    for row in range(3):
+        single = analyze(*(a[row] for a in matrix), CONFIG)
+        for key in single:
+            assert np.array_equal(batch[key][row], single[key], equal_nan=True), key
+
+
+def test_divergence_and_trend():
+    """Higher price high on falling OBV is bearish, lower low on rising OBV bullish"""
+    bearish = analyze(*zigzag([10, 12, 11, 13, 12], [1, 1, 5, 1, 1]), ONE_BAR_PIVOTS)
+    assert bearish['divergence'].tolist() == [0, 0, 0, 0, -1]
+    assert bearish['resistance'][-1] == 13.1
+
+    bullish = analyze(*zigzag([20, 18, 19, 17, 18], [1, 1, 5, 1, 1]), ONE_BAR_PIVOTS)
+    assert bullish['divergence'].tolist() == [0, 0, 0, 0, 1]
+    assert bullish['support'][-1] == 16.9
+
+    # Pivots are only used once confirmed: the second pivot low (bar 4) counts from bar 5
+    rising = analyze(*zigzag([10, 12, 11, 13, 12, 14, 13], [1] * 7), ONE_BAR_PIVOTS)
+    assert rising['trend'].tolist() == [0, 0, 0, 0, 0, 1, 1]
+    assert np.isnan(rising['resistance'][:2]).all() and rising['resistance'][-1] == 14.1
+    falling = analyze(*zigzag([20, 18, 19, 17, 18, 16, 17], [1] * 7), ONE_BAR_PIVOTS)
+    assert falling['trend'][-1] == -1
+
+
+def test_volume_ratio_state():
+    """Streaming volume ratio follows the vectorized EMA ratio"""
+    _, _, _, volume = make_bars(100)
+    expected = volume_ratio(volume, 20, 1.5)
+    state = VolumeRatioState(20, 1.5)
+    streamed = []
+    for x in volume:
+        peeked = state.peek(x)
+        streamed.append(state.update(x))
+        assert peeked == streamed[-1]
+    assert np.allclose(streamed, expected, rtol=0, atol=1e-9)
+
+
+def test_advanced_strategy_votes_with_analytics():
+    """OBV direction, divergence and pivot trend join the advanced vote only when enabled"""
+    high, low, close, volume = make_bars((50, 200))
+    open_ = close - 0.2
+    _, _, plain = advanced_signals(open_, high, low, close, volume, {})
+    _, _, voted = advanced_signals(open_, high, low, close, volume, CONFIG)
+    assert 'trend' not in plain and 'divergence' in voted
+    analytics = analyze(high, low, close, volume, CONFIG)
+    assert np.array_equal(voted['score'] - plain['score'],
+                          analytics['obv_direction'] + analytics['divergence'] + analytics['trend'])
+
+
+def test_incremental_update_is_cheap():
+    """A live bar costs microseconds, not a pass over the history"""
+    high, low, close, volume = make_bars(5000)
+    state = AnalyticsState(CONFIG)
+    started = time.perf_counter()
+    for i in range(len(close)):
+        state.update(high[i], low[i], close[i], volume[i])
+    per_bar = (time.perf_counter() - started) / len(close)
+    assert per_bar < 200e-6, per_bar
+
+
+if __name__ == '__main__':
+    for test in (test_rolling_extrema_match_sliding_windows, test_monotonic_deque_matches_vectorized,
+                 test_incremental_state_matches_analyze, test_divergence_and_trend, test_volume_ratio_state,
+                 test_advanced_strategy_votes_with_analytics, test_incremental_update_is_cheap):
+        test()
+        print(f'✅ {test.__name__}')
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test vectorized market scanner (no exchange access required)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import IndicatorEngine
+from market_scanner import STRATEGIES, MarketScanner, evaluate_strategies, rank_signals
+
+CONFIG = {
+    'rsi': {'period': 7, 'oversold': 30, 'overbought': 70},
+    'macd': {'fast': 12, 'slow': 26, 'signal': 9},
+    'bollinger_bands': {'window': 20, 'n_std': 2.0},
+    'volume_filter': {'ema_period': 20, 'multiplier': 1.5},
+    'support_resistance': {'window': 20},
+    'stop_loss_percentage': 1.5
+}
+
+
+def make_arrays(symbols=200, candles=100, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, (symbols, candles)), axis=1)
+    open_ = close - rng.normal(0, 0.5, close.shape)
+    high = np.maximum(open_, close) + 0.5
+    low = np.minimum(open_, close) - 0.5
+    volume = rng.uniform(1, 10, close.shape)
+    return {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+class FakeStore:
+    def __init__(self, arrays):
+        self.arrays = arrays
+
+    def get(self, symbol, interval, limit):
+        i = int(symbol.split('_')[0][3:])
+        values = np.stack([self.arrays[k][i] for k in ('open', 'high', 'low', 'close', 'volume')], axis=1)
+        return np.arange(values.shape[0]), values[-limit:]
+
+
+class FakeAPI:
+    def get_trading_pairs(self):
+        return {'data': {'symbols': [{'symbol': f'SYM{i}_USDT'} for i in range(50)] + [{'symbol': 'BTC_USDC'}]}}
+
+
+def test_all_strategies_vectorized():
+    """Every strategy returns one signal per symbol"""
+    arrays = make_arrays()
+    results = evaluate_strategies(arrays, CONFIG)
+    assert set(results) == set(STRATEGIES)
+    for result in results.values():
+        assert result['direction'].shape == (200,)
+        assert np.all((result['confidence'] >= 0) & (result['confidence'] <= 1))
+
+
+def test_rsi_matches_streaming_engine():
+    """Scanner RSI agrees with the per-symbol indicator engine"""
+    arrays = make_arrays(symbols=5)
+    rsi = evaluate_strategies(arrays, CONFIG, ['RSI_STRATEGY'])['RSI_STRATEGY']['rsi']
+    for i in range(5):
+        expected = IndicatorEngine(CONFIG).analyze('X', '5M', np.arange(100), arrays['close'][i])['rsi']
+        assert abs(rsi[i] - expected) < 1e-9
+
+
+def test_ranked_table():
+    """The table is ordered by absolute net score"""
+    arrays = make_arrays(symbols=30)
+    results = evaluate_strategies(arrays, CONFIG)
+    table = rank_signals([f'S{i}' for i in range(30)], arrays['close'], results, top=10)
+    assert len(table) == 10
+    scores = [abs(row['score']) for row in table]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_scan_filters_quote():
+    """The scanner only scans pairs in the requested quote currency"""
+    scanner = MarketScanner(FakeAPI(), FakeStore(make_arrays(symbols=50)), CONFIG)
+    result = scanner.scan(candles=60, top=5)
+    assert result['symbols_scanned'] == 50
+    assert len(result['signals']) == 5
+    assert result['signal_model'] == 'approximation'
+
+
+def test_scan_clamps_candles_to_store_capacity():
+    """Asking for more candles than the store keeps is clamped instead of skipping every symbol"""
+    store = FakeStore(make_arrays(symbols=50))
+    store.capacity = 60
+    result = MarketScanner(FakeAPI(), store, CONFIG).scan(candles=5000, top=5)
+    assert result['candles'] == 60
+    assert result['symbols_scanned'] == 50
+
+
+if __name__ == "__main__":
+    for test in (test_all_strategies_vectorized, test_rsi_matches_streaming_engine, test_ranked_table,
+                 test_scan_filters_quote, test_scan_clamps_candles_to_store_capacity):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test process-pool parameter optimizer
+"""
+
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from optimizer import Optimizer, apply_params, grid_space, random_space, valid_params
+from test_vector_backtest import BASE_CONFIG, make_candles
+from vector_backtest import run_vector_backtest
+
+SPACE = {'rsi.period': [7, 14], 'rsi.oversold': [25, 30], 'rsi.overbought': [70, 75]}
+
+
+def test_param_spaces():
+    """Grid enumerates, random is reproducible, invalid combos are rejected"""
+    assert len(grid_space(SPACE)) == 8
+    draws = random_space({'macd.fast': (5, 15), 'volume_filter.multiplier': (1.0, 3.0)}, 5, seed=1)
+    assert draws == random_space({'macd.fast': (5, 15), 'volume_filter.multiplier': (1.0, 3.0)}, 5, seed=1)
+    assert all(5 <= d['macd.fast'] <= 15 and isinstance(d['macd.fast'], int) for d in draws)
+    assert not valid_params({'macd.fast': 26, 'macd.slow': 12})
+    config = apply_params(BASE_CONFIG, {'rsi.period': 21, 'new.key': 1})
+    assert config['rsi']['period'] == 21 and config['new']['key'] == 1
+    assert BASE_CONFIG['rsi']['period'] == 7
+
+
+def test_grid_matches_direct_backtests_and_resumes():
+    """Workers read shared candles; a checkpointed rerun on the same inputs evaluates nothing"""
+    candles = make_candles(20000)
+    checkpoint = os.path.join(tempfile.mkdtemp(), 'sweep.jsonl')
+    with Optimizer(candles, BASE_CONFIG, 'RSI_STRATEGY', max_workers=2, checkpoint=checkpoint) as optimizer:
+        report = optimizer.grid(SPACE)
+    assert report['evaluated'] == 8 and report['resumed'] == 0
+    board = report['leaderboard']
+    assert [e['total_return'] for e in board] == sorted((e['total_return'] for e in board), reverse=True)
+    best = board[0]
+    direct = run_vector_backtest(candles, 'RSI_STRATEGY', apply_params(BASE_CONFIG, best['params']))
+    assert direct['total_return'] == best['total_return']
+
+    with Optimizer(candles, BASE_CONFIG, 'RSI_STRATEGY', max_workers=2, checkpoint=checkpoint) as optimizer:
+        again = optimizer.grid(SPACE)
+    assert again['evaluated'] == 0 and again['resumed'] == 8
+    assert again['leaderboard'][0]['params'] == best['params']
+
+    # Another config or other candles must not reuse the checkpointed metrics
+    changed = apply_params(BASE_CONFIG, {'stop_loss_percentage': 3.0})
+    with Optimizer(candles, changed, 'RSI_STRATEGY', max_workers=2, checkpoint=checkpoint) as optimizer:
+        assert optimizer.grid(SPACE)['resumed'] == 0
+    with Optimizer(make_candles(20000, seed=8), BASE_CONFIG, 'RSI_STRATEGY', max_workers=2,
+                   checkpoint=checkpoint) as optimizer:
+        assert optimizer.grid(SPACE)['resumed'] == 0
+
+
+def test_walk_forward():
+    """Each fold reports in-sample and out-of-sample metrics"""
+    candles = make_candles(20000, seed=4)
+    with Optimizer(candles, BASE_CONFIG, 'RSI_STRATEGY', max_workers=2) as optimizer:
+        report = optimizer.walk_forward(SPACE, folds=3, samples=4)
+    assert len(report['folds']) == 3
+    fold = report['folds'][1]
+    assert fold['train'][1] == fold['test'][0]
+    assert set(fold['out_of_sample']) >= {'total_return', 'max_drawdown', 'win_rate'}
+    assert report['out_of_sample_return'] is not None
+
+
+if __name__ == "__main__":
+    for test in (test_param_spaces, test_grid_matches_direct_backtests_and_resumes, test_walk_forward):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test incremental performance rollups
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from performance import PerformanceRollups, max_drawdown
+
+import numpy as np
+
+
+def add_trade(db, side, quantity, price, created_at, strategy='RSI_STRATEGY', status='FILLED'):
+    db.execute_write(
+        "INSERT INTO trading_history (user_id, symbol, side, quantity, price, status, strategy, created_at) "
+        "VALUES (1, 'BTC_USDT', ?, ?, ?, ?, ?, ?)", (side, quantity, price, status, strategy, created_at))
+
+
+def add_snapshot(db, value, pnl, created_at):
+    db.execute_write(
+        "INSERT INTO portfolio_snapshots (user_id, total_value, total_pnl, positions_count, created_at) "
+        "VALUES (1, ?, ?, 1, ?)", (value, pnl, created_at))
+
+
+def make_db():
+    return Database(os.path.join(tempfile.mkdtemp(), 'test.db'))
+
+
+def test_realized_unrealized_and_win_rate():
+    """Average-cost PnL, win rate per strategy and unrealized PnL from live prices"""
+    db = make_db()
+    add_trade(db, 'BUY', 1, 100, '2024-01-01 10:00:00')
+    add_trade(db, 'SELL', 1, 110, '2024-01-01 10:05:00')
+    add_trade(db, 'BUY', 2, 100, '2024-01-02 10:00:00')
+    add_trade(db, 'SELL', 1, 90, '2024-01-02 11:00:00')
+    add_trade(db, 'BUY', 5, 1, '2024-01-02 11:00:00', status='CANCELED')
+    add_trade(db, 'BUY', 1, 50, '2024-01-02 12:00:00', strategy='DCA_STRATEGY')
+
+    rollups = PerformanceRollups(db)
+    assert rollups.refresh() == {'trades': 6, 'snapshots': 0}
+    report = rollups.report(1, bucket='day', price_lookup=lambda symbol: 120.0)
+
+    rsi = report['strategies']['RSI_STRATEGY']
+    assert rsi['trades'] == 4 and rsi['wins'] == 1 and rsi['losses'] == 1 and rsi['win_rate'] == 0.5
+    assert rsi['realized_pnl'] == 0.0
+    assert report['strategies']['DCA_STRATEGY']['win_rate'] is None
+    assert report['unrealized_pnl'] == 20.0 + 70.0
+    db.close()
+
+
+def test_incremental_matches_full_rebuild():
+    """Refreshing in pieces gives the same rollups as one pass"""
+    db_a, db_b = make_db(), make_db()
+    incremental = PerformanceRollups(db_a, chunk_size=3)
+    for i in range(20):
+        for db in (db_a, db_b):
+            add_trade(db, 'BUY' if i % 2 == 0 else 'SELL', 1, 100 + (i % 5), f'2024-01-01 10:{i:02d}:00')
+            add_snapshot(db, 1000 + i * (-1) ** i, i, f'2024-01-01 10:{i:02d}:30')
+        if i % 6 == 0:
+            incremental.refresh()
+    incremental.refresh()
+    full = PerformanceRollups(db_b)
+    full.refresh()
+    for bucket in ('minute', 'hour', 'day'):
+        assert incremental.report(1, bucket=bucket) == full.report(1, bucket=bucket)
+    db_a.close()
+    db_b.close()
+
+
+def test_orders_filled_after_refresh_are_counted():
+    """A NEW order passed by the watermark is folded once it fills, and dropped if cancelled"""
+    db = make_db()
+    add_trade(db, 'BUY', 1, 100, '2024-01-01 10:00:00', status='NEW')
+    add_trade(db, 'BUY', 1, 100, '2024-01-01 10:01:00', status='NEW')
+    add_trade(db, 'BUY', 1, 100, '2024-01-01 10:02:00')
+    rollups = PerformanceRollups(db)
+    rollups.refresh()
+    assert rollups.report(1, bucket='day')['strategies']['RSI_STRATEGY']['trades'] == 1
+
+    db.execute_write("UPDATE trading_history SET status = 'FILLED' WHERE id = 1")
+    db.execute_write("UPDATE trading_history SET status = 'CANCELED' WHERE id = 2")
+    add_trade(db, 'SELL', 2, 110, '2024-01-01 10:03:00')
+    assert rollups.refresh()['trades'] == 3
+    rsi = rollups.report(1, bucket='day')['strategies']['RSI_STRATEGY']
+    assert rsi['trades'] == 3 and rsi['wins'] == 1 and rsi['realized_pnl'] == 20.0
+    assert db.connection().execute("SELECT COUNT(*) FROM rollup_pending").fetchone()[0] == 0
+    assert rollups.refresh()['trades'] == 0
+    db.close()
+
+
+def test_equity_curve_and_drawdown():
+    """Equity OHLC per bucket and max drawdown from rollups"""
+    db = make_db()
+    for value, stamp in ((1000, '10:00:00'), (1100, '10:00:30'), (900, '11:00:00'), (1000, '12:00:00')):
+        add_snapshot(db, value, value - 1000, f'2024-01-01 {stamp}')
+    rollups = PerformanceRollups(db)
+    rollups.refresh()
+
+    report = rollups.report(1, start='2024-01-01 00:00:00', end='2024-01-01 23:59:59')
+    assert report['bucket'] == 'minute'
+    hourly = rollups.report(1, bucket='hour')
+    assert [(p['open'], p['high'], p['close']) for p in hourly['equity']] == [
+        (1000, 1100, 1100), (900, 900, 900), (1000, 1000, 1000)]
+    assert abs(hourly['max_drawdown'] - (900 / 1100 - 1)) < 1e-12
+    assert hourly['current_equity'] == 1000
+    assert max_drawdown(np.array([]), np.array([])) == 0.0
+    db.close()
+
+
+def test_year_report_reads_rollups_quickly():
+    """A year of daily rollups is summarized in milliseconds"""
+    db = make_db()
+    day = 86400
+    start = 1704067200
+    statements = []
+    for d in range(365):
+        ts = start + d * day
+        statements.append(("INSERT INTO equity_rollups VALUES (1, 'day', ?, 1, 2, 0.5, 1.5, 0, 1)", (ts,)))
+        statements.append(("INSERT INTO strategy_rollups VALUES (1, 'RSI_STRATEGY', 'day', ?, 3, 2, 1, 5, 100)", (ts,)))
+    db.execute_transaction(statements)
+
+    rollups = PerformanceRollups(db)
+    started = time.perf_counter()
+    report = rollups.report(1, start=start, end=start + 365 * day)
+    elapsed = time.perf_counter() - started
+    assert report['bucket'] == 'day' and len(report['equity']) == 365
+    assert report['strategies']['RSI_STRATEGY']['trades'] == 365 * 3
+    assert elapsed < 0.1
+    db.close()
+
+
+if __name__ == "__main__":
+    for test in (test_realized_unrealized_and_win_rate, test_incremental_matches_full_rebuild,
+                 test_orders_filled_after_refresh_are_counted, test_equity_curve_and_drawdown, test_year_report_reads_rollups_quickly):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test websocket price fan-out (no exchange access required)
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_stream import PriceFanout, price_room
+from symbols import format_symbol
+
+
+class FakeSocketIO:
+    """Records emitted events"""
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((event, data, to))
+
+    def start_background_task(self, target):
+        pass
+
+    def sleep(self, seconds):
+        pass
+
+
+class FakeWebSocket:
+    """Minimal PionexWebSocket stand-in with a listener hook"""
+
+    def __init__(self):
+        self.handlers = []
+        self.subscribed = []
+
+    def add_message_handler(self, handler):
+        self.handlers.append(handler)
+
+    def subscribe(self, symbol):
+        self.subscribed.append(symbol)
+
+
+def test_format_symbol():
+    """Symbols are normalised to the Pionex format"""
+    assert format_symbol('BTCUSDT') == 'BTC_USDT'
+    assert format_symbol('eth_usdt') == 'ETH_USDT'
+    assert format_symbol('DOTUSDC') == 'DOT_USDC'
+
+
+def test_conflated_broadcast():
+    """Many ticks between flushes produce one update to the symbol room"""
+    socketio, ws = FakeSocketIO(), FakeWebSocket()
+    fanout = PriceFanout(socketio)
+    fanout.attach(ws)
+    fanout.subscribe('sid-1', 'BTCUSDT')
+    fanout.subscribe('sid-2', 'BTC_USDT')
+    assert ws.subscribed == ['BTC_USDT']
+
+    for i in range(50):
+        ws.handlers[0]({'topic': 'TRADE', 'symbol': 'BTC_USDT',
+                        'data': [{'price': str(100 + i), 'timestamp': i}]})
+    ws.handlers[0]('{"topic": "DEPTH", "symbol": "BTC_USDT", '
+                   '"data": {"bids": [["148", "1"]], "asks": [["150", "2"]]}}')
+    fanout.flush()
+
+    assert len(socketio.events) == 1
+    event, quote, room = socketio.events[0]
+    assert event == 'price_update' and room == price_room('BTCUSDT')
+    assert quote['price'] == 149.0 and quote['bid'] == 148.0 and quote['ask'] == 150.0
+
+    fanout.flush()
+    assert len(socketio.events) == 1
+
+
+def test_unwatched_symbols_not_broadcast():
+    """Ticks for symbols nobody watches update the table but are not emitted"""
+    socketio = FakeSocketIO()
+    fanout = PriceFanout(socketio)
+    fanout.ingest({'topic': 'TRADE', 'symbol': 'ETH_USDT', 'data': [{'price': '10', 'timestamp': 1}]})
+    fanout.flush()
+    assert socketio.events == []
+    assert fanout.get_last_price('ETHUSDT') == 10.0
+
+
+def test_stale_prices_are_not_served():
+    """get_last_price returns None once the last tick is older than stale_after"""
+    fanout = PriceFanout(FakeSocketIO(), stale_after=5.0)
+    assert fanout.get_last_price('BTC_USDT') is None
+    fanout.update('BTC_USDT', price=100.0)
+    assert fanout.get_last_price('BTC_USDT') == 100.0
+    fanout.book['BTC_USDT']['received_at'] = time.time() - 6
+    assert fanout.get_last_price('BTC_USDT') is None
+
+
+def test_attach_chains_existing_on_message():
+    """attach() keeps a client's own on_message handler"""
+
+    class CallbackWebSocket:
+        def __init__(self):
+            self.seen = []
+            self.on_message = self.seen.append
+
+    ws = CallbackWebSocket()
+    fanout = PriceFanout(FakeSocketIO())
+    fanout.attach(ws)
+    message = {'topic': 'TRADE', 'symbol': 'BTC_USDT', 'data': [{'price': '42', 'timestamp': 1}]}
+    ws.on_message(message)
+    assert ws.seen == [message]
+    assert fanout.get_last_price('BTC_USDT') == 42.0
+
+
+if __name__ == "__main__":
+    for test in (test_format_symbol, test_conflated_broadcast, test_unwatched_symbols_not_broadcast,
+                 test_stale_prices_are_not_served, test_attach_chains_existing_on_message):
+        test()
+        print(f"✅ {test.__name__}")
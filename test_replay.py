@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test event-driven replay simulator and matching engine
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay
+from database import Database
+from history_store import HistoryStore
+from replay import (ReplayEngine, SimulatedExchange, StrategyTrader, TickRecorder, candle_ticks,
+                    recorded_ticks, replay_from_config, store_ticks)
+from test_vector_backtest import BASE_CONFIG, make_candles
+
+MINUTE = 60_000
+
+
+def candle_source(n, symbol='BTC_USDT', seed=11):
+    candles = make_candles(n, seed)
+    times = np.arange(n, dtype=np.int64) * MINUTE
+    values = np.column_stack([candles[c] for c in ('open', 'high', 'low', 'close', 'volume')])
+    return times, values
+
+
+def test_latency_partial_fills_and_fees():
+    """Orders wait out their latency, fill in slices of tick liquidity and pay taker fees"""
+    exchange = SimulatedExchange({'USDT': 1000.0}, latency_ms=100, latency_jitter_ms=0,
+                                 taker_fee=0.001, slippage_bps=0, participation=0.5)
+    exchange.on_tick(0, 'BTC_USDT', 100.0, 10.0)
+    # Market orders take a base quantity; a BUY holds quantity * last price plus the taker fee
+    order_id = exchange.place_market_order('BTC_USDT', 'BUY', 900.0 / 100.1)['data']['orderId']
+    balance = exchange.get_account_balance()
+    assert abs(balance['available'] - 100.0) < 1e-9 and abs(balance['frozen'] - 900.0) < 1e-9
+
+    exchange.on_tick(50, 'BTC_USDT', 100.0, 10.0)
+    assert not exchange.ledger, 'order must not fill before its latency elapses'
+    exchange.on_tick(100, 'BTC_USDT', 100.0, 10.0)
+    assert exchange.get_order('BTC_USDT', order_id)['data']['status'] == 'PARTIALLY_FILLED'
+    exchange.on_tick(200, 'BTC_USDT', 100.0, 10.0)
+    order = exchange.get_order('BTC_USDT', order_id)['data']
+    assert order['status'] == 'FILLED' and len(exchange.ledger) == 2
+    assert abs(order['filledAmount'] + order['fee'] - 900.0) < 1e-9
+    assert abs(order['fee'] - order['filledAmount'] * 0.001) < 1e-9
+    assert abs(exchange.free['BTC'] - 900.0 / 100.1) < 1e-9
+    assert abs(exchange.get_account_balance()['total'] - 100.0) < 1e-9
+
+    assert 'error' in exchange.place_market_order('BTC_USDT', 'SELL', 100.0)
+
+
+def test_limit_orders_rest_and_cancel():
+    """Limit orders fill only when price trades through; cancel releases frozen funds"""
+    exchange = SimulatedExchange({'USDT': 1000.0}, latency_ms=0, latency_jitter_ms=0,
+                                 maker_fee=0.0, participation=1.0)
+    exchange.on_tick(0, 'ETH_USDT', 100.0, 5.0)
+    fill = exchange.place_limit_order('ETH_USDT', 'BUY', 2.0, 95.0)['data']['orderId']
+    rest = exchange.place_limit_order('ETH_USDT', 'BUY', 1.0, 80.0)['data']['orderId']
+    exchange.on_tick(1, 'ETH_USDT', 96.0, 5.0)
+    assert not exchange.ledger
+    exchange.on_tick(2, 'ETH_USDT', 94.0, 5.0)
+    assert exchange.ledger[0]['price'] == 95.0 and exchange.free['ETH'] == 2.0
+    assert exchange.get_order('ETH_USDT', fill)['data']['status'] == 'FILLED'
+    assert exchange.frozen['USDT'] == 80.0
+    assert 'data' in exchange.cancel_order('ETH_USDT', rest)
+    assert exchange.frozen['USDT'] == 0.0 and exchange.free['USDT'] == 810.0
+    assert 'error' in exchange.cancel_order('ETH_USDT', rest)
+
+
+def test_strategy_trader_sizes_records_and_restores():
+    """BUY size is a base quantity; fills and entries persist; exits sell only what was bought"""
+    exchange = SimulatedExchange({'USDT': 1000.0, 'BTC': 0.5}, latency_ms=0, latency_jitter_ms=0,
+                                 slippage_bps=0, participation=1.0)
+    exchange.on_tick(0, 'BTC_USDT', 100.0, 1000.0)
+    db = Database(os.path.join(tempfile.mkdtemp(), 'test.db'))
+    signal = {'direction': 1}
+    original = replay.evaluate_strategies
+    replay.evaluate_strategies = lambda arrays, config, strategies: {strategies[0]: dict(signal)}
+    times, values = np.arange(3, dtype=np.int64) * MINUTE, np.full((3, 5), 100.0)
+    try:
+        trader = StrategyTrader(exchange, BASE_CONFIG, 'RSI_STRATEGY', fraction=0.5, db=db, user_id=1)
+        trader.on_candle('BTC_USDT', times, values)
+        exchange.on_tick(1, 'BTC_USDT', 100.0, 1000.0)
+        bought = trader.entries['BTC_USDT']['quantity']
+        assert abs(bought - 500.0 / (100.0 * 1.0005)) < 1e-9
+        assert abs(exchange.free['BTC'] - 0.5 - bought) < 1e-9
+
+        # A new instance (e.g. after a restart) picks the open entry up from the database
+        restored = StrategyTrader(exchange, BASE_CONFIG, 'RSI_STRATEGY', db=db, user_id=1)
+        assert restored.entries['BTC_USDT']['quantity'] == bought
+        signal['direction'] = -1
+        restored.on_candle('BTC_USDT', times, values)
+        exchange.on_tick(2, 'BTC_USDT', 100.0, 1000.0)
+        assert abs(exchange.free['BTC'] - 0.5) < 1e-9
+        assert not restored.entries and db.get_active_strategies(1) == []
+        db.flush()
+        trades = sorted(db.get_user_trades(1), key=lambda t: t['id'])
+        assert [(t['side'], t['strategy']) for t in trades] == [('BUY', 'RSI_STRATEGY'), ('SELL', 'RSI_STRATEGY')]
+        assert trades[0]['quantity'] == trades[1]['quantity'] == bought
+    finally:
+        replay.evaluate_strategies = original
+        db.close()
+
+
+def test_replay_is_deterministic():
+    """The same candles, config and seed produce the same ledger"""
+    config = {**BASE_CONFIG, 'replay': {'latency_ms': 200, 'latency_jitter_ms': 300, 'seed': 7}}
+    times, values = candle_source(3000)
+
+    def run():
+        return replay_from_config(config, candle_ticks('BTC_USDT', times, values, '1M'), strategy='RSI_STRATEGY')
+
+    first, second = run(), run()
+    assert first['fills'] > 0 and first['partial_fills'] > 0
+    assert first['ledger'] == second['ledger']
+    assert first['final_equity'] == second['final_equity']
+    assert first['bars'] == 2999 and first['ticks'] == 12000
+    assert first['fees'] > 0
+
+
+def test_month_from_history_store():
+    """A simulated month of 1m candles replays from the local store in well under real time"""
+    root = tempfile.mkdtemp()
+    times, values = candle_source(30 * 24 * 60, seed=3)
+    store = HistoryStore(root)
+    store.write('BTC_USDT', '1M', times, values)
+
+    exchange = SimulatedExchange({'USDT': 1000.0}, seed=1)
+    engine = ReplayEngine(exchange, StrategyTrader(exchange, BASE_CONFIG, 'RSI_STRATEGY'), lookback=100)
+    report = engine.run(store_ticks(store, 'BTC_USDT', '1M'))
+    assert report['simulated_seconds'] >= 29 * 86400
+    assert report['speedup'] > 100
+    assert report['orders'] > 0
+    assert abs(report['final_equity'] - exchange.equity()) < 1e-9
+
+
+def test_recorded_ticks_merge():
+    """Recorded trades for several symbols replay in time order"""
+    path = os.path.join(tempfile.mkdtemp(), 'ticks.jsonl')
+    recorder = TickRecorder(path)
+    for i in range(10):
+        recorder('BTCUSDT', 100.0 + i, 1.0, i * 1000)
+    recorder.close()
+
+    seen = []
+    exchange = SimulatedExchange()
+    engine = ReplayEngine(exchange)
+    original = exchange.on_tick
+    exchange.on_tick = lambda t, s, p, q: seen.append((t, s)) or original(t, s, p, q)
+    other = [(500 + i * 1000, 'ETH_USDT', 10.0, 1.0) for i in range(10)]
+    report = engine.run(recorded_ticks(path), iter(other))
+    assert report['ticks'] == 20
+    assert [t for t, _ in seen] == sorted(t for t, _ in seen)
+    assert exchange.get_real_time_price('BTC_USDT') == 109.0
+
+
+if __name__ == '__main__':
+    for test in (test_latency_partial_fills_and_fees, test_limit_orders_rest_and_cancel,
+                 test_strategy_trader_sizes_records_and_restores, test_replay_is_deterministic, test_month_from_history_store, test_recorded_ticks_merge):
+        test()
+        print(f'✅ {test.__name__}')
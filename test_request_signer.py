@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test request signing fast path (no exchange access required)
+"""
+
+import hashlib
+import hmac
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from urllib.parse import urlencode
+
+from request_signer import RequestSigner, benchmark, naive_sign
+
+
+def test_matches_reference_signature():
+    """Fast path produces the same query string and signature as a fresh HMAC"""
+    signer = RequestSigner('key', 'secret')
+    params = {'symbol': 'BTC_USDT', 'limit': 100, 'note': 'a b/c', 'price': 0.5}
+    body = '{"side":"BUY"}'
+    query, headers = signer.sign('POST', '/api/v1/trade/order', params, body, timestamp=1700000000000)
+
+    expected_params = {**params, 'timestamp': 1700000000000}
+    assert query == urlencode(sorted(expected_params.items()))
+    assert headers['PIONEX-KEY'] == 'key'
+    assert headers['PIONEX-SIGNATURE'] == naive_sign('secret', 'POST', '/api/v1/trade/order', expected_params, body)
+
+
+def test_key_order_cache_handles_new_values():
+    """Cached key order is reused across calls with different values"""
+    signer = RequestSigner('key', 'secret')
+    assert signer.canonical_query({'b': 2, 'a': 1}) == 'a=1&b=2'
+    assert signer.canonical_query({'a': 'x y', 'b': 3}) == 'a=x+y&b=3'
+    assert signer.canonical_query({'c': 1}) == 'c=1'
+    assert signer.canonical_query({}) == ''
+    assert len(signer._orders) == 2
+
+
+def test_batch_sign_matches_single():
+    """Batch signatures equal individually computed ones"""
+    signer = RequestSigner('key', 'secret')
+    bodies = [f'{{"size":"{i}"}}' for i in range(5)]
+    batch = signer.sign_batch('POST', '/api/v1/trade/order', bodies, timestamp=42)
+    for body, (query, headers) in zip(bodies, batch):
+        payload = f"POST/api/v1/trade/order?{query}{body}"
+        assert query == 'timestamp=42'
+        assert headers['PIONEX-SIGNATURE'] == hmac.new(b'secret', payload.encode(), hashlib.sha256).hexdigest()
+
+
+def test_benchmark_reports_per_request_cost():
+    """Microbenchmark returns timings for each path"""
+    result = benchmark(iterations=200, batch_size=10)
+    assert set(result) == {'naive_us', 'fast_us', 'batch_us'}
+    assert all(value > 0 for value in result.values())
+
+
+if __name__ == "__main__":
+    for test in (test_matches_reference_signature, test_key_order_cache_handles_new_values,
+                 test_batch_sign_matches_single, test_benchmark_reports_per_request_cost):
+        test()
+        print(f"✅ {test.__name__}")
+    for name, value in benchmark().items():
+        print(f"   {name}: {value:.2f} µs/signature")
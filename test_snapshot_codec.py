@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test keyframe + delta portfolio snapshot encoding
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from snapshot_codec import SnapshotReader, SnapshotWriter, decode_series
+
+
+def portfolio(step, coins=20):
+    rng = random.Random(step)
+    balances = {f'C{i}': {'free': 100.0 + i, 'frozen': 0.0, 'price': 10.0 + i} for i in range(coins)}
+    for i in rng.sample(range(coins), 2):
+        balances[f'C{i}']['free'] += step * 0.5
+    document = {'balances': balances, 'positions': step % 5, 'note': 'ok'}
+    if step % 7 == 0:
+        document['extra'] = [step, 'x']
+    return document
+
+
+def test_round_trip_series():
+    """Keyframes, deltas, new keys, deleted keys and non-numeric values decode exactly"""
+    writer = SnapshotWriter(db=None, keyframe_interval=5)
+    documents = [portfolio(step) for step in range(23)]
+    encoded = [writer.encode(1, doc) for doc in documents]
+    assert [e[:2] for e in encoded[:6]] == ['K:', 'D:', 'D:', 'D:', 'D:', 'K:']
+    assert decode_series(encoded) == documents
+
+
+def test_legacy_json_rows_read_as_keyframes():
+    """Plain JSON snapshot_data written before the codec still decodes"""
+    legacy = json.dumps({'balances': {'USDT': {'free': 5.0}}})
+    assert decode_series([legacy, None]) == [{'balances': {'USDT': {'free': 5.0}}}, {}]
+
+
+def test_storage_is_an_order_of_magnitude_smaller():
+    """Deltas with a couple of changed balances are tiny compared to full JSON"""
+    writer = SnapshotWriter(db=None, keyframe_interval=50)
+    documents = [portfolio(step) for step in range(200)]
+    full = sum(len(json.dumps(doc)) for doc in documents)
+    compact = sum(len(writer.encode(1, doc)) for doc in documents)
+    assert compact * 10 < full
+
+
+def test_point_in_time_reader():
+    """Any snapshot can be rebuilt from its keyframe; equity curve reads totals only"""
+    db = Database(os.path.join(tempfile.mkdtemp(), 'test.db'))
+    writer = SnapshotWriter(db, keyframe_interval=4)
+    documents = [portfolio(step) for step in range(10)]
+    for step, document in enumerate(documents):
+        writer.write(3, 1000.0 + step, float(step), step % 5, document)
+    db.flush()
+    conn = db.connection()
+    conn.execute("UPDATE portfolio_snapshots SET created_at = '2024-01-01 00:00:' || printf('%02d', id)")
+
+    reader = SnapshotReader(db)
+    snapshot = reader.snapshot_at(3, '2024-01-01 00:00:06')
+    assert snapshot['total_value'] == 1005.0
+    assert snapshot['snapshot_data'] == documents[5]
+    assert reader.snapshot_at(3, '2023-12-31') is None
+
+    history = reader.history(3, start='2024-01-01 00:00:03', end='2024-01-01 00:00:08')
+    assert [h['snapshot_data'] for h in history] == documents[2:7]
+
+    curve = reader.equity_curve(3)
+    assert [point[1] for point in curve] == [1000.0 + step for step in range(10)]
+    db.close()
+
+
+def test_database_snapshots_are_encoded():
+    """save_portfolio_snapshot stores keyframes plus deltas and reads back the documents"""
+    db = Database(os.path.join(tempfile.mkdtemp(), 'test.db'), snapshot_keyframe_interval=3)
+    documents = [portfolio(step) for step in range(7)]
+    for step, document in enumerate(documents):
+        db.save_portfolio_snapshot(5, 1000.0 + step, 0.0, 1, document if step % 2 else json.dumps(document))
+    stored = [row['snapshot_data'] for row in reversed(db.get_portfolio_snapshots(5))]
+    assert [data[:2] for data in stored] == ['K:', 'D:', 'D:', 'K:', 'D:', 'D:', 'K:']
+    assert [row['snapshot_data'] for row in SnapshotReader(db).history(5)] == documents
+    db.close()
+
+
+def test_two_writers_share_one_chain():
+    """Two Database instances writing one user's snapshots keep a decodable chain"""
+    path = os.path.join(tempfile.mkdtemp(), 'test.db')
+    first = Database(path, snapshot_keyframe_interval=4)
+    second = Database(path, snapshot_keyframe_interval=4)
+    documents = [portfolio(step) for step in range(11)]
+    for step, document in enumerate(documents):
+        (first if step % 3 else second).save_portfolio_snapshot(7, 1000.0 + step, 0.0, 1, document)
+
+    stored = [row['snapshot_data'] for row in reversed(first.get_portfolio_snapshots(7))]
+    assert [data[:2] for data in stored] == ['K:', 'D:', 'D:', 'D:'] * 2 + ['K:', 'D:', 'D:']
+    assert [row['snapshot_data'] for row in SnapshotReader(second).history(7)] == documents
+    first.close()
+    second.close()
+
+
+if __name__ == "__main__":
+    for test in (test_round_trip_series, test_legacy_json_rows_read_as_keyframes,
+                 test_storage_is_an_order_of_magnitude_smaller, test_point_in_time_reader,
+                 test_database_snapshots_are_encoded, test_two_writers_share_one_chain):
+        test()
+        print(f"✅ {test.__name__}")
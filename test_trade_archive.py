@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test Parquet archive rollover and hot/cold queries
+"""
+
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from snapshot_codec import SnapshotReader, SnapshotWriter
+from trade_archive import TradeArchive
+
+
+def make_archive():
+    directory = tempfile.mkdtemp()
+    db = Database(os.path.join(directory, 'test.db'))
+    for i in range(60):
+        month = 1 + i // 20
+        db.execute_write(
+            "INSERT INTO trading_history (user_id, symbol, side, quantity, price, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (1 + i % 2, 'BTC_USDT', 'BUY' if i % 3 else 'SELL', 1.0, 100.0 + i, f'2024-{month:02d}-10 12:00:{i:02d}'),
+            wait=False)
+        db.execute_write(
+            "INSERT INTO portfolio_snapshots (user_id, total_value, total_pnl, positions_count, snapshot_data, "
+            "created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (1, 1000.0 + i, float(i), 1, '{}', f'2024-{month:02d}-10 12:00:{i:02d}'), wait=False)
+    db.flush()
+    return db, TradeArchive(db, os.path.join(directory, 'archive'), batch_size=15)
+
+
+def test_rollover_moves_cold_rows():
+    """Rows before the cutoff land in user/month partitions and leave SQLite"""
+    db, archive = make_archive()
+    moved = archive.rollover('2024-03-01')
+    assert moved == {'trading_history': 40, 'portfolio_snapshots': 40}
+    assert db.connection().execute('SELECT COUNT(*) FROM trading_history').fetchone()[0] == 20
+    partitions = sorted(os.listdir(os.path.join(archive.root, 'trading_history', 'user_id=1')))
+    assert partitions == ['month=2024-01', 'month=2024-02']
+    assert archive.rollover('2024-03-01') == {'trading_history': 0, 'portfolio_snapshots': 0}
+    db.close()
+
+
+def test_query_merges_hot_and_cold():
+    """Queries return the same rows before and after archiving"""
+    db, archive = make_archive()
+    before = archive.query('trading_history', user_id=2)
+    archive.rollover('2024-03-01')
+    after = archive.query('trading_history', user_id=2)
+    assert after['id'].tolist() == before['id'].tolist()
+    assert len(after) == 30
+
+    window = archive.query('trading_history', start='2024-02-01', end='2024-03-15', columns=['price'])
+    assert len(window) == 40 and set(window.columns) == {'price', 'id', 'created_at'}
+    db.close()
+
+
+def test_rollover_keeps_snapshot_keyframes_for_hot_deltas():
+    """Snapshots are archived on keyframe boundaries, so hot deltas still decode"""
+    directory = tempfile.mkdtemp()
+    db = Database(os.path.join(directory, 'test.db'))
+    writer = SnapshotWriter(db, keyframe_interval=4)
+    for i in range(10):
+        encoded = writer.encode(1, {'balances': {'USDT': 100.0 + i}, 'step': i})
+        db.execute_write(
+            "INSERT INTO portfolio_snapshots (user_id, total_value, total_pnl, positions_count, snapshot_data, "
+            "created_at) VALUES (?, ?, ?, ?, ?, ?)", (1, 100.0 + i, 0.0, 1, encoded, f'2024-01-10 12:00:{i:02d}'))
+    archive = TradeArchive(db, os.path.join(directory, 'archive'), batch_size=3)
+
+    # Rows 0-5 are older than the cutoff; row 4 is the keyframe of rows 5-7
+    moved = archive.rollover('2024-01-10 12:00:06')
+    assert moved['portfolio_snapshots'] == 4
+    history = SnapshotReader(db).history(1)
+    assert [row['snapshot_data']['step'] for row in history] == list(range(4, 10))
+    assert archive.query('portfolio_snapshots', user_id=1)['id'].tolist() == list(range(1, 11))
+    db.close()
+
+
+def test_monthly_report():
+    """Monthly rollup spans archived and live months"""
+    db, archive = make_archive()
+    archive.rollover('2024-02-01')
+    report = archive.monthly_report(user_id=1)
+    assert [m['month'] for m in report['months']] == ['2024-01', '2024-02', '2024-03']
+    january = report['months'][0]
+    assert january['trades'] == 10
+    assert january['total_value'] == 1019.0 and january['total_pnl'] == 19.0
+    assert january['volume'] == sum(100.0 + i for i in range(0, 20, 2))
+    db.close()
+
+
+if __name__ == "__main__":
+    for test in (test_rollover_moves_cold_rows, test_query_merges_hot_and_cold,
+                 test_rollover_keeps_snapshot_keyframes_for_hot_deltas, test_monthly_report):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test multi-user auto-trader scheduler
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trader_scheduler import TraderScheduler
+
+STEP = 5 * 60_000
+
+
+class FakeCandleStore:
+    """Serves 5M candles up to `now`, counting reads per symbol"""
+
+    def __init__(self, now_ms):
+        self.now_ms = now_ms
+        self.reads = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol, interval='5M', limit=100):
+        with self._lock:
+            self.reads[symbol] = self.reads.get(symbol, 0) + 1
+        last = self.now_ms - self.now_ms % STEP
+        times = np.arange(last - (limit - 1) * STEP, last + 1, STEP, dtype=np.int64)
+        return times, np.ones((limit, 5))
+
+
+class RecordingTrader:
+    created = 0
+
+    def __init__(self, user_id):
+        RecordingTrader.created += 1
+        self.user_id = user_id
+        self.bars = []
+
+    def on_candle(self, symbol, times, values):
+        self.bars.append(int(times[-1]))
+        if self.user_id == 'broken':
+            raise RuntimeError('strategy blew up')
+
+
+def test_one_instance_per_user_under_concurrency():
+    """Concurrent starts for the same user create a single trader"""
+    RecordingTrader.created = 0
+    scheduler = TraderScheduler(FakeCandleStore(0), lambda uid: (time.sleep(0.01), RecordingTrader(uid))[1])
+    traders = []
+    threads = [threading.Thread(target=lambda: traders.append(scheduler.get_trader(1))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert RecordingTrader.created == 1
+    assert all(t is traders[0] for t in traders)
+
+
+def test_feeds_are_shared_and_only_closed_bars_dispatch():
+    """500 users on 3 symbols cost 3 reads per cycle; each new closed bar is evaluated once per user"""
+    now_ms = 1_700_000_000_000 + 60_000
+    store = FakeCandleStore(now_ms)
+    scheduler = TraderScheduler(store, RecordingTrader, lookback=50)
+    symbols = ['BTC_USDT', 'ETH_USDT', 'SOL_USDT']
+    assert scheduler.status(0)['is_running'] is False
+    for uid in range(500):
+        scheduler.start_user(uid, symbols[uid % 3])
+    assert scheduler.status(0)['is_running'] is True
+
+    assert scheduler.run_once(now_ms / 1000) == 500
+    assert store.reads == {s: 1 for s in symbols}
+    trader = scheduler.get_trader(0)
+    open_bar = now_ms - now_ms % STEP
+    assert trader.bars == [open_bar - STEP]
+
+    # Same bar again: nothing to do, but the feed is still read once per symbol
+    assert scheduler.run_once(now_ms / 1000) == 0
+    store.now_ms += STEP
+    assert scheduler.run_once(store.now_ms / 1000) == 500
+    assert trader.bars == [open_bar - STEP, open_bar]
+    assert store.reads == {s: 3 for s in symbols}
+    assert scheduler.stats()['feeds'] == 3 and scheduler.stats()['active_users'] == 500
+
+    scheduler.stop_user(0)
+    store.now_ms += STEP
+    assert scheduler.run_once(store.now_ms / 1000) == 499
+    assert not scheduler.status(0)['active'] and scheduler.status(0)['evaluations'] == 2
+    assert scheduler.status(0)['is_running'] is False
+
+
+def test_custom_evaluation_step():
+    """An evaluate hook drives traders that have no on_candle (e.g. auto_trader instances)"""
+    now_ms = 1_700_000_000_000
+    calls = []
+    scheduler = TraderScheduler(FakeCandleStore(now_ms), lambda uid: object(),
+                                evaluate=lambda trader, symbol, times, values: calls.append((trader, symbol)))
+    scheduler.start_user(7, 'ETH_USDT')
+    assert scheduler.run_once(now_ms / 1000 + 1) == 1
+    assert calls == [(scheduler.get_trader(7), 'ETH_USDT')]
+    assert scheduler.status(7)['evaluations'] == 1 and scheduler.status(7)['errors'] == 0
+
+
+def test_factory_errors_fail_start_user():
+    """A trader that cannot be built fails start_user loudly and leaves nothing scheduled"""
+    def factory(uid):
+        raise AttributeError('no evaluation step')
+    scheduler = TraderScheduler(FakeCandleStore(0), factory)
+    try:
+        scheduler.start_user(1, 'BTC_USDT')
+        assert False, 'start_user should raise'
+    except AttributeError:
+        pass
+    assert scheduler.status(1) == {'user_id': 1, 'active': False, 'is_running': False}
+    assert scheduler.stats()['users'] == 0
+
+
+def test_errors_are_isolated_and_threads_bounded():
+    """A failing trader does not stop others; the pool stays small"""
+    now_ms = 1_700_000_000_000
+    scheduler = TraderScheduler(FakeCandleStore(now_ms), RecordingTrader, max_workers=3, poll_interval=0.05)
+    before = threading.active_count()
+    for uid in ['broken'] + list(range(200)):
+        scheduler.start_user(uid, 'BTC_USDT')
+    scheduler.start()
+    deadline = time.time() + 5
+    while time.time() < deadline and scheduler.status(199)['evaluations'] == 0:
+        time.sleep(0.02)
+    assert threading.active_count() - before <= 4
+    scheduler.stop()
+    assert scheduler.status('broken')['errors'] == 1
+    assert scheduler.status('broken')['last_error'] == 'strategy blew up'
+    assert all(scheduler.status(uid)['evaluations'] == 1 for uid in range(200))
+
+
+if __name__ == '__main__':
+    for test in (test_one_instance_per_user_under_concurrency, test_feeds_are_shared_and_only_closed_bars_dispatch,
+                 test_custom_evaluation_step, test_factory_errors_fail_start_user,
+                 test_errors_are_isolated_and_threads_bounded):
+        test()
+        print(f'✅ {test.__name__}')
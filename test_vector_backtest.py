@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized exit search against the bar-by-bar loop
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_scanner import STRATEGIES
+from vector_backtest import backtest_loop, run_vector_backtest
+
+BASE_CONFIG = {
+    'rsi': {'period': 7, 'oversold': 30, 'overbought': 70},
+    'macd': {'fast': 12, 'slow': 26, 'signal': 9},
+    'bollinger_bands': {'window': 20, 'n_std': 2.0},
+    'volume_filter': {'ema_period': 20, 'multiplier': 1.5},
+    'support_resistance': {'window': 20},
+    'stop_loss_percentage': 1.5,
+    'take_profit_percentage': 2.5,
+    'backtesting': {'fee_rate': 0.0005, 'initial_balance': 1000.0}
+}
+
+RISK_VARIANTS = {
+    'fixed': {},
+    'trailing': {'trailing_stop': {'enabled': True, 'percentage': 1.0, 'enable_after_tp': False}},
+    'trail_after_tp': {'trailing_stop': {'enabled': True, 'percentage': 0.5, 'enable_after_tp': True}},
+    'dynamic': {'dynamic_sl_tp': {'enabled': True, 'atr_period': 14, 'sl_multiplier': 2.0, 'tp_multiplier': 3.0,
+                                  'min_sl_percentage': 0.5, 'min_tp_percentage': 1.0}},
+}
+
+
+def make_candles(n, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0, 0.0005, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, n)))
+    volume = rng.lognormal(0, 0.6, n)
+    return {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def test_matches_bar_by_bar():
+    """Every strategy and risk model gives the same trades as the bar-by-bar exit rules"""
+    candles = make_candles(5000)
+    for variant, overrides in RISK_VARIANTS.items():
+        config = {**BASE_CONFIG, **overrides}
+        for strategy in STRATEGIES:
+            fast = run_vector_backtest(candles, strategy, config, window=16)
+            slow = backtest_loop(candles, strategy, config)
+            assert fast['num_trades'] == slow['num_trades'], (variant, strategy)
+            for a, b in zip(fast['trades'], slow['trades']):
+                assert (a['entry_index'], a['exit_index'], a['reason']) == \
+                    (b['entry_index'], b['exit_index'], b['reason']), (variant, strategy)
+                assert abs(a['return'] - b['return']) < 1e-12
+            assert abs(fast['final_balance'] - slow['final_balance']) < 1e-6 * slow['final_balance']
+
+
+def test_exit_reasons_and_fees():
+    """Stops, targets and fees behave as configured"""
+    config = {**BASE_CONFIG, **RISK_VARIANTS['trailing']}
+    result = run_vector_backtest(make_candles(5000), 'RSI_STRATEGY', config)
+    reasons = {t['reason'] for t in result['trades']}
+    assert {'stop_loss', 'trailing_stop'} & reasons
+    for trade in result['trades']:
+        assert trade['return'] < trade['gross_return']
+    assert result['max_drawdown'] <= 0
+    assert len(result['equity_curve']) == result['num_trades']
+    assert result['signal_model'] == 'approximation'
+
+
+def test_year_of_minute_candles_runs_in_seconds():
+    """525,600 one-minute candles backtest in a few seconds"""
+    candles = make_candles(525600, seed=5)
+    config = {**BASE_CONFIG, **RISK_VARIANTS['dynamic'], **RISK_VARIANTS['trailing']}
+    started = time.perf_counter()
+    result = run_vector_backtest(candles, 'ADVANCED_STRATEGY', config, times=np.arange(525600) * 60000)
+    elapsed = time.perf_counter() - started
+    assert result['num_trades'] > 0
+    assert result['trades'][0]['exit_time'] >= result['trades'][0]['entry_time']
+    assert elapsed < 10, elapsed
+
+
+if __name__ == "__main__":
+    for test in (test_matches_bar_by_bar, test_exit_reasons_and_fees, test_year_of_minute_candles_runs_in_seconds):
+        test()
+        print(f"✅ {test.__name__}")
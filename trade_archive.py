@@ -0,0 +1,240 @@
+"""
+Columnar archive for cold trade history and portfolio snapshots.
+
+Rows older than the retention window are moved out of SQLite into Parquet
+files partitioned by user and month
+(``<root>/<table>/user_id=<id>/month=<YYYY-MM>/part-*.parquet``). Queries
+read the hot SQLite rows and the cold files together, and partition
+pruning means a report only opens the months it needs.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+SCHEMAS = {
+    'trading_history': pa.schema([
+        ('id', pa.int64()),
+        ('user_id', pa.int64()),
+        ('symbol', pa.string()),
+        ('side', pa.string()),
+        ('order_type', pa.string()),
+        ('quantity', pa.float64()),
+        ('price', pa.float64()),
+        ('status', pa.string()),
+        ('order_id', pa.string()),
+        ('strategy', pa.string()),
+        ('created_at', pa.timestamp('s')),
+    ]),
+    'portfolio_snapshots': pa.schema([
+        ('id', pa.int64()),
+        ('user_id', pa.int64()),
+        ('total_value', pa.float64()),
+        ('total_pnl', pa.float64()),
+        ('positions_count', pa.int64()),
+        ('snapshot_data', pa.string()),
+        ('created_at', pa.timestamp('s')),
+    ]),
+}
+
+# Snapshot rows form keyframe + delta chains (see snapshot_codec). A user's
+# rows are only archived below the keyframe that starts the chain of their
+# first hot row, so the deltas left in SQLite always keep their keyframe.
+COLD_FILTERS = {
+    'portfolio_snapshots': (
+        "id < COALESCE((SELECT MAX(k.id) FROM portfolio_snapshots k WHERE k.user_id IS {table}.user_id "
+        "AND (k.snapshot_data IS NULL OR k.snapshot_data NOT LIKE 'D:%') "
+        "AND k.id <= (SELECT MIN(h.id) FROM portfolio_snapshots h WHERE h.user_id IS {table}.user_id "
+        "AND h.created_at >= :cutoff)), 9223372036854775807)"
+    ),
+}
+
+PARTITIONING = ds.partitioning(pa.schema([('user_id', pa.int64()), ('month', pa.string())]), flavor='hive')
+
+
+def _to_frame(rows, table: str) -> pd.DataFrame:
+    """SQLite rows -> typed DataFrame matching the archive schema"""
+    schema = SCHEMAS[table]
+    frame = pd.DataFrame([dict(row) for row in rows], columns=schema.names)
+    frame['created_at'] = pd.to_datetime(frame['created_at']).astype('datetime64[s]')
+    frame['user_id'] = frame['user_id'].astype('Int64')
+    return frame
+
+
+class TradeArchive:
+    """Moves cold rows to Parquet and queries hot and cold data together"""
+
+    def __init__(self, db, root: str = 'data/archive', retention_days: int = 90, batch_size: int = 50000):
+        self.db = db
+        self.root = root
+        self.retention_days = int(retention_days)
+        self.batch_size = int(batch_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _path(self, table: str) -> str:
+        return os.path.join(self.root, table)
+
+    # ---- rollover --------------------------------------------------------------
+
+    def rollover(self, cutoff: Optional[str] = None) -> Dict[str, int]:
+        """Archive rows created before `cutoff` (default: now - retention) and delete them from SQLite"""
+        if cutoff is None:
+            cutoff = (datetime.utcnow() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+        moved = {}
+        with self._lock:
+            for table in SCHEMAS:
+                moved[table] = self._rollover_table(table, cutoff)
+        if any(moved.values()):
+            logger.info(f"Archived {moved} rows created before {cutoff}")
+        return moved
+
+    def _rollover_table(self, table: str, cutoff: str) -> int:
+        total = 0
+        cold = "created_at < :cutoff"
+        if table in COLD_FILTERS:
+            cold += " AND " + COLD_FILTERS[table].format(table=table)
+        while True:
+            rows = self.db.connection().execute(
+                f"SELECT * FROM {table} WHERE {cold} ORDER BY id LIMIT :limit",
+                {'cutoff': cutoff, 'limit': self.batch_size}
+            ).fetchall()
+            if not rows:
+                return total
+            frame = _to_frame(rows, table)
+            frame['month'] = frame['created_at'].dt.strftime('%Y-%m')
+            first_id, last_id = int(frame['id'].iloc[0]), int(frame['id'].iloc[-1])
+
+            # Files are written before rows are deleted; a crash in between only
+            # leaves duplicates, which query() drops by id
+            arrow = pa.Table.from_pandas(frame, schema=SCHEMAS[table].append(pa.field('month', pa.string())),
+                                         preserve_index=False)
+            pq.write_to_dataset(arrow, self._path(table), partition_cols=['user_id', 'month'],
+                                basename_template=f'part-{first_id}-{last_id}-{{i}}.parquet',
+                                existing_data_behavior='overwrite_or_ignore')
+            self.db.execute_write(f"DELETE FROM {table} WHERE id BETWEEN :first AND :last AND {cold}",
+                                  {'first': first_id, 'last': last_id, 'cutoff': cutoff})
+            total += len(rows)
+
+    # ---- queries ---------------------------------------------------------------
+
+    def query(self, table: str, user_id: Optional[int] = None, start: Optional[str] = None,
+              end: Optional[str] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Hot and cold rows of `table` as one DataFrame ordered by created_at
+
+        `start`/`end` bound created_at (end exclusive).
+        """
+        if table not in SCHEMAS:
+            raise ValueError(f'Unknown archive table: {table}')
+        schema = SCHEMAS[table]
+        columns = list(columns) if columns else schema.names
+        for required in ('id', 'created_at'):
+            if required not in columns:
+                columns.append(required)
+
+        frames = [self._query_cold(table, user_id, start, end, columns),
+                  self._query_hot(table, user_id, start, end, columns)]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return _to_frame([], table)[columns]
+        result = pd.concat(frames, ignore_index=True)
+        result = result.drop_duplicates('id', keep='last').sort_values(['created_at', 'id'], kind='stable')
+        return result.reset_index(drop=True)
+
+    def _query_cold(self, table, user_id, start, end, columns) -> pd.DataFrame:
+        path = self._path(table)
+        if not os.path.isdir(path):
+            return pd.DataFrame(columns=columns)
+        dataset = ds.dataset(path, format='parquet', partitioning=PARTITIONING)
+        expr = None
+        conditions = []
+        if user_id is not None:
+            conditions.append(ds.field('user_id') == int(user_id))
+        if start is not None:
+            start_ts = pd.Timestamp(start)
+            conditions.append(ds.field('month') >= start_ts.strftime('%Y-%m'))
+            conditions.append(ds.field('created_at') >= pa.scalar(start_ts.to_pydatetime(), pa.timestamp('s')))
+        if end is not None:
+            end_ts = pd.Timestamp(end)
+            conditions.append(ds.field('month') <= end_ts.strftime('%Y-%m'))
+            conditions.append(ds.field('created_at') < pa.scalar(end_ts.to_pydatetime(), pa.timestamp('s')))
+        for condition in conditions:
+            expr = condition if expr is None else expr & condition
+        frame = dataset.to_table(columns=columns, filter=expr).to_pandas()
+        if 'created_at' in frame:
+            frame['created_at'] = frame['created_at'].astype('datetime64[s]')
+        return frame
+
+    def _query_hot(self, table, user_id, start, end, columns) -> pd.DataFrame:
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append('user_id = ?')
+            params.append(int(user_id))
+        if start is not None:
+            clauses.append('created_at >= ?')
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+        if end is not None:
+            clauses.append('created_at < ?')
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d %H:%M:%S'))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self.db.connection().execute(f"SELECT * FROM {table}{where}", params).fetchall()
+        return _to_frame(rows, table)[columns]
+
+    def monthly_report(self, user_id: Optional[int] = None, start: Optional[str] = None,
+                       end: Optional[str] = None) -> Dict[str, Any]:
+        """Per-month trade counts/notional and closing portfolio value and PnL"""
+        trades = self.query('trading_history', user_id, start, end, ['side', 'quantity', 'price'])
+        snapshots = self.query('portfolio_snapshots', user_id, start, end, ['total_value', 'total_pnl'])
+
+        months: Dict[str, Dict[str, Any]] = {}
+        if len(trades):
+            trades['month'] = trades['created_at'].dt.strftime('%Y-%m')
+            trades['notional'] = trades['quantity'].fillna(0) * trades['price'].fillna(0)
+            trades['buy'] = trades['notional'].where(trades['side'] == 'BUY', 0.0)
+            trades['sell'] = trades['notional'].where(trades['side'] == 'SELL', 0.0)
+            grouped = trades.groupby('month').agg(trades=('id', 'size'), volume=('notional', 'sum'),
+                                                  bought=('buy', 'sum'), sold=('sell', 'sum'))
+            for month, row in grouped.iterrows():
+                months[month] = {'trades': int(row['trades']), 'volume': float(row['volume']),
+                                 'bought': float(row['bought']), 'sold': float(row['sold'])}
+        if len(snapshots):
+            snapshots['month'] = snapshots['created_at'].dt.strftime('%Y-%m')
+            closing = snapshots.groupby('month').last()
+            for month, row in closing.iterrows():
+                months.setdefault(month, {'trades': 0, 'volume': 0.0, 'bought': 0.0, 'sold': 0.0})
+                months[month]['total_value'] = float(row['total_value'])
+                months[month]['total_pnl'] = float(row['total_pnl'])
+
+        return {'months': [{'month': month, **months[month]} for month in sorted(months)]}
+
+    # ---- background job ----------------------------------------------------------
+
+    def start(self, interval_hours: float = 24.0):
+        """Run rollover periodically on a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.rollover()
+                except Exception as e:
+                    logger.error(f"Archive rollover failed: {e}")
+                self._stop.wait(interval_hours * 3600)
+
+        self._thread = threading.Thread(target=run, name='trade-archive', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
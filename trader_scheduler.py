@@ -0,0 +1,239 @@
+"""
+Central scheduler for every user's auto-trader.
+
+Instead of one polling thread per user, active users are grouped by
+(symbol, interval) feed. With a CandleEventBus, each ``candle_closed``
+event reads the feed once from the shared CandleStore and fans the
+evaluation for each subscribed user out to a small shared worker pool, so
+nothing is evaluated between candles. Without a bus, one scheduler thread
+polls every feed instead. Users get exactly one trader instance each
+(created under the registry lock), and a user whose previous evaluation is
+still running is skipped rather than queued twice.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from candle_store import interval_ms, normalize_interval
+from symbols import format_symbol
+
+logger = logging.getLogger(__name__)
+
+
+class _UserEntry:
+    """Scheduler state for one user"""
+
+    def __init__(self, user_id: Any, trader, symbol: str, interval: str):
+        self.user_id = user_id
+        self.trader = trader
+        self.symbol = symbol
+        self.interval = interval
+        self.active = False
+        self.busy = False
+        self.started_at: Optional[float] = None
+        self.last_bar: Optional[int] = None
+        self.evaluations = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+
+class TraderScheduler:
+    """Runs all users' strategy evaluations on one shared pool"""
+
+    def __init__(self, candle_store, trader_factory: Callable[[Any], Any], max_workers: int = 4,
+                 poll_interval: float = 5.0, interval: str = '5M', lookback: int = 200, bus=None,
+                 evaluate: Optional[Callable[[Any, str, Any, Any], Any]] = None):
+        self.candle_store = candle_store
+        self.bus = bus
+        self.trader_factory = trader_factory
+        # evaluate(trader, symbol, times, values) runs one decision; default: trader.on_candle
+        self.evaluate = evaluate or (lambda trader, symbol, times, values: trader.on_candle(symbol, times, values))
+        self.max_workers = int(max_workers)
+        self.poll_interval = float(poll_interval)
+        self.interval = normalize_interval(interval)
+        self.lookback = int(lookback)
+        self._users: Dict[Any, _UserEntry] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._subscriptions: Dict[Tuple[str, str], int] = {}
+        self.fetches = 0
+        self.cycles = 0
+
+    # ---- users -------------------------------------------------------------------
+
+    def get_trader(self, user_id: Any, symbol: Optional[str] = None, interval: Optional[str] = None):
+        """The user's single trader instance, created on first use"""
+        with self._lock:
+            return self._entry(user_id, symbol, interval).trader
+
+    def _entry(self, user_id: Any, symbol: Optional[str], interval: Optional[str]) -> _UserEntry:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = _UserEntry(user_id, self.trader_factory(user_id), format_symbol(symbol or 'BTC_USDT'),
+                               normalize_interval(interval or self.interval))
+            self._users[user_id] = entry
+            logger.info(f"Trader created for user {user_id}")
+        else:
+            if symbol:
+                entry.symbol = format_symbol(symbol)
+            if interval:
+                entry.interval = normalize_interval(interval)
+        return entry
+
+    def start_user(self, user_id: Any, symbol: Optional[str] = None, interval: Optional[str] = None) -> Dict[str, Any]:
+        """Schedule a user's evaluations on each close of `interval` (idempotent)"""
+        with self._lock:
+            entry = self._entry(user_id, symbol, interval)
+            if not entry.active:
+                entry.active = True
+                entry.started_at = time.time()
+                entry.last_bar = None
+            self._sync_subscriptions()
+        return self.status(user_id)
+
+    def stop_user(self, user_id: Any) -> Dict[str, Any]:
+        """Stop scheduling a user; the trader instance is kept for a later restart"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                entry.active = False
+            self._sync_subscriptions()
+        return self.status(user_id)
+
+    def remove_user(self, user_id: Any):
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._sync_subscriptions()
+
+    def _sync_subscriptions(self):
+        """Subscribe to exactly the feeds active users trigger on (caller holds the lock)"""
+        if self.bus is None:
+            return
+        needed = {(e.symbol, e.interval) for e in self._users.values() if e.active}
+        for key in needed - set(self._subscriptions):
+            self._subscriptions[key] = self.bus.subscribe(key[0], key[1], self.on_candle_closed)
+        for key in set(self._subscriptions) - needed:
+            self.bus.unsubscribe(self._subscriptions.pop(key))
+
+    def status(self, user_id: Any) -> Dict[str, Any]:
+        entry = self._users.get(user_id)
+        if entry is None:
+            return {'user_id': user_id, 'active': False, 'is_running': False}
+        return {
+            'user_id': user_id,
+            'active': entry.active,
+            # The dashboard (app.js, strategy_status push) reads is_running
+            'is_running': entry.active,
+            'symbol': entry.symbol,
+            'interval': entry.interval,
+            'started_at': entry.started_at,
+            'last_bar': entry.last_bar,
+            'evaluations': entry.evaluations,
+            'errors': entry.errors,
+            'last_error': entry.last_error
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = [e for e in self._users.values() if e.active]
+        return {
+            'users': len(self._users),
+            'active_users': len(active),
+            'feeds': len({(e.symbol, e.interval) for e in active}),
+            'event_driven': self.bus is not None,
+            'workers': self.max_workers,
+            'fetches': self.fetches,
+            'cycles': self.cycles,
+            'running': self._pool is not None
+        }
+
+    # ---- scheduling ----------------------------------------------------------------
+
+    def start(self):
+        """Start the worker pool, plus the polling thread when there is no event bus"""
+        with self._lock:
+            if self._pool is not None:
+                return
+            self._stop.clear()
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='trader')
+            if self.bus is None:
+                self._thread = threading.Thread(target=self._run, name='trader-scheduler', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Trader scheduler cycle failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def on_candle_closed(self, symbol: str, interval: str, open_time: int) -> int:
+        """candle_closed handler: evaluate users trading this (symbol, interval)"""
+        close_ms = int(open_time) + interval_ms(interval)
+        with self._lock:
+            entries = [e for e in self._users.values() if e.active and e.symbol == symbol and e.interval == interval]
+        return self._dispatch(symbol, interval, entries, close_ms) if entries else 0
+
+    def run_once(self, now: Optional[float] = None) -> int:
+        """One polling cycle: read each feed once and dispatch users whose feed has a new closed candle"""
+        now_ms = int((time.time() if now is None else now) * 1000)
+        with self._lock:
+            feeds: Dict[Tuple[str, str], List[_UserEntry]] = {}
+            for entry in self._users.values():
+                if entry.active:
+                    feeds.setdefault((entry.symbol, entry.interval), []).append(entry)
+        self.cycles += 1
+        return sum(self._dispatch(symbol, interval, entries, now_ms) for (symbol, interval), entries in feeds.items())
+
+    def _dispatch(self, symbol: str, interval: str, entries: List[_UserEntry], close_ms: int) -> int:
+        """Read one feed and submit every entry that has not seen its latest closed candle"""
+        times, values = self.candle_store.get(symbol, interval, self.lookback + 1)
+        self.fetches += 1
+        # Drop the candle still in progress: decisions only see closed candles
+        if len(times) and int(times[-1]) + interval_ms(interval) > close_ms:
+            times, values = times[:-1], values[:-1]
+        if not len(times):
+            return 0
+        bar = int(times[-1])
+        dispatched = 0
+        for entry in entries:
+            with self._lock:
+                if entry.busy or not entry.active or (entry.last_bar is not None and entry.last_bar >= bar):
+                    continue
+                entry.busy = True
+                entry.last_bar = bar
+            dispatched += 1
+            self._submit(entry, times, values)
+        return dispatched
+
+    def _submit(self, entry: _UserEntry, times, values):
+        if self._pool is None:
+            self._evaluate(entry, times, values)
+        else:
+            self._pool.submit(self._evaluate, entry, times, values)
+
+    def _evaluate(self, entry: _UserEntry, times, values):
+        try:
+            self.evaluate(entry.trader, entry.symbol, times, values)
+            entry.evaluations += 1
+        except Exception as e:
+            entry.errors += 1
+            entry.last_error = str(e)
+            logger.error(f"Auto-trader evaluation failed for user {entry.user_id}: {e}")
+        finally:
+            entry.busy = False
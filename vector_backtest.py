@@ -0,0 +1,220 @@
+"""
+Vectorized backtesting of approximations of the built-in strategies.
+
+Signals for every bar come from the scanner's vectorized signal functions,
+which approximate TradingStrategies rather than call it, so results are
+not what ``backtesting.run_backtest`` reports for the real strategies and
+are labelled ``signal_model: 'approximation'``. Use them to rank parameters
+and compare approximated strategies quickly; confirm a choice with the real
+backtester before trading it.
+
+Exits are searched per trade with array operations over a growing window
+of bars after the entry (stop loss, take profit, trailing stop, ATR-based
+dynamic SL/TP and sell signals), so Python-level work scales with the
+number of trades rather than the number of candles. ``backtest_loop``
+applies the same exit rules bar by bar to the same signals. It only checks
+the vectorized exit search, not how closely the signals follow the real
+strategies.
+
+Rules shared by both paths (long only, one position at a time):
+- a BUY signal at the close of bar i enters at close[i]
+- from bar i+1 on, the stop is checked first (fill at min(open, stop)),
+  then take profit (fill at max(open, tp)), then a SELL signal (fill at
+  close)
+- the trailing stop trails the highest high of the bars before the
+  current one; with ``enable_after_tp`` it only arms once that high has
+  reached the take-profit level, and take profit then no longer exits
+- the next entry is the first BUY signal after the exit bar
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from indicators import atr_series
+from market_scanner import SIGNAL_MODEL, SIGNAL_MODEL_NOTE, signal_series
+
+logger = logging.getLogger(__name__)
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+
+class BacktestSettings:
+    """Risk and cost parameters read from the bot config"""
+
+    def __init__(self, config: Dict[str, Any]):
+        backtest = config.get('backtesting', {})
+        trailing = config.get('trailing_stop', {})
+        dynamic = config.get('dynamic_sl_tp', {})
+        self.stop_loss = config.get('stop_loss_percentage', 1.5) / 100.0
+        self.take_profit = config.get('take_profit_percentage', 2.5) / 100.0
+        self.trailing = bool(trailing.get('enabled', False))
+        self.trailing_pct = trailing.get('percentage', config.get('trailing_stop_percentage', 1.0)) / 100.0
+        self.trail_after_tp = bool(trailing.get('enable_after_tp', False))
+        self.dynamic = bool(dynamic.get('enabled', False))
+        self.atr_period = int(dynamic.get('atr_period', 14))
+        self.sl_multiplier = float(dynamic.get('sl_multiplier', 2.0))
+        self.tp_multiplier = float(dynamic.get('tp_multiplier', 3.0))
+        self.min_sl = dynamic.get('min_sl_percentage', 0.0) / 100.0
+        self.min_tp = dynamic.get('min_tp_percentage', 0.0) / 100.0
+        self.fee = float(backtest.get('fee_rate', 0.0005))
+        self.fraction = float(backtest.get('position_fraction', 1.0))
+        self.initial_balance = float(backtest.get('initial_balance', 1000.0))
+
+    def levels(self, entry: float, atr: float):
+        """(stop loss, take profit) prices for an entry"""
+        if self.dynamic and np.isfinite(atr):
+            sl_distance = max(atr * self.sl_multiplier, entry * self.min_sl)
+            tp_distance = max(atr * self.tp_multiplier, entry * self.min_tp)
+            return entry - sl_distance, entry + tp_distance
+        return entry * (1 - self.stop_loss), entry * (1 + self.take_profit)
+
+
+def _trade(settings, entry_index, exit_index, entry, exit_price, reason):
+    gross = exit_price / entry - 1.0
+    net = exit_price * (1 - settings.fee) / (entry * (1 + settings.fee)) - 1.0
+    return {'entry_index': entry_index, 'exit_index': exit_index, 'entry_price': entry,
+            'exit_price': exit_price, 'reason': reason, 'gross_return': gross, 'return': net}
+
+
+def _summary(settings, trades: List[Dict[str, Any]], times=None) -> Dict[str, Any]:
+    returns = np.array([t['return'] for t in trades], dtype=np.float64)
+    equity = settings.initial_balance * np.cumprod(1.0 + settings.fraction * returns) if len(returns) else np.array([])
+    curve = np.concatenate([[settings.initial_balance], equity])
+    peak = np.maximum.accumulate(curve)
+    if times is not None:
+        for t in trades:
+            t['entry_time'] = int(times[t['entry_index']])
+            t['exit_time'] = int(times[t['exit_index']])
+    wins = int((returns > 0).sum())
+    return {
+        'trades': trades,
+        'num_trades': len(trades),
+        'wins': wins,
+        'win_rate': wins / len(trades) if trades else None,
+        'initial_balance': settings.initial_balance,
+        'final_balance': float(curve[-1]),
+        'total_return': float(curve[-1] / settings.initial_balance - 1.0),
+        'max_drawdown': float((curve / peak - 1.0).min()),
+        'equity_curve': curve[1:].tolist()
+    }
+
+
+def prepare(arrays: Dict[str, np.ndarray], strategy: str, config: Dict[str, Any]):
+    """OHLCV columns, per-bar direction and ATR"""
+    o, h, l, c, v = (np.asarray(arrays[k], dtype=np.float64) for k in OHLCV)
+    direction = signal_series(arrays, config, [strategy])[strategy]['direction'].astype(np.int8)
+    settings = BacktestSettings(config)
+    atr = atr_series(h, l, c, settings.atr_period) if settings.dynamic else np.full(c.shape, np.nan)
+    return settings, o, h, l, c, direction, atr
+
+
+def run_vector_backtest(arrays: Dict[str, np.ndarray], strategy: str, config: Dict[str, Any],
+                 times: Optional[Sequence[int]] = None, window: int = 64) -> Dict[str, Any]:
+    """Vectorized backtest of one approximated strategy over 1-D OHLCV arrays"""
+    started = time.perf_counter()
+    settings, o, h, l, c, direction, atr = prepare(arrays, strategy, config)
+    n = len(c)
+    buys = np.flatnonzero(direction == 1)
+    sells = direction == -1
+    tp_exits = not (settings.trailing and settings.trail_after_tp)
+
+    trades = []
+    k = 0
+    while k < len(buys):
+        e = int(buys[k])
+        if e >= n - 1:
+            break
+        entry = c[e]
+        sl, tp = settings.levels(entry, atr[e])
+
+        size = window
+        while True:
+            end = min(n, e + 1 + size)
+            seg = slice(e + 1, end)
+            highs = h[seg]
+            peak_prev = np.maximum.accumulate(np.concatenate(([entry], highs[:-1])))
+            if settings.trailing:
+                trail = np.maximum(sl, peak_prev * (1 - settings.trailing_pct))
+                stop = np.where(peak_prev >= tp, trail, sl) if settings.trail_after_tp else trail
+            else:
+                stop = np.full(len(highs), sl)
+            hit_stop = l[seg] <= stop
+            hit_tp = highs >= tp if tp_exits else np.zeros(len(highs), dtype=bool)
+            hits = hit_stop | hit_tp | sells[seg]
+            if hits.any():
+                j = int(np.argmax(hits))
+                x = e + 1 + j
+                if hit_stop[j]:
+                    price = min(o[x], stop[j])
+                    reason = 'trailing_stop' if stop[j] > sl else 'stop_loss'
+                elif hit_tp[j]:
+                    price, reason = max(o[x], tp), 'take_profit'
+                else:
+                    price, reason = c[x], 'signal'
+                break
+            if end == n:
+                x, price, reason = n - 1, c[n - 1], 'end'
+                break
+            size *= 2
+
+        trades.append(_trade(settings, e, x, float(entry), float(price), reason))
+        k = int(np.searchsorted(buys, x + 1))
+
+    result = _summary(settings, trades, times)
+    result['strategy'] = strategy
+    result['signal_model'] = SIGNAL_MODEL
+    result['signal_model_note'] = SIGNAL_MODEL_NOTE
+    result['candles'] = n
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def backtest_loop(arrays: Dict[str, np.ndarray], strategy: str, config: Dict[str, Any],
+                  times: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """Bar-by-bar version of run_vector_backtest's exit rules, to cross-check the exit search"""
+    started = time.perf_counter()
+    settings, o, h, l, c, direction, atr = prepare(arrays, strategy, config)
+    o, h, l, c, direction, atr = (a.tolist() for a in (o, h, l, c, direction, atr))
+    n = len(c)
+    tp_exits = not (settings.trailing and settings.trail_after_tp)
+
+    trades = []
+    position = None
+    for i in range(n):
+        if position is None:
+            if direction[i] == 1 and i < n - 1:
+                sl, tp = settings.levels(c[i], atr[i])
+                position = {'index': i, 'entry': c[i], 'sl': sl, 'tp': tp, 'peak': c[i]}
+            continue
+
+        sl, tp, peak = position['sl'], position['tp'], position['peak']
+        stop = sl
+        if settings.trailing and (not settings.trail_after_tp or peak >= tp):
+            stop = max(sl, peak * (1 - settings.trailing_pct))
+
+        exit_price = None
+        if l[i] <= stop:
+            exit_price, reason = min(o[i], stop), 'trailing_stop' if stop > sl else 'stop_loss'
+        elif tp_exits and h[i] >= tp:
+            exit_price, reason = max(o[i], tp), 'take_profit'
+        elif direction[i] == -1:
+            exit_price, reason = c[i], 'signal'
+        elif i == n - 1:
+            exit_price, reason = c[i], 'end'
+
+        if exit_price is not None:
+            trades.append(_trade(settings, position['index'], i, position['entry'], exit_price, reason))
+            position = None
+        else:
+            position['peak'] = max(peak, h[i])
+
+    result = _summary(settings, trades, times)
+    result['strategy'] = strategy
+    result['signal_model'] = SIGNAL_MODEL
+    result['signal_model_note'] = SIGNAL_MODEL_NOTE
+    result['candles'] = n
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result